@@ -1,80 +1,203 @@
 from __future__ import annotations
 
-from typing import Tuple
+from dataclasses import dataclass
+from typing import Any, List, Mapping, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from numpy.typing import NDArray
 
+from .errors import ValidationError
+from .panel import PanelIndex, event_times
 
-def _agg_cell_mean(data: pd.DataFrame) -> pd.DataFrame:
-    """Simple average across treated cells for each event time."""
+_SUMMARY_COLUMNS = ["k", "estimate", "n", "weight_scheme"]
 
-    grouped = data.groupby("k", sort=True)
-    estimate = grouped["tau"].mean().rename("estimate")
-    nobs = grouped.size().rename("n")
-    return pd.concat([estimate, nobs], axis=1).reset_index()
 
+@dataclass(frozen=True)
+class CellCube:
+    """
+    Cohort x period sufficient statistics of the treated-cell effects (the ATT(g, t) cube).
 
-def _agg_cohort_equal(data: pd.DataFrame) -> pd.DataFrame:
-    """Equal weight across cohorts after averaging within each cohort."""
+    Every array is ``G x T`` over ``cohort_levels`` and ``period_levels``: the number of
+    treated cells ``count``, the sum ``total`` and sum of squares ``total_sq`` of their
+    ``tau``, and the event time ``k`` of the cell (NaN where ``count == 0``). Periods are
+    calendar times when the cube is built from a :class:`~didimpute.panel.PanelIndex` and
+    event times otherwise; either way a (cohort, period) pair fixes ``k``. Every aggregation
+    scheme is a weighted combination of the cell means ``total / count``, so aggregation
+    costs ``O(G * T)`` regardless of the panel length.
+    """
 
-    within = (
-        data.groupby(["k", "cohort"], sort=True)["tau"]
-        .mean()
-        .rename("mu_gk")
-        .reset_index()
-    )
-    estimate = within.groupby("k", sort=True)["mu_gk"].mean().rename("estimate")
-    nobs = data.groupby("k", sort=True).size().rename("n")
-    return pd.concat([estimate, nobs], axis=1).reset_index()
+    cohort_levels: pd.Index
+    period_levels: pd.Index
+    k: NDArray[np.float64]
+    count: NDArray[np.float64]
+    total: NDArray[np.float64]
+    total_sq: NDArray[np.float64]
 
+    @classmethod
+    def from_cells(
+        cls,
+        df: pd.DataFrame,
+        tau: np.ndarray,
+        k_col: Optional[str],
+        mask: np.ndarray,
+        cohort_col: str,
+        panel: Optional[PanelIndex] = None,
+    ) -> "CellCube":
+        """
+        Build the cube from cell-level effects with one ``bincount`` per statistic.
 
-def _agg_cohort_share(data: pd.DataFrame) -> pd.DataFrame:
-    """Weight cohort means by their share of treated cells at each event time."""
+        Cells enter when ``mask`` is set and ``tau``, ``k``, and the cohort are defined. With
+        ``panel`` the cohort and period codes are its int32 cohort and time codes; otherwise
+        the cohort values and event times are factorized. ``k`` is read from ``df[k_col]``, or
+        from ``panel`` when ``k_col`` is ``None``.
+        """
 
-    counts = (
-        data.groupby(["k", "cohort"], sort=True)
-        .size()
-        .rename("n_gk")
-        .reset_index()
-    )
-    means = (
-        data.groupby(["k", "cohort"], sort=True)["tau"]
-        .mean()
-        .rename("mu_gk")
-        .reset_index()
-    )
-    merged = pd.merge(means, counts, on=["k", "cohort"], how="inner")
-    merged["N_k"] = merged.groupby("k")["n_gk"].transform("sum")
-    merged["weight"] = merged["n_gk"] / merged["N_k"]
-    merged["wmu"] = merged["weight"] * merged["mu_gk"]
+        tau_arr = np.asarray(tau, dtype=float)
+        k_values = event_times(df, panel, k_col)
+        valid = np.asarray(mask, dtype=bool) & np.isfinite(tau_arr) & np.isfinite(k_values)
+        cohort_levels: Any
+        period_levels: Any
+        if panel is not None:
+            valid &= panel.cohort_codes >= 0
+            rows = np.flatnonzero(valid)
+            cohort_codes = panel.cohort_codes[rows].astype(np.intp)
+            period_codes = panel.time_codes[rows].astype(np.intp)
+            cohort_levels, period_levels = panel.cohort_levels, panel.time_levels
+        else:
+            cohort_values = df[cohort_col].to_numpy()
+            if cohort_values.dtype.kind in {"f", "i"}:
+                valid &= np.isfinite(cohort_values.astype(float))
+            else:
+                valid &= pd.notna(cohort_values)
+            rows = np.flatnonzero(valid)
+            cohort_codes, cohort_levels = pd.factorize(cohort_values[rows], sort=True)
+            period_codes, period_levels = pd.factorize(k_values[rows], sort=True)
+
+        n_cohorts, n_periods = len(cohort_levels), len(period_levels)
+        cells = cohort_codes.astype(np.intp) * n_periods + period_codes.astype(np.intp)
+        size = n_cohorts * n_periods
+        values = tau_arr[rows]
+
+        def _cube(weights: Optional[NDArray[np.float64]]) -> NDArray[np.float64]:
+            flat = np.bincount(cells, weights=weights, minlength=size).astype(float)
+            return np.asarray(flat.reshape(n_cohorts, n_periods), dtype=float)
+
+        k_cube = np.full(size, np.nan)
+        k_cube[cells] = np.round(k_values[rows])
+        return cls(
+            cohort_levels=pd.Index(cohort_levels),
+            period_levels=pd.Index(period_levels),
+            k=k_cube.reshape(n_cohorts, n_periods),
+            count=_cube(None),
+            total=_cube(values),
+            total_sq=_cube(values * values),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Occupied cells as a long frame with the cell mean and standard deviation of ``tau``."""
+
+        cohort, period = np.nonzero(self.count > 0)
+        count = self.count[cohort, period]
+        mean = self.total[cohort, period] / count
+        with np.errstate(invalid="ignore", divide="ignore"):
+            var = (self.total_sq[cohort, period] - count * mean * mean) / (count - 1.0)
+        out: pd.DataFrame = pd.DataFrame(
+            {
+                "cohort": self.cohort_levels[cohort],
+                "period": self.period_levels[period],
+                "k": self.k[cohort, period].astype(int),
+                "n": count.astype(int),
+                "estimate": mean,
+                "sd": np.sqrt(np.maximum(var, 0.0)),
+            },
+        )
+        return out
+
+
+def _empty_summary() -> pd.DataFrame:
+    """Summary frame with no event times."""
+
+    empty: pd.DataFrame = pd.DataFrame(columns=_SUMMARY_COLUMNS)
+    return empty
+
+
+def aggregate_cube(
+    cube: CellCube,
+    weight_scheme: str,
+    horizons: Tuple[int, int],
+    minN: int,
+) -> pd.DataFrame:
+    """
+    Aggregate a :class:`CellCube` to event time.
+
+    Cells are folded into (cohort, k) means with per-k ``bincount``; ``nobs`` and
+    ``cohort_share`` weight each cohort mean by its cell count (the two coincide), and
+    ``equal`` averages the cohorts present at ``k``. Arguments and the returned frame are as
+    in :func:`aggregate_event_time`.
+    """
+
+    occupied = cube.count > 0
+    k_min, k_max = horizons
+    occupied &= (cube.k >= k_min) & (cube.k <= k_max)
+    if not occupied.any():
+        return _empty_summary()
+
+    ks, k_codes = np.unique(cube.k[occupied].astype(np.int64), return_inverse=True)
+    k_codes = k_codes.ravel()
+    n_k = len(ks)
+    count = cube.count[occupied]
+    total = cube.total[occupied]
+    n_per_k = np.bincount(k_codes, weights=count, minlength=n_k)
+    if weight_scheme in {"nobs", "cohort_share"}:
+        estimate = np.bincount(k_codes, weights=total, minlength=n_k) / n_per_k
+    elif weight_scheme == "equal":
+        estimate = np.bincount(k_codes, weights=total / count, minlength=n_k) / np.bincount(
+            k_codes, minlength=n_k,
+        )
+    else:  # pragma: no cover - guarded by validate_config
+        raise ValueError(f"Unknown weight_scheme: {weight_scheme}")
 
-    estimate = merged.groupby("k", sort=True)["wmu"].sum().rename("estimate")
-    nobs = data.groupby("k", sort=True).size().rename("n")
-    return pd.concat([estimate, nobs], axis=1).reset_index()
+    keep = n_per_k >= minN
+    if not keep.any():
+        return _empty_summary()
+    out: pd.DataFrame = pd.DataFrame(
+        {
+            "k": ks[keep].astype(int),
+            "estimate": estimate[keep],
+            "n": n_per_k[keep].astype(int),
+            "weight_scheme": weight_scheme,
+        },
+    )
+    return out
 
 
 def aggregate_event_time(
     df: pd.DataFrame,
     tau: np.ndarray,
-    k_col: str,
+    k_col: Optional[str],
     mask: np.ndarray,
     cohort_col: str,
     weight_scheme: str,
     horizons: Tuple[int, int],
     minN: int,
+    panel: Optional[PanelIndex] = None,
 ) -> pd.DataFrame:
     """
     Aggregate cell-level effects to event time using the requested weighting scheme.
 
+    Builds a :class:`CellCube` and aggregates it with :func:`aggregate_cube`; callers that
+    aggregate the same cells repeatedly should keep the cube and call the latter directly.
+
     Parameters
     ----------
     df : pd.DataFrame
         Prepared panel (output of ``validate_and_prepare``).
     tau : np.ndarray
         Cell-level effects aligned with ``df``.
-    k_col : str
-        Column containing event time ``k``.
+    k_col : str | None
+        Column containing event time ``k``; ``None`` reads the event times of ``panel``.
     mask : np.ndarray
         Boolean mask selecting treated-post cells to include.
     cohort_col : str
@@ -85,6 +208,9 @@ def aggregate_event_time(
         Inclusive event-time range to retain.
     minN : int
         Minimum number of cells required at a given ``k``.
+    panel : PanelIndex | None
+        Integer-coded structure of ``df``; when given, cohorts are grouped by their int32
+        codes instead of the raw ``cohort_col`` values.
 
     Returns
     -------
@@ -92,47 +218,110 @@ def aggregate_event_time(
         Columns ``[k, estimate, n, weight_scheme]`` (possibly empty).
     """
 
-    tau_arr = np.asarray(tau, dtype=float)
-    k_values = np.asarray(df[k_col].to_numpy(), dtype=float)
-    mask_arr = np.asarray(mask, dtype=bool)
-    cohort_values = df[cohort_col].to_numpy()
+    cube = CellCube.from_cells(df, tau, k_col, mask, cohort_col, panel=panel)
+    return aggregate_cube(cube, weight_scheme, horizons, minN)
 
-    valid = mask_arr & np.isfinite(tau_arr) & np.isfinite(k_values)
-    if cohort_values.dtype.kind in {"f", "i"}:
-        valid &= np.isfinite(cohort_values.astype(float))
-    else:
-        valid &= pd.notna(cohort_values)
 
-    if not np.any(valid):
-        return pd.DataFrame(columns=["k", "estimate", "n", "weight_scheme"])
+_ESTIMAND_FILTERS = ("k", "time", "cohort")
+_ESTIMAND_KEYS = _ESTIMAND_FILTERS + ("weight", "normalize")
 
-    data = pd.DataFrame(
-        {
-            "k": k_values[valid].astype(int),
-            "tau": tau_arr[valid],
-            "cohort": cohort_values[valid],
-        },
-    )
 
-    k_min, k_max = horizons
-    data = data[(data["k"] >= k_min) & (data["k"] <= k_max)]
-    data = data[data["cohort"].notna()]
-    if data.empty:
-        return pd.DataFrame(columns=["k", "estimate", "n", "weight_scheme"])
+def compile_estimands(
+    cells: pd.DataFrame,
+    spec: Mapping[str, Mapping[str, Any]],
+    columns: Mapping[str, str],
+) -> Tuple[List[str], sp.csr_matrix]:
+    """
+    Compile a declarative estimand spec to a sparse estimand-by-cell weight matrix.
+
+    Each entry ``name -> {...}`` selects treated cells with optional filters on ``k``,
+    ``time``, and ``cohort``: a scalar keeps equal values, a ``(lo, hi)`` tuple an inclusive
+    range, and a list or array its members. ``weight`` gives non-negative cell weights as a
+    column of ``cells`` or an array aligned with its rows (default: equal weights) and
+    ``normalize`` (default ``True``) rescales each row to sum to one, so the estimand is a
+    weighted average of ``tau``.
+
+    Parameters
+    ----------
+    cells : pd.DataFrame
+        One row per treated cell, in the column order of the weight matrix.
+    spec : Mapping[str, Mapping[str, Any]]
+        Estimand definitions keyed by name.
+    columns : Mapping[str, str]
+        Column of ``cells`` holding each of ``k``, ``time``, and ``cohort``.
+
+    Returns
+    -------
+    tuple[list[str], scipy.sparse.csr_matrix]
+        Estimand names and the ``E x len(cells)`` weight matrix. Estimands selecting no
+        cells have an empty row.
+
+    Raises
+    ------
+    ValidationError
+        If an entry has unknown keys, a malformed filter, or an invalid weight column.
+    """
+
+    names: List[str] = []
+    rows: List[NDArray[np.intp]] = []
+    cols: List[NDArray[np.intp]] = []
+    values: List[NDArray[np.float64]] = []
+    for position, (name, entry) in enumerate(spec.items()):
+        if not isinstance(entry, Mapping):
+            raise ValidationError(f"Estimand {name!r} must be a mapping of filters.")
+        unknown = sorted(set(entry) - set(_ESTIMAND_KEYS))
+        if unknown:
+            raise ValidationError(
+                f"Unknown keys for estimand {name!r}: {unknown}; expected {_ESTIMAND_KEYS}.",
+            )
+        selected = np.ones(len(cells), dtype=bool)
+        for key in _ESTIMAND_FILTERS:
+            if key in entry:
+                selected &= _select(cells[columns[key]].to_numpy(), entry[key], name, key)
+        weights = np.ones(len(cells), dtype=float)
+        column = entry.get("weight")
+        if isinstance(column, str):
+            if column not in cells.columns:
+                raise ValidationError(f"Weight column {column!r} of estimand {name!r} not found.")
+            weights = pd.to_numeric(cells[column], errors="coerce").to_numpy(dtype=float)
+        elif column is not None:
+            weights = np.asarray(column, dtype=float)
+            if weights.shape != (len(cells),):
+                raise ValidationError(
+                    f"Weights of estimand {name!r} must have one entry per cell ({len(cells)}).",
+                )
+        if np.any(~np.isfinite(weights[selected])) or np.any(weights[selected] < 0):
+            raise ValidationError(f"Weights of estimand {name!r} must be finite and non-negative.")
+        index = np.flatnonzero(selected & (weights != 0))
+        chosen = weights[index]
+        if entry.get("normalize", True) and chosen.sum() > 0:
+            chosen = chosen / chosen.sum()
+        names.append(str(name))
+        rows.append(np.full(len(index), position, dtype=np.intp))
+        cols.append(index)
+        values.append(chosen)
+
+    matrix = sp.csr_matrix(
+        (
+            np.concatenate(values) if values else np.zeros(0),
+            (
+                np.concatenate(rows) if rows else np.zeros(0, dtype=np.intp),
+                np.concatenate(cols) if cols else np.zeros(0, dtype=np.intp),
+            ),
+        ),
+        shape=(len(names), len(cells)),
+    )
+    return names, matrix
 
-    if weight_scheme == "nobs":
-        aggregated = _agg_cell_mean(data)
-    elif weight_scheme == "equal":
-        aggregated = _agg_cohort_equal(data)
-    elif weight_scheme == "cohort_share":
-        aggregated = _agg_cohort_share(data)
-    else:  # pragma: no cover - guarded by validate_config
-        raise ValueError(f"Unknown weight_scheme: {weight_scheme}")
 
-    aggregated = aggregated[aggregated["n"] >= minN].copy()
-    if aggregated.empty:
-        return pd.DataFrame(columns=["k", "estimate", "n", "weight_scheme"])
+def _select(values: np.ndarray, rule: Any, name: str, key: str) -> NDArray[np.bool_]:
+    """Cells whose ``values`` satisfy one filter of :func:`compile_estimands`."""
 
-    aggregated["weight_scheme"] = weight_scheme
-    aggregated["n"] = aggregated["n"].astype(int)
-    return aggregated.sort_values("k").reset_index(drop=True)
+    if isinstance(rule, tuple):
+        if len(rule) != 2:
+            raise ValidationError(f"Range filter {key!r} of estimand {name!r} must be (lo, hi).")
+        low, high = rule
+        return np.asarray((values >= low) & (values <= high), dtype=bool)
+    if isinstance(rule, (list, set, frozenset, np.ndarray, pd.Index, pd.Series)):
+        return np.asarray(np.isin(values, list(rule)), dtype=bool)
+    return np.asarray(values == rule, dtype=bool)
@@ -1,17 +1,38 @@
 from __future__ import annotations
 
-import importlib
-from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+import copy
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
+import scipy.sparse as sp
+from scipy.stats import chi2, norm
 
-from .aggregate import aggregate_event_time
-from .counterfactual import compute_cell_effects
-from .first_stage import FirstStageModel
-from .se import attach_ses_by_k, finalize_summary_ci, pretrend_joint_test
+from .aggregate import CellCube, aggregate_cube, compile_estimands
+from .cache import StageCache, cached_stage, hash_frame, stage_key
+from .counterfactual import cell_arrays, compute_cell_effects
+from .errors import EstimationError, ValidationError
+from .first_stage import FirstStageModel, predict_many
+from .outofcore import ChunkSource, fit_out_of_core
+from .panel import PanelIndex, cluster_columns
+from .se import (
+    attach_bjs_ses,
+    attach_ses_by_k,
+    attach_wild_bootstrap_ses,
+    estimand_scores,
+    event_study_vcov,
+    event_time_vcov,
+    finalize_summary_ci,
+    pretrend_curve,
+    pretrend_from_curve,
+    treated_cells,
+    unit_influence_scores,
+    wild_bootstrap_draws,
+)
+from .sensitivity import sensitivity_bounds
 from .utils import set_seed
-from .validation import validate_and_prepare, validate_config
+from .validation import index_panel, prepare_rows, validate_and_prepare, validate_config
 
 
 @dataclass
@@ -32,22 +53,68 @@ class DidImputation:
         Optional list of control covariates.
     weight : str | None
         Optional non-negative weight column.
-    cluster : str | None
-        Cluster identifier for standard errors; defaults to ``id`` when None.
+    cluster : str | list[str] | None
+        Cluster identifier for standard errors; defaults to ``id`` when None. Several
+        columns (for example ``["state", "year"]``) request multi-way clustering by
+        Cameron-Gelbach-Miller inclusion-exclusion.
     horizons : tuple[int, int]
         Inclusive event-time horizon ``(k_min, k_max)``.
     pretrends : int
-        Maximum number of negative event times used in the pretrend test.
+        Maximum number of negative event times used in the pretrend test;
+        ``meta["pretrend_curve"]`` also reports the test for every window ``[-p, -1]``.
     weight_scheme : str
         Aggregation scheme name (``nobs``, ``equal``, or ``cohort_share``).
     fe : str
-        Fixed-effects configuration (reserved; currently ``twoway`` only).
+        Fixed-effects configuration: ``twoway`` (explicit unit/time dummies) or ``absorbing``
+        (alternating-projection demeaning over unit, time, and ``absorb`` columns). Both include
+        the first-stage donor variance in ``nobs`` SEs; ``absorbing`` solves its information
+        matrix by conjugate gradients.
     ci : float
         Confidence level for interval construction.
     minN : int
         Minimum cell count required per event time.
     random_state : int | None
         Optional seed for future stochastic routines.
+    solver : str
+        First-stage backend: ``dense`` (default) or ``sparse`` (CSR design with a sparse
+        factorization of the normal equations, suited to panels with many units).
+    absorb : list[str] | None
+        Extra fixed-effect columns (for example ``region_year``); requires ``fe="absorbing"``.
+    absorb_tol : float
+        Convergence tolerance for the alternating projections under ``fe="absorbing"``.
+    absorb_maxiter : int
+        Maximum number of projection sweeps under ``fe="absorbing"``.
+    store : str
+        First-stage storage: ``full`` keeps the untreated design, weights, and residuals for
+        diagnostics; ``lean`` keeps only coefficients, the factorization, and residual
+        summaries, which is all the estimator needs.
+    se_method : str
+        ``delta`` (default) combines the clustered treated-cell variance with the donor
+        variance of the first stage; ``bjs`` uses the conservative Borusyak-Jaravel-Spiess
+        variance built from the implied imputation weights; ``wild_bootstrap`` draws ``n_boot``
+        wild cluster bootstrap replicates of the same cluster scores and reports their standard
+        deviation with symmetric bootstrap intervals. Both require ``fe="twoway"``.
+    n_boot : int
+        Number of bootstrap replicates for ``se_method="wild_bootstrap"``.
+    boot_weights : str
+        Bootstrap weight distribution: ``rademacher`` (default) or the six-point ``webb``.
+    n_jobs : int
+        Worker processes sharing the bootstrap replicates (``-1`` uses every core). Blocks of
+        replicates are seeded from ``random_state`` independently of ``n_jobs``.
+    predict : str
+        Counterfactual prediction: ``full`` (default) predicts every row; ``lazy`` predicts
+        only the treated cells inside ``horizons``, the pre-periods inside ``pretrends``, and
+        (for score-based SEs) the untreated rows, storing them as row positions plus values
+        (:class:`~didimpute.counterfactual.LazyCellEffects`). Other cells are predicted when a
+        ``Result`` method needs them.
+    cache_dir : str | None
+        Directory of an on-disk :class:`~didimpute.cache.StageCache` for :meth:`fit`. The
+        prepared panel, the fitted first stage, and (with ``predict="full"``) the cell
+        effects are stored under hashes of the input columns and the options each stage
+        depends on, so a rerun that changes only aggregation, SE, or pretrend options reuses
+        all three. ``meta["cache"]`` reports hits and misses per stage.
+    cache_max_bytes : int
+        Size cap of ``cache_dir``; least recently used entries are evicted beyond it.
     """
 
     y: str
@@ -56,7 +123,7 @@ class DidImputation:
     Ei: str
     controls: Optional[List[str]] = None
     weight: Optional[str] = None
-    cluster: Optional[str] = None
+    cluster: Optional[Union[str, List[str]]] = None
     horizons: Tuple[int, int] = (-5, 10)
     pretrends: int = 5
     weight_scheme: str = "nobs"
@@ -64,89 +131,208 @@ class DidImputation:
     ci: float = 0.95
     minN: int = 10
     random_state: Optional[int] = None
+    solver: str = "dense"
+    absorb: Optional[List[str]] = None
+    absorb_tol: float = 1e-10
+    absorb_maxiter: int = 10_000
+    store: str = "full"
+    se_method: str = "delta"
+    n_boot: int = 9999
+    boot_weights: str = "rademacher"
+    n_jobs: int = 1
+    predict: str = "full"
+    cache_dir: Optional[str] = None
+    cache_max_bytes: int = 1 << 30
+
+    def _validate_config(self) -> None:
+        """Check the estimator options (see :func:`~didimpute.validation.validate_config`)."""
+
+        validate_config(
+            self.horizons, self.minN, self.weight_scheme, self.ci, self.solver, self.store,
+            self.se_method, self.fe, self.n_boot, self.boot_weights, self.n_jobs, self.predict,
+        )
+        if self.se_method == "wild_bootstrap" and len(cluster_columns(self.cluster, self.id)) > 1:
+            raise ValidationError("se_method='wild_bootstrap' supports one-way clustering only.")
 
     def fit(self, df: pd.DataFrame) -> "Result":
         """Run the estimator pipeline on ``df`` and return a ``Result``."""
 
-        if self.fe != "twoway":
-            if self.fe == "absorbing":
-                try:
-                    importlib.import_module("linearmodels")  # pragma: no cover
-                except ModuleNotFoundError as exc:
-                    raise ModuleNotFoundError(
-                        "Absorbing fixed effects require the optional dependency 'linearmodels'. "
-                        "Install it via `pip install \"didimpute[absorbing]\"`."
-                    ) from exc
-                raise NotImplementedError(
-                    "fe='absorbing' is planned but not yet implemented. "
-                    "Set fe='twoway' until support lands."
-                )
+        if self.fe not in {"twoway", "absorbing"}:
             raise ValueError(f"Unsupported fixed-effects configuration: {self.fe!r}")
+        if self.absorb and self.fe != "absorbing":
+            raise ValidationError("Extra fixed effects in `absorb` require fe='absorbing'.")
 
         if self.random_state is not None:
             set_seed(self.random_state)
 
-        validate_config(self.horizons, self.minN, self.weight_scheme, self.ci)
-        ctx = validate_and_prepare(
-            df=df,
-            y=self.y,
-            id=self.id,
-            time=self.time,
-            Ei=self.Ei,
-            controls=self.controls,
-            weight=self.weight,
-            cluster=self.cluster,
+        self._validate_config()
+        cache = StageCache(self.cache_dir, self.cache_max_bytes) if self.cache_dir else None
+        prepare_key = first_stage_key = ""
+        if cache is not None:
+            # The first stage and cell effects never read the cluster columns, so they are
+            # keyed on the model columns alone and survive a change of clustering.
+            model_columns = self._spec_columns(cluster=False)
+            cluster_only = [col for col in self._spec_columns() if col not in model_columns]
+            model_hash = hash_frame(df, model_columns)
+            prepare_key = stage_key(
+                model_hash, hash_frame(df, cluster_only), self._spec_roles(),
+            )
+            first_stage_key = stage_key(
+                model_hash, self._spec_roles(cluster=False), self.solver, self.fe,
+                self.absorb_tol, self.absorb_maxiter, self.store,
+            )
+        ctx = cached_stage(
+            cache,
+            "validate_and_prepare",
+            prepare_key,
+            lambda: validate_and_prepare(
+                df=df,
+                y=self.y,
+                id=self.id,
+                time=self.time,
+                Ei=self.Ei,
+                controls=self.controls,
+                weight=self.weight,
+                cluster=self.cluster,
+                absorb=self.absorb,
+            ),
         )
         df_prepared = ctx["df"]
+        panel = ctx["panel"]
 
-        first_stage = FirstStageModel().fit(
-            df=df_prepared,
-            y=self.y,
-            id=self.id,
-            time=self.time,
-            controls=self.controls,
-            weight=self.weight,
+        first_stage = cached_stage(
+            cache,
+            "first_stage",
+            first_stage_key,
+            lambda: FirstStageModel(
+                solver=self.solver,
+                fe=self.fe,
+                absorb=list(self.absorb or []),
+                tol=self.absorb_tol,
+                maxiter=self.absorb_maxiter,
+                store=self.store,
+            ).fit(
+                df=df_prepared,
+                y=self.y,
+                id=self.id,
+                time=self.time,
+                controls=self.controls,
+                weight=self.weight,
+                panel=panel,
+            ),
         )
-
-        counterfactual = compute_cell_effects(
-            df=df_prepared,
-            y_col=self.y,
-            id_col=self.id,
-            time_col=self.time,
-            Ei_col=self.Ei,
-            fsm=first_stage,
-            controls=self.controls,
+        result = self._estimate(
+            df_prepared, panel, ctx.get("panel_meta", {}), first_stage,
+            cache=cache, cache_key=first_stage_key,
         )
+        if cache is not None:
+            result.meta["cache"] = copy.deepcopy(cache.stats)
+        return result
 
-        summary = aggregate_event_time(
-            df=df_prepared,
-            tau=counterfactual["tau"],
-            k_col="_k",
-            mask=counterfactual["masks"]["treated_post"],
-            cohort_col=self.Ei,
-            weight_scheme=self.weight_scheme,
-            horizons=self.horizons,
-            minN=self.minN,
+    def _estimate(
+        self,
+        df_prepared: pd.DataFrame,
+        panel: PanelIndex,
+        panel_meta: Dict[str, Any],
+        first_stage: FirstStageModel,
+        y0_hat: Optional[np.ndarray] = None,
+        cache: Optional[StageCache] = None,
+        cache_key: str = "",
+    ) -> "Result":
+        """
+        Run the stages after the first stage and assemble the ``Result``.
+
+        With ``cache``, eager cell effects are cached under ``cache_key`` (the first-stage
+        key); lazy ones hold the panel and first stage and are cheap, so they are not.
+        """
+
+        def compute() -> Dict[str, Any]:
+            return compute_cell_effects(
+                df=df_prepared,
+                y_col=self.y,
+                id_col=self.id,
+                time_col=self.time,
+                Ei_col=self.Ei,
+                fsm=first_stage,
+                controls=self.controls,
+                panel=panel,
+                y0_hat=y0_hat,
+                window=(self.horizons, self.pretrends) if self.predict == "lazy" else None,
+            )
+
+        if self.predict == "lazy" or y0_hat is not None:
+            cache = None
+        counterfactual = cached_stage(
+            cache, "compute_cell_effects", stage_key(cache_key, self.y, self.Ei), compute,
         )
+        return self._summarize(df_prepared, panel, panel_meta, first_stage, counterfactual)
 
-        summary = attach_ses_by_k(
-            df=df_prepared,
-            summary=summary,
-            tau=counterfactual["tau"],
-            id_col=self.id,
-            y_col=self.y,
-            fsm=first_stage,
-            treated_mask=counterfactual["masks"]["treated_post"],
+    def _summarize(
+        self,
+        df_prepared: pd.DataFrame,
+        panel: PanelIndex,
+        panel_meta: Dict[str, Any],
+        first_stage: FirstStageModel,
+        counterfactual: Dict[str, Any],
+    ) -> "Result":
+        """
+        Aggregate cell effects, attach SEs and intervals, and run the pretrend test.
+
+        The treated cells are reduced to a :class:`~didimpute.aggregate.CellCube` once and
+        cached in ``counterfactual["cube"]``, so re-aggregation touches only the cube. Lazy
+        counterfactuals are first extended to the cells of the current ``horizons`` and
+        ``pretrends`` (see :func:`~didimpute.counterfactual.cell_arrays`).
+        """
+
+        effects = cell_arrays(
+            counterfactual, self.horizons, self.pretrends, untreated=self.se_method != "delta",
         )
-        summary = finalize_summary_ci(summary=summary, ci_level=self.ci)
+        cube = counterfactual.get("cube")
+        if cube is None:
+            cube = counterfactual["cube"] = CellCube.from_cells(
+                df_prepared,
+                effects["tau"],
+                None,
+                effects["masks"]["treated_post"],
+                self.Ei,
+                panel=panel,
+            )
+        summary = aggregate_cube(cube, self.weight_scheme, self.horizons, self.minN)
+
+        score_args = self._score_args(df_prepared, summary, panel, first_stage, effects)
+        if self.se_method == "wild_bootstrap":
+            summary = attach_wild_bootstrap_ses(
+                **score_args,
+                ci_level=self.ci,
+                n_boot=self.n_boot,
+                boot_weights=self.boot_weights,
+                random_state=self.random_state,
+                n_jobs=self.n_jobs,
+            )
+        elif self.se_method == "bjs":
+            summary = finalize_summary_ci(attach_bjs_ses(**score_args), ci_level=self.ci)
+        else:
+            summary = attach_ses_by_k(
+                df=df_prepared,
+                summary=summary,
+                tau=effects["tau"],
+                id_col=self.id,
+                y_col=self.y,
+                fsm=first_stage,
+                treated_mask=effects["masks"]["treated_post"],
+                panel=panel,
+            )
+            summary = finalize_summary_ci(summary=summary, ci_level=self.ci)
 
-        pretrend = pretrend_joint_test(
+        pretrend_by_window = pretrend_curve(
             df=df_prepared,
-            placebo=counterfactual["placebo"],
+            placebo=effects["placebo"],
             id_col=self.id,
-            k_col="_k",
+            k_col=None,
             max_negative_k=self.pretrends,
+            panel=panel,
         )
+        pretrend = pretrend_from_curve(pretrend_by_window)
 
         meta: Dict[str, Any] = {
             "pretrend": {
@@ -154,12 +340,14 @@ class DidImputation:
                 "dof": pretrend[1],
                 "used_ks": pretrend[2],
             },
-            "panel": ctx.get("panel_meta", {}),
+            "pretrend_curve": pretrend_by_window,
+            "panel": panel_meta,
             "aggregation": {
                 "scheme": self.weight_scheme,
                 "horizons": self.horizons,
                 "minN": self.minN,
             },
+            "se_method": self.se_method,
         }
         intermediate: Dict[str, Any] = {
             "first_stage": first_stage.info_,
@@ -170,17 +358,816 @@ class DidImputation:
             summary_df=summary,
             meta=meta,
             intermediate=intermediate,
+            prepared=df_prepared,
+            panel=panel,
+            first_stage=first_stage,
+            counterfactual=counterfactual,
+        )
+
+    def _score_args(
+        self,
+        df_prepared: pd.DataFrame,
+        summary: pd.DataFrame,
+        panel: PanelIndex,
+        first_stage: FirstStageModel,
+        counterfactual: Dict[str, Any],
+    ) -> Dict[str, Any]:
+        """Keyword arguments shared by the score-based SE routines and :func:`event_time_vcov`."""
+
+        effects = cell_arrays(counterfactual, self.horizons, self.pretrends, untreated=True)
+        return dict(
+            df=df_prepared,
+            summary=summary,
+            tau=effects["tau"],
+            y0_hat=effects["y0_hat"],
+            id_col=self.id,
+            y_col=self.y,
+            Ei_col=self.Ei,
+            weight_col=self.weight,
+            fsm=first_stage,
+            treated_mask=effects["masks"]["treated_post"],
+            untreated_mask=effects["masks"]["untreated_all"],
+            panel=panel,
+        )
+
+    def fit_estimands(self, df: pd.DataFrame, spec: Any) -> pd.DataFrame:
+        """
+        Fit the model and report the estimands of ``spec`` (see :meth:`Result.estimands`).
+        """
+
+        return self.fit(df).estimands(spec)
+
+    def fit_many(self, df: pd.DataFrame, outcomes: List[str]) -> Dict[str, "Result"]:
+        """
+        Fit the same design to several outcome columns, sharing validation and factorization.
+
+        The panel is validated once, the first-stage design and the factorization of ``X'WX``
+        are built once, and all outcomes are solved as one multi-right-hand-side system (see
+        :meth:`FirstStageModel.fit_many`). Counterfactuals for every outcome are predicted in
+        one pass (:func:`~didimpute.first_stage.predict_many`); aggregation, SEs, and the
+        pretrend test then run per outcome.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Input panel containing every outcome column.
+        outcomes : list[str]
+            Outcome column names; ``self.y`` is ignored.
+
+        Returns
+        -------
+        dict[str, Result]
+            Results keyed by outcome, each identical to ``replace(self, y=outcome).fit(df)``.
+        """
+
+        if not outcomes:
+            raise ValidationError("fit_many requires at least one outcome column.")
+        missing = [col for col in outcomes if col not in df.columns]
+        if missing:
+            raise ValidationError(
+                f"Missing required columns: {missing}. Provide these via --y/--id/--time/--Ei.",
+            )
+        if self.fe not in {"twoway", "absorbing"}:
+            raise ValueError(f"Unsupported fixed-effects configuration: {self.fe!r}")
+        if self.absorb and self.fe != "absorbing":
+            raise ValidationError("Extra fixed effects in `absorb` require fe='absorbing'.")
+        if self.random_state is not None:
+            set_seed(self.random_state)
+
+        self._validate_config()
+        ctx = validate_and_prepare(
+            df=df,
+            y=outcomes[0],
+            id=self.id,
+            time=self.time,
+            Ei=self.Ei,
+            controls=self.controls,
+            weight=self.weight,
+            cluster=self.cluster,
+            absorb=self.absorb,
+            outcomes=list(outcomes),
+        )
+        df_prepared, panel = ctx["df"], ctx["panel"]
+        models = FirstStageModel(
+            solver=self.solver,
+            fe=self.fe,
+            absorb=list(self.absorb or []),
+            tol=self.absorb_tol,
+            maxiter=self.absorb_maxiter,
+            store=self.store,
+        ).fit_many(
+            df=df_prepared,
+            ys=list(outcomes),
+            id=self.id,
+            time=self.time,
+            controls=self.controls,
+            weight=self.weight,
+            panel=panel,
+        )
+        y0_hat = predict_many(models, df_prepared, panel=panel)
+        return {
+            outcome: replace(self, y=outcome)._estimate(
+                df_prepared, panel, ctx.get("panel_meta", {}), model, y0_hat=y0_hat[:, j],
+            )
+            for j, (outcome, model) in enumerate(zip(outcomes, models))
+        }
+
+    def _spec_columns(self, cluster: bool = True) -> List[str]:
+        """Input columns referenced by the configuration (optionally without the clusters)."""
+
+        columns = [self.y, self.id, self.time, self.Ei, *(self.controls or [])]
+        clusters = [self.cluster] if isinstance(self.cluster, str) else self.cluster or []
+        if not cluster:
+            clusters = []
+        for extra in (self.weight, *clusters, *(self.absorb or [])):
+            if extra and extra not in columns:
+                columns.append(extra)
+        return columns
+
+    def _spec_roles(self, cluster: bool = True) -> Tuple[Tuple[str, Any], ...]:
+        """Role-tagged configuration columns, so cache keys tell a control from a weight."""
+
+        roles: Tuple[Tuple[str, Any], ...] = (
+            ("y", self.y),
+            ("id", self.id),
+            ("time", self.time),
+            ("Ei", self.Ei),
+            ("controls", tuple(self.controls or ())),
+            ("weight", self.weight),
+            ("absorb", tuple(self.absorb or ())),
+        )
+        if not cluster:
+            return roles
+        clusters: Any = self.cluster
+        if clusters is not None and not isinstance(clusters, str):
+            clusters = tuple(clusters)
+        return (*roles, ("cluster", clusters))
+
+    def fit_chunks(self, source: ChunkSource, chunksize: int = 100_000) -> "Result":
+        """
+        Run the estimator out of core over a chunked source and return a ``Result``.
+
+        The data are read twice: once to build the level dictionaries and the untreated
+        normal equations, and once to compute residual, treated-cell, and placebo summaries.
+        Nothing row-sized is retained, so peak memory depends on ``chunksize`` and the number
+        of fixed-effect levels rather than on the panel length. Estimates, SEs, and the
+        pretrend test match :meth:`fit` up to floating-point rounding.
+
+        Parameters
+        ----------
+        source : str | os.PathLike | pd.DataFrame | callable | iterable of pd.DataFrame
+            A CSV path, a frame, a zero-argument callable returning an iterable of chunks
+            (called once per pass), or an iterable of chunks; one-shot iterators are spooled
+            to a temporary directory for the second pass.
+        chunksize : int
+            Rows per chunk when reading CSV paths or slicing frames.
+
+        Raises
+        ------
+        ValidationError
+            If ``fe`` is not ``twoway``, ``se_method`` is not ``delta``, SEs are not
+            clustered on the unit id, or the input fails the usual validation checks.
+        """
+
+        if self.fe not in {"twoway", "absorbing"}:
+            raise ValueError(f"Unsupported fixed-effects configuration: {self.fe!r}")
+        if self.random_state is not None:
+            set_seed(self.random_state)
+        self._validate_config()
+
+        if self.se_method != "delta":
+            raise ValidationError("fit_chunks supports only se_method='delta'.")
+        fitted = fit_out_of_core(self, source, chunksize=chunksize)
+        pvalue, dof, used_ks = fitted["pretrend"]
+        meta: Dict[str, Any] = {
+            "pretrend": {"pvalue": pvalue, "dof": dof, "used_ks": used_ks},
+            "pretrend_curve": fitted["pretrend_curve"],
+            "panel": fitted["panel_meta"],
+            "aggregation": {
+                "scheme": self.weight_scheme,
+                "horizons": self.horizons,
+                "minN": self.minN,
+            },
+        }
+        intermediate: Dict[str, Any] = {"first_stage": fitted["first_stage"].info_}
+        return Result(
+            config=self,
+            summary_df=fitted["summary"],
+            meta=meta,
+            intermediate=intermediate,
         )
 
 
 @dataclass
 class Result:
-    """Container for estimator outputs."""
+    """
+    Container for estimator outputs.
+
+    Results produced by :meth:`DidImputation.fit` also keep the prepared panel, its
+    :class:`~didimpute.panel.PanelIndex`, the fitted first stage, and the cell-level output of
+    :func:`~didimpute.counterfactual.compute_cell_effects` (``tau``, ``placebo``, and masks),
+    so that :meth:`update` can refit incrementally and :meth:`reaggregate` can re-summarize
+    without refitting.
+    """
 
     config: DidImputation
     summary_df: pd.DataFrame
     meta: Dict[str, Any] = field(default_factory=dict)
     intermediate: Dict[str, Any] = field(default_factory=dict)
+    prepared: Optional[pd.DataFrame] = field(default=None, repr=False)
+    panel: Optional[PanelIndex] = field(default=None, repr=False)
+    first_stage: Optional[FirstStageModel] = field(default=None, repr=False)
+    counterfactual: Optional[Dict[str, Any]] = field(default=None, repr=False)
+    _vcov: Optional[pd.DataFrame] = field(default=None, init=False, repr=False)
+
+    def vcov(self) -> pd.DataFrame:
+        """
+        Variance-covariance matrix of the event-time estimates.
+
+        Built once from the per-cluster influence matrix of the configured ``se_method`` (see
+        :func:`~didimpute.se.event_time_vcov`) and cached; its diagonal equals ``se ** 2``
+        (for ``wild_bootstrap`` it is the analytic covariance of the bootstrap draws).
+        Event times without a defined SE have NaN rows and columns.
+
+        Returns
+        -------
+        pd.DataFrame
+            ``K x K`` matrix indexed by event time ``k`` in both dimensions.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects (for example from ``fit_chunks``).
+        """
+
+        if self._vcov is None:
+            if (
+                self.prepared is None
+                or self.panel is None
+                or self.first_stage is None
+                or self.counterfactual is None
+            ):
+                raise EstimationError("vcov() requires a Result produced by DidImputation.fit().")
+            summary = self.summary()
+            matrix = event_time_vcov(
+                self.config.se_method,
+                **self.config._score_args(
+                    self.prepared, summary, self.panel, self.first_stage, self.counterfactual,
+                ),
+            )
+            ks = pd.Index(summary["k"].astype(int) if "k" in summary else [], name="k")
+            self._vcov = pd.DataFrame(matrix, index=ks, columns=ks)
+        out: pd.DataFrame = self._vcov.copy()
+        return out
+
+    def unit_influence(self) -> pd.DataFrame:
+        """
+        DFBETA-style influence of each unit on the event-time estimates.
+
+        Entry ``(i, k)`` is unit ``i``'s score ``sum_t v_it eps_it`` from
+        :func:`~didimpute.se.unit_influence_scores`: its treated cells' deviations from their
+        (cohort, event time) means and its untreated residuals weighted by the implied
+        imputation weights. Squared entries summed over units give the BJS variance under unit
+        clustering; units with large absolute entries drive the estimate. The scores come
+        from one multi-right-hand-side solve against the cached factorization and a chunked
+        pass over the untreated rows, so no refit is needed.
+
+        Returns
+        -------
+        pd.DataFrame
+            ``N x K`` frame indexed by unit id with one column per event time ``k``.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects, or the first stage is absorbing.
+        """
+
+        if (
+            self.prepared is None
+            or self.panel is None
+            or self.first_stage is None
+            or self.counterfactual is None
+        ):
+            raise EstimationError(
+                "unit_influence() requires a Result produced by DidImputation.fit().",
+            )
+        if self.first_stage.fe != "twoway":
+            raise EstimationError("unit_influence() requires fe='twoway'.")
+        summary = self.summary()
+        units, influence = unit_influence_scores(
+            **self.config._score_args(
+                self.prepared, summary, self.panel, self.first_stage, self.counterfactual,
+            ),
+        )
+        ks = pd.Index(summary["k"].astype(int) if "k" in summary else [], name="k")
+        out: pd.DataFrame = pd.DataFrame(influence, index=units.rename(self.config.id), columns=ks)
+        return out
+
+    def sensitivity(
+        self,
+        method: str = "relative_magnitude",
+        Mbar_grid: Optional[Union[Sequence[float], np.ndarray]] = None,
+        weights: Optional[Union[Mapping[int, float], Sequence[float], np.ndarray]] = None,
+        pretrends: Optional[int] = None,
+    ) -> pd.DataFrame:
+        """
+        Rambachan-Roth ("honest DiD") sensitivity of a post-period target to pre-trends.
+
+        The pre-period placebo means (``-pretrends <= k < 0``) and the event-time estimates are
+        stacked with their joint covariance (:func:`~didimpute.se.event_study_vcov`), and the
+        bounds and intervals for the target are evaluated for the whole grid at once by
+        :func:`~didimpute.sensitivity.sensitivity_bounds`. Nothing is refit.
+
+        Parameters
+        ----------
+        method : str
+            ``"relative_magnitude"`` (post-period steps bounded by ``Mbar`` times the largest
+            pre-period step) or ``"smoothness"`` (slope changes bounded by ``M``).
+        Mbar_grid : array-like, optional
+            Grid of bounds; defaults to 21 points on ``[0, 2]``.
+        weights : mapping or array-like, optional
+            Target weights over ``summary()["k"]`` or ``{k: weight}``; defaults to the average
+            of all event-time estimates.
+        pretrends : int, optional
+            Number of pre-periods to use; defaults to ``config.pretrends``.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per grid value with ``M``, ``lb``, ``ub``, ``lb_se``, ``ub_se``,
+            ``ci_low``, ``ci_high`` (at ``config.ci``), and ``method``.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects, fewer than two pre-periods are
+            available, or the event times are not consecutive around ``0``.
+        ValidationError
+            If the method, grid, or weights are invalid.
+        """
+
+        if (
+            self.prepared is None
+            or self.panel is None
+            or self.first_stage is None
+            or self.counterfactual is None
+        ):
+            raise EstimationError(
+                "sensitivity() requires a Result produced by DidImputation.fit().",
+            )
+        summary = self.summary()
+        post_ks = [int(k) for k in summary["k"]] if "k" in summary else []
+        if weights is None:
+            target = np.full(len(post_ks), 1.0 / max(len(post_ks), 1))
+        elif isinstance(weights, Mapping):
+            unknown = [k for k in weights if k not in post_ks]
+            if unknown:
+                raise ValidationError(f"Unknown event times in weights: {unknown}.")
+            target = np.array([float(weights.get(k, 0.0)) for k in post_ks])
+        else:
+            target = np.asarray(weights, dtype=float)
+        max_negative_k = self.config.pretrends if pretrends is None else int(pretrends)
+        pre_ks, pre_estimates, vcov = event_study_vcov(
+            self.config.se_method,
+            **self.config._score_args(
+                self.prepared, summary, self.panel, self.first_stage, self.counterfactual,
+            ),
+            placebo=cell_arrays(
+                self.counterfactual, self.config.horizons, max_negative_k,
+            )["placebo"],
+            max_negative_k=max_negative_k,
+        )
+        estimates = np.concatenate([pre_estimates, summary["estimate"].to_numpy(dtype=float)])
+        return sensitivity_bounds(
+            pre_ks,
+            post_ks,
+            estimates,
+            vcov,
+            target,
+            method=method,
+            grid=None if Mbar_grid is None else np.asarray(Mbar_grid, dtype=float),
+            ci_level=self.config.ci,
+        )
+
+    def wald(
+        self,
+        restriction: Union[Mapping[int, float], Sequence[Any], np.ndarray],
+        value: Optional[Union[float, Sequence[float], np.ndarray]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Wald test of ``R beta = value`` on the event-time estimates, without refitting.
+
+        Parameters
+        ----------
+        restriction : mapping or array-like
+            Either a ``q x K`` (or length-``K``) matrix ``R`` whose columns follow
+            ``summary()["k"]``, or a mapping ``{k: weight}`` for a single restriction.
+        value : float or array-like, optional
+            Right-hand side (length ``q``); defaults to zero.
+
+        Returns
+        -------
+        dict
+            ``statistic``, chi-square ``pvalue``, and ``dof`` (``q``).
+
+        Raises
+        ------
+        ValidationError
+            If the restriction does not match the event times.
+        EstimationError
+            If it involves event times without a defined SE or ``R V R'`` is singular.
+        """
+
+        matrix, estimate, cov = self._linear_restriction(restriction)
+        rhs = np.zeros(matrix.shape[0]) if value is None else np.atleast_1d(
+            np.asarray(value, dtype=float),
+        )
+        if rhs.shape != (matrix.shape[0],):
+            raise ValidationError(
+                f"value must have one entry per restriction ({matrix.shape[0]}).",
+            )
+        gap = matrix @ estimate - rhs
+        try:
+            statistic = float(gap @ np.linalg.solve(matrix @ cov @ matrix.T, gap))
+        except np.linalg.LinAlgError as exc:
+            raise EstimationError("Wald test failed: R V R' is singular.") from exc
+        dof = int(matrix.shape[0])
+        return {"statistic": statistic, "pvalue": float(chi2.sf(statistic, dof)), "dof": dof}
+
+    def lincom(
+        self, weights: Union[Mapping[int, float], Sequence[float], np.ndarray],
+    ) -> Dict[str, float]:
+        """
+        Estimate, SE, interval, and two-sided p-value of ``w' beta``, without refitting.
+
+        Parameters
+        ----------
+        weights : mapping or array-like
+            Length-``K`` weights following ``summary()["k"]``, or a mapping ``{k: weight}``.
+
+        Returns
+        -------
+        dict
+            ``estimate``, ``se``, ``ci_low``, ``ci_high`` (at ``config.ci``), and ``pvalue``;
+            the SE is NaN when a multi-way clustered ``w' V w`` is negative.
+
+        Raises
+        ------
+        ValidationError
+            If the weights do not match the event times.
+        EstimationError
+            If they involve event times without a defined SE.
+        """
+
+        matrix, estimate, cov = self._linear_restriction(weights)
+        if matrix.shape[0] != 1:
+            raise ValidationError("lincom() takes a single weight vector.")
+        row = matrix[0]
+        value = float(row @ estimate)
+        variance = float(row @ cov @ row)
+        se = float(np.sqrt(variance)) if variance >= 0.0 else float("nan")
+        z = float(norm.ppf(0.5 + self.config.ci / 2.0))
+        pvalue = float(2.0 * norm.sf(abs(value) / se)) if se > 0 else float("nan")
+        return {
+            "estimate": value,
+            "se": se,
+            "ci_low": value - z * se,
+            "ci_high": value + z * se,
+            "pvalue": pvalue,
+        }
+
+    def _linear_restriction(
+        self, restriction: Union[Mapping[int, float], Sequence[Any], np.ndarray],
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Restriction matrix, estimates, and covariance restricted to the event times used."""
+
+        vcov = self.vcov()
+        ks = list(vcov.index)
+        if isinstance(restriction, Mapping):
+            unknown = [k for k in restriction if k not in ks]
+            if unknown:
+                raise ValidationError(f"Unknown event times in restriction: {unknown}.")
+            matrix = np.zeros((1, len(ks)))
+            for k, weight in restriction.items():
+                matrix[0, ks.index(k)] = float(weight)
+        else:
+            matrix = np.atleast_2d(np.asarray(restriction, dtype=float))
+            if matrix.ndim != 2 or matrix.shape[1] != len(ks):
+                raise ValidationError(
+                    f"Restriction must have one column per event time ({len(ks)}).",
+                )
+        used = np.flatnonzero(np.any(matrix != 0.0, axis=0))
+        cov = vcov.to_numpy()[np.ix_(used, used)]
+        if not np.all(np.isfinite(cov)):
+            raise EstimationError("Restriction involves event times without a defined SE.")
+        estimate = self.summary()["estimate"].to_numpy(dtype=float)[used]
+        return matrix[:, used], estimate, cov
+
+    def cells(self) -> pd.DataFrame:
+        """
+        Treated cells entering the estimands, in the column order of estimand weight matrices.
+
+        Returns
+        -------
+        pd.DataFrame
+            One row per treated cell with the unit id, time, and adoption time columns, the
+            event time ``k``, and the cell effect ``tau``.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects (for example from ``fit_chunks``).
+        """
+
+        rows, _cohort, effects = self._treated_cells()
+        assert self.prepared is not None and self.panel is not None
+        config = self.config
+        frame = self.prepared.iloc[rows]
+        out: pd.DataFrame = pd.DataFrame(
+            {
+                config.id: frame[config.id].to_numpy(),
+                config.time: frame[config.time].to_numpy(),
+                config.Ei: frame[config.Ei].to_numpy(),
+                "k": np.round(self.panel.event_times()[rows]).astype(int),
+                "tau": np.asarray(effects["tau"], dtype=float)[rows],
+            },
+        )
+        return out
+
+    def estimands(self, spec: Any) -> pd.DataFrame:
+        """
+        Estimates and SEs of arbitrary linear estimands of the treated-cell effects.
+
+        Every estimand is a row of one sparse estimand-by-cell weight matrix ``W``: estimates
+        are ``W @ tau`` and the per-cluster BJS scores of all estimands come from the same
+        product against the cell residuals and one multi-right-hand-side solve for the implied
+        untreated weights (:func:`~didimpute.se.estimand_scores`), so nothing is refit and
+        adding estimands costs a few sparse columns. SEs are the analytic BJS variance, or the
+        wild cluster bootstrap of the same scores when ``se_method="wild_bootstrap"``.
+
+        Parameters
+        ----------
+        spec : mapping, scipy sparse matrix, or np.ndarray
+            Either an ``E x n_cells`` weight matrix whose columns follow :meth:`cells`
+            (estimands are named ``e0``, ``e1``, ...), or a mapping ``name -> {...}`` compiled
+            by :func:`~didimpute.aggregate.compile_estimands` with filters on ``k``, ``time``,
+            and ``cohort`` (scalar, ``(lo, hi)`` range, or list), optional ``weight`` (a
+            configured column or an array aligned with :meth:`cells`), and ``normalize``
+            (default ``True``). For example
+            ``{"short_run": {"k": (0, 2)}, "cohort_2005": {"cohort": 2005}}``.
+
+        Returns
+        -------
+        pd.DataFrame
+            Columns ``estimand``, ``estimate``, ``n`` (cells with non-zero weight), ``se``,
+            ``ci_low``, ``ci_high``, and ``ci_level``. Estimands without cells have NaN
+            estimates.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects, or the first stage is absorbing.
+        ValidationError
+            If the spec is malformed or the matrix does not have one column per cell.
+        """
+
+        rows, cohort_all, effects = self._treated_cells(untreated=True)
+        assert self.prepared is not None and self.panel is not None
+        assert self.first_stage is not None
+        config = self.config
+        if self.first_stage.fe != "twoway":
+            raise EstimationError("estimands() requires fe='twoway'.")
+        if isinstance(spec, Mapping):
+            frame = self.prepared.iloc[rows].assign(_k=self.panel.event_times()[rows])
+            names, matrix = compile_estimands(
+                frame, spec, {"k": "_k", "time": config.time, "cohort": config.Ei},
+            )
+        else:
+            matrix = sp.csr_matrix(spec, dtype=float) if sp.issparse(spec) else sp.csr_matrix(
+                np.atleast_2d(np.asarray(spec, dtype=float)),
+            )
+            if matrix.shape[1] != len(rows):
+                raise ValidationError(
+                    f"Weight matrix must have one column per treated cell ({len(rows)}).",
+                )
+            names = [f"e{index}" for index in range(matrix.shape[0])]
+        matrix.eliminate_zeros()
+
+        estimates, scores = estimand_scores(
+            self.prepared,
+            rows,
+            matrix.T,
+            effects["tau"],
+            effects["y0_hat"],
+            config.id,
+            config.y,
+            config.weight,
+            self.first_stage,
+            effects["masks"]["untreated_all"],
+            cohort_all,
+            panel=self.panel,
+        )
+        counts = np.diff(matrix.indptr)
+        valid = counts > 0
+        table: pd.DataFrame = pd.DataFrame(
+            {"estimand": names, "estimate": np.where(valid, estimates, np.nan), "n": counts},
+        )
+        if config.se_method == "wild_bootstrap":
+            draws = wild_bootstrap_draws(
+                scores[0][1], config.n_boot, config.boot_weights, config.random_state,
+                config.n_jobs,
+            )
+            radius = np.quantile(np.abs(draws), config.ci, axis=0)
+            table["se"] = np.where(valid, draws.std(axis=0, ddof=1), np.nan)
+            table["ci_low"] = table["estimate"] - radius
+            table["ci_high"] = table["estimate"] + radius
+            table["ci_level"] = config.ci
+            return table
+        variance = sum(sign * np.einsum("ge,ge->e", term, term) for sign, term in scores)
+        # A negative multi-way variance leaves the SE undefined rather than zero.
+        defined = valid & (variance >= 0.0)
+        table["se"] = np.where(defined, np.sqrt(np.where(defined, variance, 0.0)), np.nan)
+        out: pd.DataFrame = finalize_summary_ci(table, ci_level=config.ci)
+        return out
+
+    def _treated_cells(
+        self, untreated: bool = False,
+    ) -> Tuple[np.ndarray, np.ndarray, Dict[str, Any]]:
+        """
+        Rows of the treated cells and the cohort codes (from :func:`treated_cells`), with the
+        cell arrays covering every treated cell (and every untreated row with ``untreated``).
+        """
+
+        if (
+            self.prepared is None
+            or self.panel is None
+            or self.first_stage is None
+            or self.counterfactual is None
+        ):
+            raise EstimationError(
+                "Cell-level estimands require a Result produced by DidImputation.fit().",
+            )
+        effects = cell_arrays(self.counterfactual, untreated=untreated)
+        rows, cohort_all = treated_cells(
+            self.prepared,
+            effects["tau"],
+            effects["masks"]["treated_post"],
+            self.config.Ei,
+            self.panel,
+        )
+        return rows, cohort_all, effects
+
+    def reaggregate(
+        self,
+        weight_scheme: Optional[str] = None,
+        horizons: Optional[Tuple[int, int]] = None,
+        minN: Optional[int] = None,
+        ci: Optional[float] = None,
+        pretrends: Optional[int] = None,
+        se_method: Optional[str] = None,
+        n_boot: Optional[int] = None,
+        boot_weights: Optional[str] = None,
+    ) -> "Result":
+        """
+        Re-summarize with different aggregation settings, reusing the fitted cells.
+
+        Only :func:`~didimpute.aggregate.aggregate_cube` (on the cached cell cube), the SE
+        stage, :func:`finalize_summary_ci`, and the pretrend test are re-run; validation, the
+        first stage, and prediction are reused.
+        Arguments left as ``None`` keep the current configuration.
+
+        Returns
+        -------
+        Result
+            A new result whose ``config`` carries the updated settings.
+
+        Raises
+        ------
+        EstimationError
+            If this result does not hold cell-level effects (for example from ``fit_chunks``).
+        ValidationError
+            If the new settings are invalid.
+        """
+
+        if (
+            self.prepared is None
+            or self.panel is None
+            or self.first_stage is None
+            or self.counterfactual is None
+        ):
+            raise EstimationError(
+                "reaggregate() requires a Result produced by DidImputation.fit().",
+            )
+        overrides: Dict[str, Any] = {
+            "weight_scheme": weight_scheme,
+            "horizons": horizons,
+            "minN": minN,
+            "ci": ci,
+            "pretrends": pretrends,
+            "se_method": se_method,
+            "n_boot": n_boot,
+            "boot_weights": boot_weights,
+        }
+        config = replace(
+            self.config,
+            **{name: value for name, value in overrides.items() if value is not None},
+        )
+        config._validate_config()
+        return config._summarize(
+            self.prepared,
+            self.panel,
+            self.meta.get("panel", {}),
+            self.first_stage,
+            self.counterfactual,
+        )
+
+    def update(self, new_rows: pd.DataFrame) -> "Result":
+        """
+        Refit after appending rows (for example a new period) without redoing the first stage.
+
+        Rows whose ``(id, time)`` pair is already in the panel replace the stored row; all
+        other rows are appended. Untreated rows that are added enter the stored first-stage
+        normal equations, replaced rows that were untreated are downdated, and new unit or
+        time levels extend the design (see :meth:`FirstStageModel.update`). Prediction,
+        aggregation, SEs, and the pretrend test are then re-run on the updated panel; they
+        touch every event time because the fixed-effect estimates move with the new data.
+        When a downdate empties a fixed-effect level the update falls back to a full refit.
+        ``meta["update"]`` records the mode and the number of rows added and removed.
+
+        Parameters
+        ----------
+        new_rows : pd.DataFrame
+            Rows with the configured columns.
+
+        Returns
+        -------
+        Result
+            A new result; ``self`` is left unchanged.
+
+        Raises
+        ------
+        EstimationError
+            If this result was not produced by :meth:`DidImputation.fit`.
+        ValidationError
+            If ``new_rows`` lacks configured columns or fails validation (only the incoming
+            rows are checked), or the updated panel has no untreated rows.
+        """
+
+        if self.prepared is None or self.first_stage is None:
+            raise EstimationError("update() requires a Result produced by DidImputation.fit().")
+        assert self.panel is not None
+        config = self.config
+        columns = config._spec_columns()
+        missing = [col for col in columns if col not in new_rows.columns]
+        if missing:
+            raise ValidationError(f"New rows are missing configured columns: {missing}.")
+
+        old = self.prepared
+        incoming = prepare_rows(
+            new_rows,
+            y=config.y,
+            id=config.id,
+            time=config.time,
+            Ei=config.Ei,
+            controls=config.controls,
+            weight=config.weight,
+            cluster=config.cluster,
+            absorb=config.absorb,
+        )
+        old_keys = pd.MultiIndex.from_arrays([old[config.id], old[config.time]])
+        positions = old_keys.get_indexer(
+            pd.MultiIndex.from_arrays([incoming[config.id], incoming[config.time]]),
+        )
+        replaced = np.sort(positions[positions >= 0])
+        kept = np.ones(len(old), dtype=bool)
+        kept[replaced] = False
+        combined = pd.concat([old.loc[kept, list(incoming.columns)], incoming], ignore_index=True)
+
+        # Only the incoming rows are checked and coerced; the kept rows were prepared by fit().
+        ctx = index_panel(
+            combined, config.id, config.time, config.Ei, config.weight, config.cluster,
+        )
+        prepared = ctx["df"]
+        removed = old.iloc[replaced[self.panel.untreated[replaced]]]
+        appended = ctx["panel"].untreated[int(kept.sum()):]
+        added = prepared.iloc[int(kept.sum()) + np.flatnonzero(appended)]
+
+        first_stage = copy.copy(self.first_stage)
+        try:
+            first_stage.update(added, config.y, config.weight, removed=removed)
+        except EstimationError:
+            result = config.fit(combined)
+            result.meta["update"] = {"mode": "refit", "added": len(added), "removed": len(removed)}
+            return result
+
+        result = config._estimate(prepared, ctx["panel"], ctx.get("panel_meta", {}), first_stage)
+        result.meta["update"] = {
+            "mode": "incremental",
+            "added": int(len(added)),
+            "removed": int(len(removed)),
+        }
+        return result
 
     def summary(self) -> pd.DataFrame:
         """Return a copy of the summary table sorted by event time."""
@@ -216,4 +1203,4 @@ class Result:
             ax.fill_between(data["k"], data["ci_low"], data["ci_high"], alpha=0.2)
         ax.set_xlabel("Event time k")
         ax.set_ylabel("Effect")
-        return ax
+        return ax
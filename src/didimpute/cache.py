@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar, Union
+
+import pandas as pd
+
+from .errors import ValidationError
+
+T = TypeVar("T")
+
+_SUFFIX = ".pkl"
+
+
+def hash_frame(df: pd.DataFrame, columns: Sequence[str]) -> str:
+    """
+    Content hash of ``df[columns]``: names, dtypes, and row-wise values (index ignored).
+
+    Raises
+    ------
+    ValidationError
+        If a column is missing from ``df``.
+    """
+
+    missing = [col for col in columns if col not in df.columns]
+    if missing:
+        raise ValidationError(f"Missing required columns: {missing}.")
+    digest = hashlib.sha256()
+    for col in columns:
+        series = df[col]
+        digest.update(f"{col}\0{series.dtype}\0".encode())
+        digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def stage_key(*parts: Any) -> str:
+    """Hash of the ``repr`` of ``parts`` (earlier stage keys, hashes, and config values)."""
+
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+class StageCache:
+    """
+    Content-addressed on-disk cache of pipeline stages with size-capped LRU eviction.
+
+    Each entry is one pickle ``<stage>-<key>.pkl`` in ``directory``, where ``key`` hashes
+    everything the stage depends on (see :func:`hash_frame` and :func:`stage_key`), so an
+    entry is never stale: changed inputs simply map to a different file. Reads refresh the
+    entry's modification time, and after every write the least recently used entries are
+    deleted until the directory holds at most ``max_bytes``. Writes go through a temporary
+    file and an atomic rename; unreadable entries count as misses and are removed.
+
+    ``stats`` records ``"hit"`` or ``"miss"`` per stage name, with ``hits`` and ``misses``
+    totals, for reporting in ``Result.meta["cache"]``.
+    """
+
+    def __init__(
+        self, directory: Union[str, "os.PathLike[str]"], max_bytes: int = 1 << 30,
+    ) -> None:
+        if max_bytes <= 0:
+            raise ValidationError("cache_max_bytes must be positive.")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_bytes)
+        self.stats: Dict[str, Any] = {"hits": 0, "misses": 0, "stages": {}}
+
+    def fetch(self, stage: str, key: str, compute: Callable[[], T]) -> T:
+        """Return the cached value of ``stage`` under ``key``, computing and storing on a miss."""
+
+        path = self.directory / f"{stage}-{key}{_SUFFIX}"
+        try:
+            with open(path, "rb") as handle:
+                value: T = pickle.load(handle)
+        except FileNotFoundError:
+            pass
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            path.unlink(missing_ok=True)
+        else:
+            os.utime(path)
+            self._record(stage, "hit")
+            return value
+        self._record(stage, "miss")
+        value = compute()
+        self._store(path, value)
+        return value
+
+    def _record(self, stage: str, outcome: str) -> None:
+        self.stats["stages"][stage] = outcome
+        self.stats["hits" if outcome == "hit" else "misses"] += 1
+
+    def _store(self, path: Path, value: Any) -> None:
+        handle, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as stream:
+                pickle.dump(value, stream, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temporary, path)
+        except BaseException:
+            Path(temporary).unlink(missing_ok=True)
+            raise
+        self._evict(keep=path)
+
+    def _evict(self, keep: Path) -> None:
+        """Delete least recently used entries (never ``keep``) until under ``max_bytes``."""
+
+        entries: List[os.stat_result] = []
+        paths: List[Path] = []
+        for path in self.directory.glob(f"*{_SUFFIX}"):
+            try:
+                entries.append(path.stat())
+            except FileNotFoundError:
+                continue
+            paths.append(path)
+        total = sum(entry.st_size for entry in entries)
+        for entry, path in sorted(zip(entries, paths), key=lambda item: item[0].st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= entry.st_size
+
+
+def cached_stage(
+    cache: Optional[StageCache], stage: str, key: str, compute: Callable[[], T],
+) -> T:
+    """:meth:`StageCache.fetch` when ``cache`` is set, otherwise just ``compute()``."""
+
+    if cache is None:
+        return compute()
+    return cache.fetch(stage, key, compute)
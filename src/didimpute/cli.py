@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
 
 import click
 import pandas as pd
@@ -69,7 +69,8 @@ def _parse_horizons(value: str) -> Tuple[int, int]:
 @click.option(
     "--cluster",
     default=None,
-    help="Optional cluster-id column; defaults to --id.",
+    help="Optional cluster-id column(s); comma-separated columns (e.g. state,year) request "
+    "multi-way clustering. Defaults to --id.",
 )
 @click.option(
     "--horizons",
@@ -84,6 +85,68 @@ def _parse_horizons(value: str) -> Tuple[int, int]:
     show_default=True,
     help="Aggregation weighting scheme.",
 )
+@click.option(
+    "--solver",
+    default="dense",
+    type=click.Choice(["dense", "sparse"]),
+    show_default=True,
+    help="First-stage backend; 'sparse' scales to panels with many units.",
+)
+@click.option(
+    "--se-method",
+    "se_method",
+    default="delta",
+    type=click.Choice(["delta", "bjs", "wild_bootstrap"]),
+    show_default=True,
+    help="Standard errors: delta-method approximation, conservative BJS variance, or wild "
+    "cluster bootstrap.",
+)
+@click.option(
+    "--n-boot",
+    "n_boot",
+    default=9999,
+    type=click.IntRange(min=2),
+    show_default=True,
+    help="Bootstrap replicates for --se-method wild_bootstrap.",
+)
+@click.option(
+    "--boot-weights",
+    "boot_weights",
+    default="rademacher",
+    type=click.Choice(["rademacher", "webb"]),
+    show_default=True,
+    help="Wild bootstrap weight distribution.",
+)
+@click.option(
+    "--n-jobs",
+    "n_jobs",
+    default=1,
+    type=int,
+    show_default=True,
+    help="Worker processes for the bootstrap (-1 uses every core).",
+)
+@click.option("--seed", default=None, type=int, help="Random seed for the bootstrap.")
+@click.option(
+    "--chunksize",
+    default=None,
+    type=click.IntRange(min=1),
+    help="Fit out of core, reading the CSV in chunks of this many rows.",
+)
+@click.option(
+    "--cache-dir",
+    "cache_dir",
+    default=None,
+    type=click.Path(file_okay=False),
+    help="Cache prepared data, the first stage, and cell effects here across runs.",
+)
+@click.option(
+    "--cache-max-mb",
+    "cache_max_mb",
+    default=1024,
+    type=click.IntRange(min=1),
+    show_default=True,
+    help="Size cap of --cache-dir; least recently used entries are evicted.",
+)
 @click.option(
     "--pretrends",
     default=5,
@@ -115,6 +178,15 @@ def main(
     cluster: Optional[str],
     horizons: str,
     scheme: str,
+    solver: str,
+    se_method: str,
+    n_boot: int,
+    boot_weights: str,
+    n_jobs: int,
+    seed: Optional[int],
+    chunksize: Optional[int],
+    cache_dir: Optional[str],
+    cache_max_mb: int,
     pretrends: int,
     out_csv: str,
     plot_png: Optional[str],
@@ -127,11 +199,14 @@ def main(
     a PNG using the default Matplotlib style.
     """
 
-    df = pd.read_csv(csv_path)
     control_list: Optional[List[str]] = (
         [col.strip() for col in controls.split(",") if col.strip()] if controls else None
     )
     horizons_tuple = _parse_horizons(horizons)
+    cluster_list = [col.strip() for col in (cluster or "").split(",") if col.strip()]
+    cluster_spec: Union[str, List[str], None] = (
+        cluster_list[0] if len(cluster_list) == 1 else cluster_list or None
+    )
 
     estimator = DidImputation(
         y=y_col,
@@ -140,13 +215,24 @@ def main(
         Ei=Ei_col,
         controls=control_list,
         weight=weight,
-        cluster=cluster,
+        cluster=cluster_spec,
         horizons=horizons_tuple,
         weight_scheme=scheme,
         pretrends=pretrends,
+        solver=solver,
+        se_method=se_method,
+        n_boot=n_boot,
+        boot_weights=boot_weights,
+        n_jobs=n_jobs,
+        random_state=seed,
+        cache_dir=cache_dir,
+        cache_max_bytes=cache_max_mb * 1024 * 1024,
     )
 
-    result = estimator.fit(df)
+    if chunksize is not None:
+        result = estimator.fit_chunks(csv_path, chunksize=chunksize)
+    else:
+        result = estimator.fit(pd.read_csv(csv_path))
     summary = result.summary()
     summary.to_csv(out_csv, index=False)
 
@@ -168,3 +254,6 @@ def main(
 
     pretrend_info = result.meta.get("pretrend", {})
     click.echo(f"Wrote {out_csv}. Pretrend: {pretrend_info}")
+    cache_info = result.meta.get("cache")
+    if cache_info:
+        click.echo(f"Cache: {cache_info['hits']} hits, {cache_info['misses']} misses.")
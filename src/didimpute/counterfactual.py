@@ -1,11 +1,13 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from numpy.typing import NDArray
 
 from .first_stage import FirstStageModel
+from .panel import PanelIndex, event_times
 
 
 def compute_cell_effects(
@@ -16,6 +18,9 @@ def compute_cell_effects(
     Ei_col: str,
     fsm: FirstStageModel,
     controls: Optional[List[str]],
+    panel: Optional[PanelIndex] = None,
+    y0_hat: Optional[np.ndarray] = None,
+    window: Optional[Tuple[Tuple[int, int], int]] = None,
 ) -> Dict[str, Any]:
     """
     Compute fitted counterfactuals and resulting cell-level effects.
@@ -30,6 +35,15 @@ def compute_cell_effects(
         Fitted first-stage model available via :meth:`FirstStageModel.fit`.
     controls : list[str] | None
         Optional list of control columns (kept for parity with future versions).
+    panel : PanelIndex | None
+        Integer-coded structure of ``df``; lets the first stage look up effects by code.
+    y0_hat : np.ndarray | None
+        Precomputed counterfactuals aligned with ``df`` (for example one column of
+        :func:`~didimpute.first_stage.predict_many`); ``fsm`` is not queried when given.
+    window : tuple[tuple[int, int], int] | None
+        ``(horizons, pretrends)``. When given (and ``y0_hat`` is not), only the treated cells
+        with ``k`` inside ``horizons`` and the pre-period cells with ``-pretrends <= k < 0``
+        are predicted, and a :class:`LazyCellEffects` is returned.
 
     Returns
     -------
@@ -38,22 +52,13 @@ def compute_cell_effects(
         eventual-treated pre-periods; ``masks`` with boolean selectors used downstream.
     """
 
-    y_hat0 = fsm.predict_y0(df, y_col, id_col, time_col, controls)
-    outcome = df[y_col].astype(float).to_numpy()
-
     time_vals = df[time_col].to_numpy()
-    adoption_vals = df[Ei_col].to_numpy()
-    finite_adoption = df["_Ei_finite"].to_numpy(dtype=bool)
-    untreated_mask = df["_untreated"].to_numpy(dtype=bool)
-
-    treated_post = finite_adoption & (time_vals >= adoption_vals)
-    treated_pre = finite_adoption & (time_vals < adoption_vals)
-
-    tau = np.full_like(outcome, np.nan, dtype=float)
-    tau[treated_post] = outcome[treated_post] - y_hat0[treated_post]
-
-    placebo = np.full_like(outcome, np.nan, dtype=float)
-    placebo[treated_pre] = outcome[treated_pre] - y_hat0[treated_pre]
+    adoption_vals = pd.to_numeric(df[Ei_col], errors="coerce").to_numpy(dtype=float)
+    finite_adoption = panel.adopted if panel is not None else np.isfinite(adoption_vals)
+    with np.errstate(invalid="ignore"):
+        treated_post = finite_adoption & (time_vals >= adoption_vals)
+        treated_pre = finite_adoption & (time_vals < adoption_vals)
+    untreated_mask = panel.untreated if panel is not None else ~treated_post
 
     masks = {
         "treated_post": treated_post,
@@ -62,9 +67,149 @@ def compute_cell_effects(
         "untreated_all": untreated_mask,
     }
 
+    if window is not None and y0_hat is None:
+        effects = LazyCellEffects(df, y_col, id_col, time_col, fsm, controls, masks, panel)
+        horizons, pretrends = window
+        effects.predict(effects.window_mask(horizons, pretrends))
+        return effects
+
+    if y0_hat is None:
+        y_hat0 = fsm.predict_y0(df, y_col, id_col, time_col, controls, panel=panel)
+    else:
+        y_hat0 = np.asarray(y0_hat, dtype=float)
+    outcome = df[y_col].astype(float).to_numpy()
+
+    tau = np.full_like(outcome, np.nan, dtype=float)
+    tau[treated_post] = outcome[treated_post] - y_hat0[treated_post]
+
+    placebo = np.full_like(outcome, np.nan, dtype=float)
+    placebo[treated_pre] = outcome[treated_pre] - y_hat0[treated_pre]
+
     return {
         "y0_hat": y_hat0,
         "tau": tau,
         "placebo": placebo,
         "masks": masks,
     }
+
+
+class LazyCellEffects(Dict[str, Any]):
+    """
+    Cell-level effects predicted only for the rows that are actually used.
+
+    Counterfactuals are stored compactly as sorted row positions ``rows`` with their
+    predictions ``predicted``. :meth:`arrays` returns full-length ``y0_hat``/``tau``/``placebo``
+    arrays (NaN outside the predicted rows) for a selection of rows, predicting the missing
+    ones first; looking up ``"y0_hat"``, ``"tau"``, or ``"placebo"`` directly predicts every
+    row the key covers and caches the result, so code written for the eager dictionary of
+    :func:`compute_cell_effects` keeps working. Adding treated rows drops a cached
+    ``"cube"``, which was built from fewer cells.
+    """
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        y_col: str,
+        id_col: str,
+        time_col: str,
+        fsm: FirstStageModel,
+        controls: Optional[List[str]],
+        masks: Dict[str, NDArray[np.bool_]],
+        panel: Optional[PanelIndex] = None,
+    ) -> None:
+        super().__init__(masks=masks)
+        self._df = df
+        self._columns = (y_col, id_col, time_col)
+        self._fsm = fsm
+        self._controls = controls
+        self._panel = panel
+        self.rows: NDArray[np.intp] = np.zeros(0, dtype=np.intp)
+        self.predicted: NDArray[np.float64] = np.zeros(0, dtype=float)
+
+    def window_mask(
+        self,
+        horizons: Optional[Tuple[int, int]] = None,
+        pretrends: int = 0,
+        untreated: bool = False,
+    ) -> NDArray[np.bool_]:
+        """
+        Rows feeding the treated cells in ``horizons`` (all when ``None``), the pre-period
+        cells with ``-pretrends <= k < 0``, and, with ``untreated``, every untreated row.
+        """
+
+        masks = self["masks"]
+        k = event_times(self._df, self._panel)
+        treated = masks["treated_post"].copy()
+        if horizons is not None:
+            treated &= (k >= horizons[0]) & (k <= horizons[1])
+        pre = masks["treated_pre"] & (k >= -int(pretrends)) & (k < 0)
+        selected: NDArray[np.bool_] = treated | pre
+        if untreated:
+            selected |= masks["untreated_all"]
+        return selected
+
+    def predict(self, mask: NDArray[np.bool_]) -> None:
+        """Predict the rows of ``mask`` that have not been predicted yet."""
+
+        needed = np.setdiff1d(np.flatnonzero(mask), self.rows, assume_unique=True)
+        if needed.size == 0:
+            return
+        y_col, id_col, time_col = self._columns
+        predicted = self._fsm.predict_y0(
+            self._df, y_col, id_col, time_col, self._controls, panel=self._panel, rows=needed,
+        )
+        rows = np.concatenate([self.rows, needed])
+        order = np.argsort(rows, kind="stable")
+        self.rows = rows[order]
+        self.predicted = np.concatenate([self.predicted, predicted])[order]
+        if self["masks"]["treated_post"][needed].any():
+            self.pop("cube", None)
+
+    def arrays(self, mask: Optional[NDArray[np.bool_]] = None) -> Dict[str, Any]:
+        """
+        Full-length ``y0_hat``, ``tau``, ``placebo`` over the predicted rows, and ``masks``.
+
+        The rows of ``mask`` are predicted first. The arrays are built on each call and not
+        stored.
+        """
+
+        if mask is not None:
+            self.predict(mask)
+        masks = self["masks"]
+        outcome = self._df[self._columns[0]].astype(float).to_numpy()
+        y0_hat = np.full(len(self._df), np.nan)
+        y0_hat[self.rows] = self.predicted
+        tau = np.where(masks["treated_post"], outcome - y0_hat, np.nan)
+        placebo = np.where(masks["treated_pre"], outcome - y0_hat, np.nan)
+        return {"y0_hat": y0_hat, "tau": tau, "placebo": placebo, "masks": masks}
+
+    def __missing__(self, key: str) -> Any:
+        covers = {
+            "y0_hat": np.ones(len(self._df), dtype=bool),
+            "tau": self["masks"]["treated_post"],
+            "placebo": self["masks"]["treated_pre"],
+        }
+        if key not in covers:
+            raise KeyError(key)
+        value = self.arrays(covers[key])[key]
+        self[key] = value
+        return value
+
+
+def cell_arrays(
+    counterfactual: Dict[str, Any],
+    horizons: Optional[Tuple[int, int]] = None,
+    pretrends: int = 0,
+    untreated: bool = False,
+) -> Dict[str, Any]:
+    """
+    ``y0_hat``, ``tau``, ``placebo``, and ``masks`` covering at least the requested cells.
+
+    Eager results from :func:`compute_cell_effects` are returned as they are; for a
+    :class:`LazyCellEffects` only the rows of :meth:`LazyCellEffects.window_mask` are
+    predicted (if they are not already).
+    """
+
+    if isinstance(counterfactual, LazyCellEffects):
+        return counterfactual.arrays(counterfactual.window_mask(horizons, pretrends, untreated))
+    return counterfactual
@@ -1,23 +1,182 @@
 from __future__ import annotations
 
+import copy
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Sequence
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+import scipy.sparse as sp
 from numpy.typing import NDArray
+from scipy.sparse.csgraph import connected_components
 
 from .errors import EstimationError
+from .linalg import InformationFactor, IterativeInformation
+from .panel import PanelIndex, untreated_rows
 
+# Largest Schur-complement block for which ``leverage(method="auto")`` stays exact.
+_EXACT_LEVERAGE_DIM = 2048
 
-def _unique_in_order(values: Sequence[Any]) -> List[Any]:
-    """Return the unique elements of ``values`` preserving first appearance."""
 
-    seen: Dict[Any, None] = {}
-    for value in values:
-        if value not in seen:
-            seen[value] = None
-    return list(seen.keys())
+def _group_means(
+    values: NDArray[np.float64],
+    codes: NDArray[np.intp],
+    n_levels: int,
+    weights: NDArray[np.float64],
+    weight_totals: NDArray[np.float64],
+) -> NDArray[np.float64]:
+    """Weighted means of each column of ``values`` within the groups given by ``codes``."""
+
+    sums = np.column_stack(
+        [
+            np.bincount(codes, weights=weights * values[:, j], minlength=n_levels)
+            for j in range(values.shape[1])
+        ],
+    )
+    return np.divide(
+        sums,
+        weight_totals[:, None],
+        out=np.zeros_like(sums),
+        where=weight_totals[:, None] > 0,
+    )
+
+
+def _alternating_projections(
+    values: NDArray[np.float64],
+    codes: List[NDArray[np.intp]],
+    sizes: List[int],
+    weights: NDArray[np.float64],
+    tol: float,
+    maxiter: int,
+) -> Tuple[NDArray[np.float64], List[NDArray[np.float64]], int, bool]:
+    """
+    Sweep out every fixed-effect dimension from ``values`` until the projections vanish.
+
+    Returns the within-transformed columns, the accumulated group effects per dimension
+    (so that ``values = demeaned + sum_d effects[d][codes[d]]``), the number of sweeps, and
+    whether the largest group mean fell below ``tol`` (relative to the column scale).
+    """
+
+    demeaned = np.array(values, dtype=float, copy=True)
+    effects = [np.zeros((size, values.shape[1]), dtype=float) for size in sizes]
+    totals = [
+        np.asarray(np.bincount(code, weights=weights, minlength=size), dtype=float)
+        for code, size in zip(codes, sizes)
+    ]
+    scale = max(1.0, float(np.max(np.abs(values))) if values.size else 1.0)
+
+    for iteration in range(1, maxiter + 1):
+        largest = 0.0
+        for dim, (code, size) in enumerate(zip(codes, sizes)):
+            means = _group_means(demeaned, code, size, weights, totals[dim])
+            demeaned -= means[code]
+            effects[dim] += means
+            largest = max(largest, float(np.max(np.abs(means))) if means.size else 0.0)
+        if largest <= tol * scale:
+            return demeaned, effects, iteration, True
+    return demeaned, effects, maxiter, False
+
+
+def _absorbed_design(
+    controls: NDArray[np.float64],
+    codes: List[NDArray[np.intp]],
+    sizes: List[int],
+) -> sp.csr_matrix:
+    """Sparse absorbed design: the controls, then one indicator per level of each dimension."""
+
+    n = len(controls)
+    indicators = [
+        sp.csr_matrix((np.ones(n), (np.arange(n), code)), shape=(n, size))
+        for code, size in zip(codes, sizes)
+    ]
+    return sp.hstack([sp.csr_matrix(controls), *indicators], format="csr")
+
+
+def _absorbed_rank(codes: List[NDArray[np.intp]], sizes: List[int]) -> int:
+    """
+    Number of identified fixed-effect parameters across the absorbed dimensions.
+
+    A dimension that is constant within the levels of another one (for example states in a
+    unit panel) is spanned by it and dropped. The first two remaining dimensions lose one
+    parameter per connected component of their bipartite level graph, and every further
+    dimension is taken to lose one, as its level sums are collinear with the others.
+    """
+
+    kept = list(range(len(codes)))
+    for dim in range(len(codes)):
+        for other in kept:
+            if other == dim:
+                continue
+            pairs = codes[other].astype(np.int64) * sizes[dim] + codes[dim]
+            if len(np.unique(pairs)) == len(np.unique(codes[other])):
+                kept.remove(dim)
+                break
+    if len(kept) == 1:
+        return sizes[kept[0]]
+
+    first, second = kept[0], kept[1]
+    n = len(codes[first])
+    graph = sp.csr_matrix(
+        (np.ones(n), (codes[first], codes[second])), shape=(sizes[first], sizes[second]),
+    )
+    n_components, _labels = connected_components(
+        sp.bmat([[None, graph], [graph.T, None]]), directed=False,
+    )
+    return sum(sizes[dim] for dim in kept) - int(n_components) - (len(kept) - 2)
+
+
+def predict_many(
+    models: List["FirstStageModel"],
+    df: pd.DataFrame,
+    panel: Optional[PanelIndex] = None,
+) -> NDArray[np.float64]:
+    """
+    Predict counterfactuals for models that share fixed-effect levels (from ``fit_many``).
+
+    Level positions are looked up once and the per-outcome effects, intercepts, and control
+    slopes are gathered as ``levels x m`` blocks, so the result is an ``n x m`` array built in
+    one pass over the rows.
+
+    Raises
+    ------
+    EstimationError
+        If a model is unfitted or the models do not share fixed-effect levels.
+    """
+
+    base = models[0]
+    if not all(model.fitted_ and model.coef_ is not None for model in models):
+        raise EstimationError("First-stage model is not fitted.")
+    for model in models[1:]:
+        if len(model.fe_levels_) != len(base.fe_levels_) or not all(
+            mine is theirs or mine.equals(theirs)
+            for mine, theirs in zip(model.fe_levels_, base.fe_levels_)
+        ):
+            raise EstimationError("Models must share fixed-effect levels; fit them with fit_many.")
+
+    out = np.empty((len(df), len(models)), dtype=float)
+    out[:] = np.array([model.intercept_ for model in models], dtype=float)
+    for dim, (col, levels) in enumerate(zip(base.fe_columns_, base.fe_levels_)):
+        positions = base._level_positions(df, col, levels, panel, None)
+        out += np.column_stack([model.fe_values_[dim] for model in models])[positions]
+    if base.controls_:
+        slopes = np.column_stack([np.asarray(model.beta_, dtype=float) for model in models])
+        step = max(int(base.chunk_size), 1)
+        for start in range(0, len(df), step):
+            out[start:start + step] += base._controls_block(df.iloc[start:start + step]) @ slopes
+    return out
+
+
+def _embed(matrix: Any, mapping: NDArray[np.intp], dim: int) -> Any:
+    """Place ``matrix`` at rows/columns ``mapping`` of a zero ``dim x dim`` matrix."""
+
+    if sp.issparse(matrix):
+        coo = sp.coo_matrix(matrix)
+        return sp.csc_matrix(
+            (coo.data, (mapping[coo.row], mapping[coo.col])), shape=(dim, dim),
+        )
+    out = np.zeros((dim, dim), dtype=float)
+    out[np.ix_(mapping, mapping)] = matrix
+    return out
 
 
 @dataclass
@@ -27,24 +186,76 @@ class FirstStageModel:
 
     The model includes an intercept, optional controls, and unit/time dummies
     (using the first observed categories as baselines).
+
+    Parameters
+    ----------
+    solver : str
+        ``"dense"`` (default) solves the weighted normal equations on a dense design by Cholesky;
+        ``"sparse"`` builds a CSR design from integer level codes and solves the weighted
+        normal equations with a sparse LU factorization, which scales to panels with many units.
+        Either way the factorization of ``X'WX`` is cached as ``factor_`` for reuse by the
+        standard-error stage.
+    fe : str
+        ``"twoway"`` (default) estimates unit and time dummies explicitly. ``"absorbing"``
+        sweeps out unit, time, and any ``absorb`` dimensions by weighted alternating
+        projections, partials out controls by Frisch-Waugh-Lovell, and recovers the
+        fixed-effect values afterwards; no dense dummy matrix is formed. The sparse ``X'WX``
+        over the controls and an indicator for every level of every dimension is kept as
+        ``absorbed_information_`` (solved by conjugate gradients) for the standard errors.
+    absorb : list[str]
+        Additional fixed-effect columns (for example a ``region_year`` key) absorbed when
+        ``fe="absorbing"``.
+    tol, maxiter : float, int
+        Convergence tolerance and sweep limit for the alternating projections.
+    chunk_size : int
+        Maximum number of rows whose control block is materialized at once by
+        :meth:`predict_y0`.
+    store : str
+        ``"full"`` (default) keeps the untreated design, weights, ids, and residuals for
+        diagnostics. ``"lean"`` keeps only what prediction and standard errors need: the
+        coefficients in lookup form, the factorization, and the residual sum of squares with
+        its degrees of freedom, which is all the SE stage reads. Level lists and design column
+        names are derived from ``fe_levels_`` on demand in both modes.
+
+    Notes
+    -----
+    After fitting, the coefficients are also kept in lookup form: ``intercept_``, the control
+    slopes ``beta_``, and one effect vector per fixed-effect dimension in ``fe_values_``
+    (aligned with ``fe_levels_``, baseline levels set to zero). Prediction gathers these by
+    integer code and never forms a design matrix. Two-way fits also keep the weighted normal
+    equations (``xtwx_``, ``xtwy_``, and ``ywy_ = y'Wy``) so that :meth:`update` can add or
+    remove untreated rows without revisiting the fitted sample.
     """
 
+    solver: str = "dense"
+    fe: str = "twoway"
+    absorb: List[str] = field(default_factory=list)
+    tol: float = 1e-10
+    maxiter: int = 10_000
+    chunk_size: int = 100_000
+    store: str = "full"
     fitted_: bool = False
     info_: Dict[str, Any] = field(default_factory=dict)
     coef_: Optional[NDArray[np.float64]] = None
-    design_columns_: List[str] = field(default_factory=list)
     controls_: List[str] = field(default_factory=list)
-    id_baseline_: Any = None
-    id_levels_: List[Any] = field(default_factory=list)
-    time_baseline_: Any = None
-    time_levels_: List[Any] = field(default_factory=list)
     id_col_: Optional[str] = None
     time_col_: Optional[str] = None
-    xtwx_inv_: Optional[NDArray[np.float64]] = None
-    untreated_design_: Optional[NDArray[np.float64]] = None
+    factor_: Optional[InformationFactor] = None
+    absorbed_information_: Optional[IterativeInformation] = None
+    untreated_design_: Optional[Any] = None
     untreated_weights_: Optional[NDArray[np.float64]] = None
     untreated_ids_: Optional[NDArray[Any]] = None
     untreated_residuals_: Optional[NDArray[np.float64]] = None
+    fe_columns_: List[str] = field(default_factory=list)
+    fe_levels_: List[pd.Index] = field(default_factory=list)
+    fe_values_: List[NDArray[np.float64]] = field(default_factory=list)
+    intercept_: float = 0.0
+    beta_: Optional[NDArray[np.float64]] = None
+    resid_ss_: float = 0.0
+    dof_: int = 0
+    xtwx_: Optional[Any] = None
+    xtwy_: Optional[NDArray[np.float64]] = None
+    ywy_: float = 0.0
 
     def fit(
         self,
@@ -54,6 +265,7 @@ class FirstStageModel:
         time: str,
         controls: Optional[List[str]],
         weight: Optional[str],
+        panel: Optional[PanelIndex] = None,
     ) -> "FirstStageModel":
         """
         Estimate the untreated regression using weighted least squares.
@@ -61,13 +273,18 @@ class FirstStageModel:
         Parameters
         ----------
         df : pd.DataFrame
-            Prepared panel with helper columns from ``validate_and_prepare``.
+            Prepared panel from ``validate_and_prepare``.
         y, id, time : str
             Outcome, unit id, and time column names.
         controls : list[str] | None
             Optional control variable names.
         weight : str | None
-            Optional weight column; falls back to ``_w`` when absent.
+            Optional weight column; rows carry unit weight when absent.
+        panel : PanelIndex | None
+            Integer-coded structure of ``df`` from ``validate_and_prepare``; when given, the
+            untreated rows are ``panel.untreated`` and unit and time levels are read from its
+            codes instead of hashing the raw columns. Without it ``df`` needs an
+            ``_untreated`` indicator column.
 
         Raises
         ------
@@ -76,16 +293,77 @@ class FirstStageModel:
             design matrix is rank deficient.
         """
 
-        untreated = df[df["_untreated"] == 1].copy()
-        if untreated.empty:
-            raise EstimationError("Untreated sample is empty; cannot fit first stage.")
+        return self._fit_outcomes(df, [y], id, time, controls, weight, panel)[0]
+
+    def fit_many(
+        self,
+        df: pd.DataFrame,
+        ys: List[str],
+        id: str,
+        time: str,
+        controls: Optional[List[str]],
+        weight: Optional[str],
+        panel: Optional[PanelIndex] = None,
+    ) -> List["FirstStageModel"]:
+        """
+        Estimate the untreated regression for several outcomes that share one design.
 
-        weights = untreated["_w"].to_numpy(dtype=float)
-        if weight:
-            weights = pd.to_numeric(untreated[weight], errors="coerce").to_numpy(dtype=float)
+        The untreated sample, the design, ``X'WX``, and its factorization are built once; the
+        outcomes are solved together as a ``p x m`` multi-right-hand-side system. The first
+        returned model is ``self``; the others are shallow copies that share ``factor_``,
+        ``xtwx_``, and the fixed-effect levels. Absorbing fits are run once per outcome.
 
-        if np.any(weights < 0):
-            raise EstimationError("Weights must be non-negative in the first stage.")
+        Parameters
+        ----------
+        ys : list[str]
+            Outcome column names; the other parameters are as in :meth:`fit`.
+
+        Returns
+        -------
+        list[FirstStageModel]
+            One fitted model per outcome, in the order of ``ys``.
+        """
+
+        if not ys:
+            raise ValueError("At least one outcome is required.")
+        return self._fit_outcomes(df, list(ys), id, time, controls, weight, panel)
+
+    def _fit_outcomes(
+        self,
+        df: pd.DataFrame,
+        ys: List[str],
+        id: str,
+        time: str,
+        controls: Optional[List[str]],
+        weight: Optional[str],
+        panel: Optional[PanelIndex],
+    ) -> List["FirstStageModel"]:
+        """Shared body of :meth:`fit` and :meth:`fit_many`."""
+
+        if self.solver not in {"dense", "sparse"}:
+            raise ValueError(f"Unsupported first-stage solver: {self.solver!r}")
+        if self.fe not in {"twoway", "absorbing"}:
+            raise ValueError(f"Unsupported fixed-effects configuration: {self.fe!r}")
+        if self.absorb and self.fe != "absorbing":
+            raise ValueError("Extra fixed effects in `absorb` require fe='absorbing'.")
+        if self.store not in {"full", "lean"}:
+            raise ValueError(f"Unsupported first-stage storage mode: {self.store!r}")
+
+        untreated_index = np.flatnonzero(untreated_rows(df, panel))
+        if untreated_index.size == 0:
+            raise EstimationError("Untreated sample is empty; cannot fit first stage.")
+        rows = untreated_index if panel is not None else None
+        # Gather only the columns the fit reads, by position, into a copy-free frame; unit and
+        # time levels come from the panel codes when a panel is given.
+        needed = [*ys, *(controls or []), *([weight] if weight else []), *self.absorb]
+        if panel is None:
+            needed += [id, time]
+        untreated = pd.DataFrame(
+            {col: df[col].to_numpy()[untreated_index] for col in dict.fromkeys(needed)},
+            copy=False,
+        )
+
+        weights = self._untreated_weights(untreated, weight)
         if not np.any(weights > 0):
             raise EstimationError("At least one untreated observation must carry positive weight.")
 
@@ -93,48 +371,231 @@ class FirstStageModel:
         self.id_col_ = id
         self.time_col_ = time
 
-        id_values = untreated[id].to_numpy()
-        time_values = untreated[time].to_numpy()
-        id_levels = _unique_in_order(id_values.tolist())
-        time_levels = _unique_in_order(time_values.tolist())
-        if not id_levels or not time_levels:
+        id_index = self._fit_levels(untreated, id, panel, rows)
+        time_index = self._fit_levels(untreated, time, panel, rows)
+        if len(id_index) == 0 or len(time_index) == 0:
             raise EstimationError("Insufficient variation in id or time for the first stage.")
 
-        self.id_baseline_ = id_levels[0]
-        self.time_baseline_ = time_levels[0]
-        self.id_levels_ = [lvl for lvl in id_levels if lvl != self.id_baseline_]
-        self.time_levels_ = [lvl for lvl in time_levels if lvl != self.time_baseline_]
+        self.fe_columns_ = [id, time]
+        self.fe_levels_ = [id_index, time_index]
+
+        if self.fe == "absorbing":
+            template = copy.copy(self)
+            return [
+                (self if j == 0 else copy.copy(template))._fit_absorbing(
+                    untreated, y, weights, panel, rows,
+                )
+                for j, y in enumerate(ys)
+            ]
+
+        id_pos, time_pos = self._dummy_positions(untreated, panel, rows)
+        design = self._build_design_matrix(untreated, id_pos, time_pos)
+        outcomes = np.column_stack([self._untreated_outcome(untreated, y) for y in ys])
+        xtwx, xtwy = self._cross_products(design, weights, outcomes)
+        factor = InformationFactor(xtwx)
+        coefs = factor.solve(xtwy)
+
+        models: List[FirstStageModel] = []
+        for j in range(len(ys)):
+            model = self if j == 0 else copy.copy(self)
+            rank = model._adopt_solution(factor, xtwx, xtwy[:, j], coefs[:, j])
+            y_vec = outcomes[:, j]
+            model.ywy_ = float(np.sum(weights * y_vec * y_vec))
+            residuals_untreated = y_vec - design @ model.coef_
+            model._store_untreated(
+                design, weights, residuals_untreated, id_pos + 1, n_params=rank,
+            )
+            model.info_ = {
+                "n_obs": int(len(untreated)),
+                "rank": int(rank),
+                "solver": self.solver,
+                "store": self.store,
+                "controls": list(self.controls_),
+                "baseline_id": self.id_baseline_,
+                "baseline_time": self.time_baseline_,
+            }
+            model.fitted_ = True
+            models.append(model)
+        return models
+
+    def update(
+        self,
+        added: pd.DataFrame,
+        y: str,
+        weight: Optional[str],
+        removed: Optional[pd.DataFrame] = None,
+    ) -> "FirstStageModel":
+        """
+        Refit after adding and removing untreated rows, without revisiting the fitted sample.
+
+        The stored normal equations ``xtwx_`` / ``xtwy_`` / ``ywy_`` are updated with the
+        cross products of ``added`` and downdated with those of ``removed``; unit and time
+        levels first seen in ``added`` are appended (existing baselines are kept). The
+        information matrix is then refactored, so the cost is O(rows changed * p) plus one
+        factorization of the ``p x p`` system, independent of the panel length. The
+        row-level residual attributes cannot be updated this way and are cleared.
+        Fitted attributes are rebound rather than mutated, so a shallow copy of the model can
+        be updated while the original stays intact.
+
+        Parameters
+        ----------
+        added : pd.DataFrame
+            Prepared untreated rows to add (may introduce new unit/time levels).
+        y : str
+            Outcome column name.
+        weight : str | None
+            Optional weight column; rows carry unit weight when absent.
+        removed : pd.DataFrame | None
+            Prepared rows previously in the untreated sample (with their fitted values) that
+            should leave it, for example cells that became treated.
+
+        Raises
+        ------
+        EstimationError
+            If the model was not fitted with ``fe="twoway"`` or the updated design is rank
+            deficient (for example when removals empty a fixed-effect level).
+        """
+
+        if not self.fitted_ or self.xtwx_ is None or self.xtwy_ is None:
+            raise EstimationError("First-stage model is not fitted.")
+        if self.fe != "twoway":
+            raise EstimationError("Incremental updates require fe='twoway'.")
+
+        old_dim = int(self.xtwy_.shape[0])
+        old_units = self._n_dummies(0)
+        levels = list(self.fe_levels_)
+        for dim, col in enumerate((str(self.id_col_), str(self.time_col_))):
+            values = added[col].to_numpy()
+            fresh = pd.unique(values[levels[dim].get_indexer(pd.Index(values)) < 0])
+            if len(fresh):
+                levels[dim] = levels[dim].append(pd.Index(fresh))
+        self.fe_levels_ = levels
+
+        # Embed the old system in the enlarged column layout (new unit dummies go between the
+        # unit and time blocks, new time dummies at the end).
+        n_units_new = self._n_dummies(0) - old_units
+        mapping = np.arange(old_dim)
+        mapping[1 + len(self.controls_) + old_units:] += n_units_new
+        dim = 1 + len(self.controls_) + self._n_dummies(0) + self._n_dummies(1)
+        xtwx, xtwy = _embed(self.xtwx_, mapping, dim), np.zeros(dim, dtype=float)
+        xtwy[mapping] = self.xtwy_
+        ywy, n_obs = self.ywy_, int(self.info_.get("n_obs", 0))
+
+        for frame, sign in ((added, 1.0), (removed, -1.0)):
+            if frame is None or frame.empty:
+                continue
+            weights = self._untreated_weights(frame, weight)
+            y_vec = self._untreated_outcome(frame, y)
+            design = self.design_matrix(frame)
+            frame_xtwx, frame_xtwy = self._cross_products(design, weights, y_vec)
+            xtwx = xtwx + sign * frame_xtwx
+            xtwy += sign * frame_xtwy
+            ywy += sign * float(np.sum(weights * y_vec * y_vec))
+            n_obs += int(sign) * len(frame)
+
+        rank = self.solve_normal_equations(xtwx, xtwy)
+        self.ywy_ = ywy
+        coef = np.asarray(self.coef_, dtype=float)
+        self.resid_ss_ = max(ywy - float(coef @ xtwy), 0.0)
+        self.dof_ = max(n_obs - rank, 1)
+        self.untreated_design_ = None
+        self.untreated_weights_ = None
+        self.untreated_ids_ = None
+        self.untreated_residuals_ = None
+        self.info_ = {
+            **self.info_,
+            "n_obs": n_obs,
+            "rank": int(rank),
+            "updates": int(self.info_.get("updates", 0)) + 1,
+        }
+        return self
+
+    def _fit_absorbing(
+        self,
+        untreated: pd.DataFrame,
+        y: str,
+        weights: NDArray[np.float64],
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+    ) -> "FirstStageModel":
+        """Fit the untreated regression by within-transformation over all FE dimensions."""
 
-        design = self._build_design_matrix(untreated, fit_mode=True)
         y_vec = pd.to_numeric(untreated[y], errors="coerce").to_numpy(dtype=float)
         if np.isnan(y_vec).any():
             raise EstimationError("Outcome contains non-numeric values in the untreated sample.")
 
+        self.fe_columns_ = [*self.fe_columns_, *self.absorb]
+        self.fe_levels_ = [
+            *self.fe_levels_,
+            *(self._fit_levels(untreated, col, panel, rows) for col in self.absorb),
+        ]
+        codes = [
+            self._level_positions(untreated, col, levels, panel, rows)
+            for col, levels in zip(self.fe_columns_, self.fe_levels_)
+        ]
+        sizes = [len(levels) for levels in self.fe_levels_]
+
+        n_controls = len(self.controls_)
+        stacked = np.empty((len(untreated), 1 + n_controls), dtype=float)
+        stacked[:, 0] = y_vec
+        if n_controls:
+            stacked[:, 1:] = self._controls_block(untreated)
+
+        design = _absorbed_design(stacked[:, 1:], codes, sizes)
+        self.absorbed_information_ = IterativeInformation(
+            (design.T @ sp.diags(weights) @ design).tocsr(),
+        )
+
+        demeaned, _effects, demean_iter, demean_ok = _alternating_projections(
+            stacked, codes, sizes, weights, self.tol, self.maxiter,
+        )
+        if not demean_ok:
+            raise EstimationError(
+                f"Alternating projections did not converge within {self.maxiter} sweeps; "
+                "raise maxiter or loosen tol.",
+            )
+
         sqrt_w = np.sqrt(weights)
-        design_w = design * sqrt_w[:, None]
-        y_w = y_vec * sqrt_w
-
-        coef, residuals, rank, _sing = np.linalg.lstsq(design_w, y_w, rcond=None)
-        if rank < design.shape[1]:
-            raise EstimationError("First-stage design matrix is rank deficient.")
-
-        xtwx = design_w.T @ design_w
-        try:
-            xtwx_inv = np.linalg.inv(xtwx)
-        except np.linalg.LinAlgError as exc:
-            raise EstimationError("Unable to invert first-stage information matrix.") from exc
-
-        self.coef_ = coef.astype(float)
-        self.xtwx_inv_ = xtwx_inv.astype(float)
-        residuals_untreated = y_vec - design @ self.coef_
-        self.untreated_design_ = design.astype(float, copy=True)
-        self.untreated_weights_ = weights.astype(float, copy=True)
-        self.untreated_ids_ = untreated[id].to_numpy()
-        self.untreated_residuals_ = residuals_untreated.astype(float, copy=True)
-        self.design_columns_ = self._design_column_names()
+        beta = np.zeros(n_controls, dtype=float)
+        if n_controls:
+            beta, _res, rank, _sing = np.linalg.lstsq(
+                demeaned[:, 1:] * sqrt_w[:, None], demeaned[:, 0] * sqrt_w, rcond=None,
+            )
+            if rank < n_controls:
+                raise EstimationError(
+                    "Controls are collinear with the absorbed fixed effects.",
+                )
+
+        # Recover the fixed-effect values from the controls-adjusted outcome.
+        adjusted = y_vec - (stacked[:, 1:] @ beta if n_controls else 0.0)
+        remainder, effects, recover_iter, recover_ok = _alternating_projections(
+            adjusted[:, None], codes, sizes, weights, self.tol, self.maxiter,
+        )
+        if not recover_ok:
+            raise EstimationError(
+                f"Fixed-effect recovery did not converge within {self.maxiter} sweeps; "
+                "raise maxiter or loosen tol.",
+            )
+
+        self.coef_ = np.asarray(beta, dtype=float)
+        self.intercept_ = 0.0
+        self.beta_ = self.coef_
+        self.fe_values_ = [effect[:, 0] for effect in effects]
+        self.factor_ = None
+        n_params = n_controls + _absorbed_rank(codes, sizes)
+        self._store_untreated(None, weights, remainder[:, 0], codes[0], n_params=n_params)
         self.info_ = {
             "n_obs": int(len(untreated)),
-            "rank": int(rank),
+            "rank": n_controls,
+            "fe": "absorbing",
+            "absorbed": list(self.fe_columns_),
+            "n_levels": dict(zip(self.fe_columns_, sizes)),
+            "tol": self.tol,
+            "maxiter": self.maxiter,
+            "demean_iterations": int(demean_iter),
+            "recovery_iterations": int(recover_iter),
+            "converged": True,
+            "store": self.store,
             "controls": list(self.controls_),
             "baseline_id": self.id_baseline_,
             "baseline_time": self.time_baseline_,
@@ -142,6 +603,161 @@ class FirstStageModel:
         self.fitted_ = True
         return self
 
+    def solve_normal_equations(self, xtwx: Any, xtwy: NDArray[np.float64]) -> int:
+        """
+        Factor ``X'WX``, solve for ``coef_``, and split it into lookup form.
+
+        ``fe_levels_`` and ``controls_`` must already describe the design columns. Shared by
+        :meth:`fit` and the out-of-core fit, which accumulates the normal equations over chunks.
+
+        Returns
+        -------
+        int
+            Number of design columns.
+
+        Raises
+        ------
+        EstimationError
+            If the information matrix is rank deficient or the solution is not finite.
+        """
+
+        factor = InformationFactor(xtwx)
+        return self._adopt_solution(factor, xtwx, xtwy, factor.solve(xtwy))
+
+    def _adopt_solution(
+        self,
+        factor: InformationFactor,
+        xtwx: Any,
+        xtwy: NDArray[np.float64],
+        coef: NDArray[np.float64],
+    ) -> int:
+        """Bind a solved system to this model and return the number of design columns."""
+
+        if not np.all(np.isfinite(coef)):
+            raise EstimationError("Unable to invert first-stage information matrix.")
+        self.factor_ = factor
+        self.xtwx_, self.xtwy_ = xtwx, np.asarray(xtwy, dtype=float)
+        self.coef_ = np.asarray(coef, dtype=float)
+        self._split_coefficients()
+        return factor.dim
+
+    @property
+    def id_baseline_(self) -> Any:
+        """Baseline unit (first untreated unit observed)."""
+
+        return self.fe_levels_[0][0] if self.fe_levels_ else None
+
+    @property
+    def time_baseline_(self) -> Any:
+        """Baseline period (first untreated period observed)."""
+
+        return self.fe_levels_[1][0] if self.fe_levels_ else None
+
+    @property
+    def id_levels_(self) -> List[Any]:
+        """Non-baseline unit levels, in design-column order."""
+
+        return list(self.fe_levels_[0][1:]) if self.fe_levels_ else []
+
+    @property
+    def time_levels_(self) -> List[Any]:
+        """Non-baseline time levels, in design-column order."""
+
+        return list(self.fe_levels_[1][1:]) if self.fe_levels_ else []
+
+    @property
+    def design_columns_(self) -> List[str]:
+        """Ordered design column names, generated on demand."""
+
+        return self._design_column_names()
+
+    def _n_dummies(self, dim: int) -> int:
+        """Number of dummy columns for fixed-effect dimension ``dim`` (baseline dropped)."""
+
+        return max(len(self.fe_levels_[dim]) - 1, 0) if len(self.fe_levels_) > dim else 0
+
+    def _store_untreated(
+        self,
+        design: Any,
+        weights: NDArray[np.float64],
+        residuals: NDArray[np.float64],
+        unit_positions: NDArray[np.intp],
+        n_params: int,
+    ) -> None:
+        """Keep residual summaries, plus the untreated arrays when ``store="full"``."""
+
+        self.resid_ss_ = float(np.sum(weights * residuals * residuals))
+        self.dof_ = max(int(len(residuals) - n_params), 1)
+        if self.store == "lean":
+            self.untreated_design_ = None
+            self.untreated_weights_ = None
+            self.untreated_ids_ = None
+            self.untreated_residuals_ = None
+            return
+        self.untreated_design_ = design
+        self.untreated_weights_ = weights.astype(float, copy=True)
+        self.untreated_ids_ = self.fe_levels_[0].to_numpy()[unit_positions]
+        self.untreated_residuals_ = residuals.astype(float, copy=True)
+
+    def _split_coefficients(self) -> None:
+        """Store the two-way coefficient vector as intercept, slopes, and per-level effects."""
+
+        coef = np.asarray(self.coef_, dtype=float)
+        n_dense = 1 + len(self.controls_)
+        n_id = self._n_dummies(0)
+        self.intercept_ = float(coef[0])
+        self.beta_ = coef[1:n_dense].copy()
+        alpha = np.zeros(n_id + 1, dtype=float)
+        alpha[1:] = coef[n_dense:n_dense + n_id]
+        lam = np.zeros(self._n_dummies(1) + 1, dtype=float)
+        lam[1:] = coef[n_dense + n_id:]
+        self.fe_values_ = [alpha, lam]
+
+    def _predict_lookup(
+        self,
+        frame: pd.DataFrame,
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+    ) -> NDArray[np.float64]:
+        """
+        Predict ``intercept + sum_d effect_d[code_d] + X beta`` without a design matrix.
+
+        Fixed effects are gathered by integer code; controls are processed in blocks of at
+        most ``chunk_size`` rows, so memory stays O(n) rather than O(n * p).
+        """
+
+        y0 = np.full(len(frame), self.intercept_, dtype=float)
+        for col, levels, values in zip(self.fe_columns_, self.fe_levels_, self.fe_values_):
+            y0 += values[self._level_positions(frame, col, levels, panel, rows)]
+        if self.controls_ and self.beta_ is not None:
+            step = max(int(self.chunk_size), 1)
+            for start in range(0, len(frame), step):
+                block = self._controls_block(frame.iloc[start:start + step])
+                y0[start:start + step] += block @ self.beta_
+        return y0
+
+    @property
+    def xtwx_inv_(self) -> Optional[NDArray[np.float64]]:
+        """Explicit ``(X'WX)^{-1}`` materialized from ``factor_`` (diagnostics only)."""
+
+        return None if self.factor_ is None else self.factor_.inverse()
+
+    def information_quad_form(self, vector: NDArray[np.float64]) -> float:
+        """
+        Return ``v' (X'WX)^{-1} v`` for a design-space vector ``v``.
+
+        Raises
+        ------
+        EstimationError
+            If the model has not been fitted.
+        """
+
+        if not self.fitted_:
+            raise EstimationError("First-stage model is not fitted.")
+        if self.factor_ is None:
+            raise EstimationError("First-stage information matrix is unavailable.")
+        return self.factor_.quad_form(vector)
+
     def predict_y0(
         self,
         df: pd.DataFrame,
@@ -149,10 +765,16 @@ class FirstStageModel:
         id: str,
         time: str,
         controls: Optional[List[str]],
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
     ) -> NDArray[np.float64]:
         """
         Predict counterfactual untreated outcomes for all observations in ``df``.
 
+        When ``panel`` (the :class:`PanelIndex` of ``df``) is supplied, unit and time effects
+        are located through its integer codes rather than by hashing the raw columns. With
+        ``rows`` only those positions of ``df`` are predicted, in the given order.
+
         Raises
         ------
         EstimationError
@@ -172,8 +794,9 @@ class FirstStageModel:
         if self.coef_ is None:
             raise EstimationError("First-stage coefficients are unavailable.")
 
-        design = self._build_design_matrix(df, fit_mode=False)
-        return design @ self.coef_
+        if rows is None:
+            return self._predict_lookup(df, panel, None)
+        return self._predict_lookup(df.iloc[rows], panel, rows)
 
     # ------------------------------------------------------------------ #
     # Internal helpers
@@ -181,66 +804,546 @@ class FirstStageModel:
     def _design_column_names(self) -> List[str]:
         """Return ordered column names for diagnostics."""
 
+        if self.fe == "absorbing":
+            return list(self.controls_)
         cols = ["intercept"]
         cols.extend(self.controls_)
         cols.extend([f"id::{lvl}" for lvl in self.id_levels_])
         cols.extend([f"time::{lvl}" for lvl in self.time_levels_])
         return cols
 
-    def _build_design_matrix(self, frame: pd.DataFrame, fit_mode: bool) -> NDArray[np.float64]:
-        """Construct the two-way fixed-effects design matrix."""
+    def _fit_levels(
+        self,
+        untreated: pd.DataFrame,
+        col: str,
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+    ) -> pd.Index:
+        """Levels of ``col`` in order of first appearance in the untreated sample."""
+
+        panel_codes = self._panel_codes(col, panel)
+        if panel_codes is not None and rows is not None:
+            codes, levels = panel_codes
+            fit_levels: pd.Index = levels[pd.unique(codes[rows])]
+            return fit_levels
+        values = untreated[col]
+        if values.isna().any():
+            raise EstimationError(f"Fixed-effect column '{col}' contains missing values.")
+        fit_levels = pd.Index(pd.unique(values.to_numpy()))
+        return fit_levels
+
+    def _panel_codes(
+        self,
+        col: str,
+        panel: Optional[PanelIndex],
+    ) -> Optional[Tuple[NDArray[np.int32], pd.Index]]:
+        """Return the panel codes and levels backing ``col`` when the index covers it."""
+
+        if panel is None:
+            return None
+        if col == self.id_col_:
+            return panel.id_codes, panel.id_levels
+        if col == self.time_col_:
+            return panel.time_codes, panel.time_levels
+        return None
+
+    def _level_positions(
+        self,
+        frame: pd.DataFrame,
+        col: str,
+        levels: pd.Index,
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+    ) -> NDArray[np.intp]:
+        """
+        Map ``frame[col]`` to positions in the fitted ``levels``.
+
+        With a panel index the mapping is a gather through a level-sized lookup table;
+        otherwise the raw values are hashed once against ``levels``.
+
+        Raises
+        ------
+        EstimationError
+            If ``frame`` contains levels that were absent from the fit sample.
+        """
+
+        unseen_values: Any = []
+        panel_codes = self._panel_codes(col, panel)
+        if panel_codes is not None:
+            codes, panel_levels = panel_codes
+            lookup = levels.get_indexer(panel_levels)
+            row_codes = codes if rows is None else codes[rows]
+            positions = lookup[row_codes]
+            missing = positions < 0
+            if missing.any():
+                unseen_values = panel_levels[pd.unique(row_codes[missing])]
+        else:
+            values = frame[col].to_numpy()
+            positions = levels.get_indexer(pd.Index(values))
+            missing = positions < 0
+            if missing.any():
+                unseen_values = pd.unique(values[missing])
+
+        if len(unseen_values):
+            unseen = sorted(unseen_values.tolist())
+            if col == self.id_col_:
+                label = "unit ids"
+            elif col == self.time_col_:
+                label = "time indices"
+            else:
+                label = f"levels of '{col}'"
+            raise EstimationError(f"Encountered unseen {label} during prediction: {unseen}")
+        return positions.astype(np.intp, copy=False)
+
+    def _dummy_positions(
+        self,
+        frame: pd.DataFrame,
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+    ) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+        """Dummy-column offsets for unit and time (``-1`` marks the baseline level)."""
+
+        id_pos = self._level_positions(frame, str(self.id_col_), self.fe_levels_[0], panel, rows)
+        time_pos = self._level_positions(
+            frame, str(self.time_col_), self.fe_levels_[1], panel, rows,
+        )
+        return id_pos - 1, time_pos - 1
+
+    def _untreated_weights(
+        self,
+        frame: pd.DataFrame,
+        weight: Optional[str],
+    ) -> NDArray[np.float64]:
+        """First-stage weights for ``frame`` (``weight`` column, else unit weights)."""
+
+        if not weight:
+            return np.ones(len(frame), dtype=float)
+        weights = pd.to_numeric(frame[weight], errors="coerce").to_numpy(dtype=float)
+        if np.any(weights < 0):
+            raise EstimationError("Weights must be non-negative in the first stage.")
+        return weights
+
+    def _untreated_outcome(self, frame: pd.DataFrame, y: str) -> NDArray[np.float64]:
+        """Numeric outcome vector for untreated rows."""
+
+        y_vec = pd.to_numeric(frame[y], errors="coerce").to_numpy(dtype=float)
+        if np.isnan(y_vec).any():
+            raise EstimationError("Outcome contains non-numeric values in the untreated sample.")
+        return y_vec
+
+    def _cross_products(
+        self,
+        design: Any,
+        weights: NDArray[np.float64],
+        y_vec: NDArray[np.float64],
+    ) -> Tuple[Any, NDArray[np.float64]]:
+        """Return ``X'WX`` (CSC for the sparse solver) and ``X'Wy``."""
+
+        if self.solver == "sparse":
+            weighted = sp.diags(weights) @ design
+            return (design.T @ weighted).tocsc(), np.asarray(weighted.T @ y_vec, dtype=float)
+        weighted = design * weights[:, None]
+        return design.T @ weighted, np.asarray(weighted.T @ y_vec, dtype=float)
+
+    def _controls_block(self, frame: pd.DataFrame) -> NDArray[np.float64]:
+        """Return the numeric control matrix for ``frame``."""
+
+        controls_block = frame[self.controls_].apply(pd.to_numeric, errors="coerce")
+        if controls_block.isnull().any().any():
+            raise EstimationError("Controls must be numeric for first-stage estimation.")
+        return np.asarray(controls_block.to_numpy(dtype=float), dtype=float)
+
+    def _build_design_matrix(
+        self,
+        frame: pd.DataFrame,
+        id_pos: NDArray[np.intp],
+        time_pos: NDArray[np.intp],
+    ) -> Any:
+        """Construct the two-way fixed-effects design matrix from dummy-column offsets."""
+
+        if self.solver == "sparse":
+            return self._build_sparse_design(frame, id_pos, time_pos)
 
         n = len(frame)
         if n == 0:
             return np.empty((0, 0), dtype=float)
 
-        pieces: List[NDArray[np.float64]] = [np.ones((n, 1), dtype=float)]
+        n_dense = 1 + len(self.controls_)
+        n_cols = n_dense + self._n_dummies(0) + self._n_dummies(1)
+        if n_cols == 1:
+            raise EstimationError(
+                "Design matrix lacks regressors; check untreated sample variation.",
+            )
 
+        design = np.zeros((n, n_cols), dtype=float)
+        design[:, 0] = 1.0
         if self.controls_:
-            controls_block = frame[self.controls_].apply(pd.to_numeric, errors="coerce")
-            if controls_block.isnull().any().any():
-                raise EstimationError("Controls must be numeric for first-stage estimation.")
-            pieces.append(controls_block.to_numpy(dtype=float))
-
-        id_series = frame[self.id_col_].to_numpy()
-        time_series = frame[self.time_col_].to_numpy()
-
-        if not fit_mode:
-            valid_ids = set(self.id_levels_ + [self.id_baseline_])
-            unseen_ids = sorted(set(id_series.tolist()) - valid_ids)
-            if unseen_ids:
-                raise EstimationError(
-                    f"Encountered unseen unit ids during prediction: {unseen_ids}",
-                )
+            design[:, 1:n_dense] = self._controls_block(frame)
 
-            valid_times = set(self.time_levels_ + [self.time_baseline_])
-            unseen_times = sorted(set(time_series.tolist()) - valid_times)
-            if unseen_times:
-                raise EstimationError(
-                    f"Encountered unseen time indices during prediction: {unseen_times}",
-                )
+        id_rows = np.flatnonzero(id_pos >= 0)
+        design[id_rows, n_dense + id_pos[id_rows]] = 1.0
+        time_rows = np.flatnonzero(time_pos >= 0)
+        design[time_rows, n_dense + self._n_dummies(0) + time_pos[time_rows]] = 1.0
+        return design
 
-        if self.id_levels_:
-            id_dummies = [
-                (id_series == level).astype(float).reshape(-1, 1) for level in self.id_levels_
-            ]
-            pieces.append(np.hstack(id_dummies) if id_dummies else np.empty((n, 0)))
-        if self.time_levels_:
-            time_dummies = [
-                (time_series == level).astype(float).reshape(-1, 1) for level in self.time_levels_
-            ]
-            pieces.append(np.hstack(time_dummies) if time_dummies else np.empty((n, 0)))
+    def _build_sparse_design(
+        self,
+        frame: pd.DataFrame,
+        id_pos: NDArray[np.intp],
+        time_pos: NDArray[np.intp],
+    ) -> sp.csr_matrix:
+        """Construct the two-way fixed-effects design as a CSR matrix from level codes."""
 
-        if len(pieces) == 1:
+        n = len(frame)
+        n_dense = 1 + len(self.controls_)
+        n_cols = n_dense + self._n_dummies(0) + self._n_dummies(1)
+        if n == 0:
+            return sp.csr_matrix((0, n_cols), dtype=float)
+        if n_cols == n_dense:
             raise EstimationError(
                 "Design matrix lacks regressors; check untreated sample variation.",
             )
 
-        return np.hstack(pieces)
+        dense = np.ones((n, n_dense), dtype=float)
+        if self.controls_:
+            dense[:, 1:] = self._controls_block(frame)
+
+        # Baseline levels map to -1 and therefore contribute no dummy entry.
+        row_ids = np.arange(n)
+        id_rows = row_ids[id_pos >= 0]
+        time_rows = row_ids[time_pos >= 0]
 
-    def design_matrix(self, frame: pd.DataFrame) -> NDArray[np.float64]:
-        """Public helper to obtain the design matrix for ``frame``."""
+        rows = np.concatenate([np.repeat(row_ids, n_dense), id_rows, time_rows])
+        cols = np.concatenate(
+            [
+                np.tile(np.arange(n_dense), n),
+                n_dense + id_pos[id_rows],
+                n_dense + self._n_dummies(0) + time_pos[time_rows],
+            ],
+        )
+        data = np.concatenate([dense.ravel(), np.ones(len(id_rows) + len(time_rows))])
+        return sp.csr_matrix((data, (rows, cols)), shape=(n, n_cols))
+
+    def design_matrix(
+        self,
+        frame: pd.DataFrame,
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
+    ) -> Any:
+        """
+        Public helper to obtain the design matrix for ``frame`` (CSR for the sparse solver).
+
+        ``panel`` and ``rows`` optionally identify ``frame`` as rows ``rows`` of the panel
+        described by ``panel`` so that levels are resolved from integer codes.
+        """
+
+        if not self.fitted_:
+            raise EstimationError("First-stage model is not fitted.")
+        if self.fe == "absorbing":
+            raise EstimationError("Absorbed fixed effects do not form an explicit design matrix.")
+        id_pos, time_pos = self._dummy_positions(frame, panel, rows)
+        return self._build_design_matrix(frame, id_pos, time_pos)
+
+    def design_sums(
+        self,
+        frame: pd.DataFrame,
+        groups: NDArray[np.intp],
+        n_groups: int,
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
+        weights: Optional[NDArray[np.float64]] = None,
+    ) -> NDArray[np.float64]:
+        """
+        Column sums of the design matrix of ``frame`` within each row group.
+
+        Returns the dense ``n_groups x p`` array ``G' diag(weights) X`` where ``G`` is the
+        indicator matrix of ``groups`` (unit weights when ``weights`` is None). The sums are
+        assembled from level codes and control sums, so the ``len(frame) x p`` design is
+        never formed. Absorbing fits use the column layout of ``absorbed_information_``: the
+        controls, then every level of each fixed-effect dimension.
+        """
+
+        if not self.fitted_:
+            raise EstimationError("First-stage model is not fitted.")
+        row_weights = np.ones(len(frame)) if weights is None else np.asarray(weights, dtype=float)
+        if self.fe == "absorbing":
+            n_dense = len(self.controls_)
+            blocks = []
+            offset = n_dense
+            for col, levels in zip(self.fe_columns_, self.fe_levels_):
+                blocks.append((offset, self._level_positions(frame, col, levels, panel, rows)))
+                offset += len(levels)
+            n_cols = offset
+        else:
+            id_pos, time_pos = self._dummy_positions(frame, panel, rows)
+            n_dense = 1 + len(self.controls_)
+            n_id = self._n_dummies(0)
+            n_cols = n_dense + n_id + self._n_dummies(1)
+            blocks = [(n_dense, id_pos), (n_dense + n_id, time_pos)]
+
+        flat = np.zeros(n_groups * n_cols, dtype=float)
+        for offset, pos in blocks:
+            keep = pos >= 0
+            flat += np.bincount(
+                groups[keep] * n_cols + offset + pos[keep],
+                weights=row_weights[keep],
+                minlength=n_groups * n_cols,
+            )
+        out = flat.reshape(n_groups, n_cols)
+        if self.fe != "absorbing":
+            out[:, 0] = np.bincount(groups, weights=row_weights, minlength=n_groups)
+        if self.controls_:
+            first = n_dense - len(self.controls_)
+            step = max(int(self.chunk_size), 1)
+            for start in range(0, len(frame), step):
+                block = self._controls_block(frame.iloc[start:start + step])
+                block = block * row_weights[start:start + step, None]
+                codes = groups[start:start + step]
+                for j in range(block.shape[1]):
+                    out[:, first + j] += np.bincount(
+                        codes, weights=block[:, j], minlength=n_groups,
+                    )
+        return out
+
+    def design_product(
+        self,
+        frame: pd.DataFrame,
+        matrix: NDArray[np.float64],
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
+    ) -> NDArray[np.float64]:
+        """
+        Return ``design_matrix(frame) @ matrix`` for a dense ``p x m`` matrix, without the design.
+
+        Rows of ``matrix`` for the unit and time dummies are gathered by level code, exactly as
+        :meth:`predict_y0` gathers ``fe_values_``; controls are applied in ``chunk_size``-row
+        blocks.
+        """
+
+        if not self.fitted_:
+            raise EstimationError("First-stage model is not fitted.")
+        if self.fe == "absorbing":
+            raise EstimationError("Absorbed fixed effects do not form an explicit design matrix.")
+        block_matrix = np.asarray(matrix, dtype=float)
+        id_pos, time_pos = self._dummy_positions(frame, panel, rows)
+        n_dense = 1 + len(self.controls_)
+        n_id = self._n_dummies(0)
+
+        out = np.repeat(block_matrix[:1], len(frame), axis=0)
+        for offset, pos in ((n_dense, id_pos), (n_dense + n_id, time_pos)):
+            keep = np.flatnonzero(pos >= 0)
+            out[keep] += block_matrix[offset + pos[keep]]
+        if self.controls_:
+            slopes = block_matrix[1:n_dense]
+            step = max(int(self.chunk_size), 1)
+            for start in range(0, len(frame), step):
+                block = self._controls_block(frame.iloc[start:start + step])
+                out[start:start + step] += block @ slopes
+        return out
+
+    def design_transpose_product(
+        self,
+        frame: pd.DataFrame,
+        matrix: Any,
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
+    ) -> NDArray[np.float64]:
+        """
+        Return ``design_matrix(frame).T @ matrix`` for an ``n x m`` matrix without the design.
+
+        The transpose of :meth:`design_product`: dummy rows are scattered by level code through
+        a sparse indicator and controls are applied in ``chunk_size``-row blocks. ``matrix``
+        may be dense or a scipy sparse matrix; the result is dense.
+        """
 
         if not self.fitted_:
             raise EstimationError("First-stage model is not fitted.")
-        return self._build_design_matrix(frame, fit_mode=False)
+        if self.fe == "absorbing":
+            raise EstimationError("Absorbed fixed effects do not form an explicit design matrix.")
+        block_matrix = sp.csr_matrix(matrix, dtype=float) if sp.issparse(matrix) else np.asarray(
+            matrix, dtype=float,
+        )
+
+        def dense(product: Any) -> NDArray[np.float64]:
+            return np.asarray(product.toarray() if sp.issparse(product) else product, dtype=float)
+
+        id_pos, time_pos = self._dummy_positions(frame, panel, rows)
+        n_dense = 1 + len(self.controls_)
+        n_id = self._n_dummies(0)
+        n_time = self._n_dummies(1)
+
+        out = np.zeros((n_dense + n_id + n_time, block_matrix.shape[1]), dtype=float)
+        out[0] = np.asarray(block_matrix.sum(axis=0), dtype=float).ravel()
+        for offset, pos, width in ((n_dense, id_pos, n_id), (n_dense + n_id, time_pos, n_time)):
+            keep = np.flatnonzero(pos >= 0)
+            indicator = sp.csr_matrix(
+                (np.ones(len(keep)), (pos[keep], keep)), shape=(width, len(frame)),
+            )
+            out[offset:offset + width] = dense(indicator @ block_matrix)
+        if self.controls_:
+            step = max(int(self.chunk_size), 1)
+            for start in range(0, len(frame), step):
+                block = self._controls_block(frame.iloc[start:start + step])
+                out[1:n_dense] += dense(block.T @ block_matrix[start:start + step])
+        return out
+
+    def leverage(
+        self,
+        frame: pd.DataFrame,
+        weight: Optional[str] = None,
+        panel: Optional[PanelIndex] = None,
+        rows: Optional[NDArray[np.intp]] = None,
+        method: str = "auto",
+        n_probes: int = 64,
+        random_state: Optional[int] = None,
+    ) -> NDArray[np.float64]:
+        """
+        Leverages ``h_i = w_i x_i' (X'WX)^{-1} x_i`` for the rows of ``frame``.
+
+        For the untreated sample these are the diagonal entries of the weighted hat matrix
+        (they sum to the number of design columns); other rows get the same quadratic form.
+        The ``n x n`` hat matrix and the ``n x p`` design are never formed.
+
+        ``method="exact"`` uses the two-way structure of ``X'WX``: the dummies of the fixed
+        effect with more levels form a diagonal block ``D``, so with ``C`` the cross block and
+        ``S = E - C' D^{-1} C`` the Schur complement of the remaining ``r`` columns (intercept,
+        controls, other fixed effect), every needed entry of the inverse follows from one
+        ``r x r`` factorization. Rows are then processed in ``chunk_size`` blocks, so memory is
+        ``O(chunk_size * r + r^2)`` and time ``O(n r)``. ``method="randomized"`` estimates the
+        diagonal by Hutchinson probing, ``h ~ mean_j z_j * (H z_j)`` with Rademacher ``z_j``,
+        using the cached ``factor_`` for the ``n_probes`` solves and regenerating each chunk's
+        probes from a seeded stream instead of storing them. ``"auto"`` is exact unless ``r``
+        exceeds ``2048``.
+
+        Raises
+        ------
+        EstimationError
+            If the model is not a fitted two-way model.
+        ValueError
+            If ``method`` is unknown.
+        """
+
+        if not self.fitted_:
+            raise EstimationError("First-stage model is not fitted.")
+        if self.fe == "absorbing" or self.xtwx_ is None or self.factor_ is None:
+            raise EstimationError("Leverage requires a fitted fe='twoway' first stage.")
+        if method not in {"auto", "exact", "randomized"}:
+            raise ValueError(f"Unsupported leverage method: {method!r}")
+
+        n_dense = 1 + len(self.controls_)
+        small_dim = int(self._n_dummies(1) > self._n_dummies(0))
+        if method == "auto":
+            rest_dim = n_dense + self._n_dummies(small_dim)
+            method = "exact" if rest_dim <= _EXACT_LEVERAGE_DIM else "randomized"
+        weights = self._untreated_weights(frame, weight)
+        if method == "exact":
+            return weights * self._leverage_exact(frame, panel, rows, small_dim)
+        return self._leverage_randomized(frame, weights, panel, rows, n_probes, random_state)
+
+    def _leverage_exact(
+        self,
+        frame: pd.DataFrame,
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+        small_dim: int,
+    ) -> NDArray[np.float64]:
+        """Unweighted ``x_i' (X'WX)^{-1} x_i`` by block elimination of the larger fixed effect."""
+
+        n_dense = 1 + len(self.controls_)
+        n_id = self._n_dummies(0)
+        offsets = (n_dense, n_dense + n_id)
+        big_dim = 1 - small_dim
+        big_cols = offsets[big_dim] + np.arange(self._n_dummies(big_dim))
+        rest_cols = np.concatenate(
+            [np.arange(n_dense), offsets[small_dim] + np.arange(self._n_dummies(small_dim))],
+        )
+        xtwx = sp.csc_matrix(self.xtwx_)
+        diag = np.asarray(xtwx[big_cols][:, big_cols].diagonal(), dtype=float)
+        cross = sp.csr_matrix(xtwx[big_cols][:, rest_cols])
+        schur = xtwx[rest_cols][:, rest_cols].toarray()
+        schur -= (cross.T @ sp.diags(1.0 / diag) @ cross).toarray()
+        rest_inv = InformationFactor(schur).inverse()
+
+        # C_b' S^{-1} C_b for every level of the larger dimension, in blocks of levels.
+        step = max(int(self.chunk_size), 1)
+        level_quad = np.empty(len(big_cols), dtype=float)
+        for start in range(0, len(big_cols), step):
+            block = cross[start:start + step].toarray()
+            level_quad[start:start + step] = np.einsum("ij,jk,ik->i", block, rest_inv, block)
+
+        positions = self._dummy_positions(frame, panel, rows)
+        big_pos, small_pos = positions[big_dim], positions[small_dim]
+        out = np.empty(len(frame), dtype=float)
+        for start in range(0, len(frame), step):
+            stop = min(start + step, len(frame))
+            dense = np.ones((stop - start, n_dense), dtype=float)
+            if self.controls_:
+                dense[:, 1:] = self._controls_block(frame.iloc[start:stop])
+            # v_i = S^{-1} x_i over the non-eliminated columns.
+            solved = dense @ rest_inv[:n_dense]
+            other = small_pos[start:stop]
+            has_other = np.flatnonzero(other >= 0)
+            solved[has_other] += rest_inv[n_dense + other[has_other]]
+            quad = np.einsum("ij,ij->i", dense, solved[:, :n_dense])
+            quad[has_other] += solved[has_other, n_dense + other[has_other]]
+
+            level = big_pos[start:stop]
+            has_level = np.flatnonzero(level >= 0)
+            lv = level[has_level]
+            coupling = np.asarray(
+                cross[lv].multiply(solved[has_level]).sum(axis=1), dtype=float,
+            ).ravel()
+            quad[has_level] += (
+                1.0 / diag[lv] + level_quad[lv] / diag[lv] ** 2 - 2.0 * coupling / diag[lv]
+            )
+            out[start:stop] = quad
+        return out
+
+    def _leverage_randomized(
+        self,
+        frame: pd.DataFrame,
+        weights: NDArray[np.float64],
+        panel: Optional[PanelIndex],
+        rows: Optional[NDArray[np.intp]],
+        n_probes: int,
+        random_state: Optional[int],
+    ) -> NDArray[np.float64]:
+        """Hutchinson estimate of the weighted hat-matrix diagonal over ``frame``."""
+
+        if n_probes < 1:
+            raise ValueError("n_probes must be a positive integer.")
+        factor = self.factor_
+        if factor is None:
+            raise EstimationError("First-stage information matrix is unavailable.")
+        step = max(int(self.chunk_size), 1)
+        starts = range(0, len(frame), step)
+        seeds = np.random.SeedSequence(random_state).spawn(len(starts))
+        root_w = np.sqrt(weights)
+
+        def probes(index: int, size: int) -> NDArray[np.float64]:
+            rng = np.random.default_rng(seeds[index])
+            return rng.choice(np.array([-1.0, 1.0]), size=(size, n_probes))
+
+        def chunk_rows(start: int) -> Optional[NDArray[np.intp]]:
+            return None if rows is None else rows[start:start + step]
+
+        # Pass 1: X' W^{1/2} Z accumulated over chunks.
+        projected: NDArray[np.float64] = np.zeros((factor.dim, n_probes), dtype=np.float64)
+        for index, start in enumerate(starts):
+            chunk = frame.iloc[start:start + step]
+            z = probes(index, len(chunk)) * root_w[start:start + step, None]
+            projected += self.design_transpose_product(
+                chunk, z, panel=panel, rows=chunk_rows(start),
+            )
+        solved = factor.solve(projected)
+
+        # Pass 2: regenerate the same probes and average z * (W^{1/2} X A^{-1} X' W^{1/2} z).
+        out = np.empty(len(frame), dtype=float)
+        for index, start in enumerate(starts):
+            chunk = frame.iloc[start:start + step]
+            z = probes(index, len(chunk))
+            fitted = self.design_product(chunk, solved, panel=panel, rows=chunk_rows(start))
+            out[start:start + step] = (
+                root_w[start:start + step] * np.mean(z * fitted, axis=1)
+            )
+        return out
@@ -0,0 +1,246 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+import numpy as np
+import scipy.sparse as sp
+from numpy.typing import NDArray
+from scipy.linalg import cho_factor, cho_solve, solve_triangular
+from scipy.sparse.linalg import splu
+
+from .errors import EstimationError
+
+
+def _sparse_lu(scaled: sp.csc_matrix) -> Any:
+    """
+    SuperLU factor of an equilibrated symmetric matrix with diagonal pivots.
+
+    The fill-reducing ordering is COLAMD applied symmetrically: on two-way information
+    matrices it gives the same fill as minimum degree on ``A + A'`` at a cost linear in the
+    number of units, where minimum degree grows roughly quadratically.
+    """
+
+    return splu(
+        scaled,
+        permc_spec="COLAMD",
+        diag_pivot_thresh=0.0,
+        options={"SymmetricMode": True},
+    )
+
+
+class InformationFactor:
+    """
+    Cached factorization of a symmetric positive-definite information matrix ``X'WX``.
+
+    The matrix is Jacobi-equilibrated (``D A D`` with ``D = diag(A)^{-1/2}``) before being
+    factored, so the pivots measure how much of each column is left after projecting on the
+    preceding ones and the rank check is invariant to the scale of the regressors. Dense
+    matrices use a lower Cholesky factor; sparse matrices use a SuperLU factorization with
+    diagonal pivoting.
+
+    Parameters
+    ----------
+    matrix : np.ndarray | scipy.sparse.spmatrix
+        Symmetric positive-definite ``p x p`` matrix.
+    rtol : float | None
+        Smallest admissible equilibrated pivot; defaults to ``p * eps``.
+
+    Raises
+    ------
+    EstimationError
+        If the matrix is singular or numerically rank deficient.
+    """
+
+    def __init__(self, matrix: Any, rtol: Optional[float] = None) -> None:
+        self.sparse = sp.issparse(matrix)
+        diag = np.asarray(matrix.diagonal(), dtype=float)
+        self.dim = int(diag.shape[0])
+        if np.any(diag <= 0.0) or not np.all(np.isfinite(diag)):
+            raise EstimationError("First-stage design matrix is rank deficient.")
+        self.scale: NDArray[np.float64] = 1.0 / np.sqrt(diag)
+        threshold = self.dim * np.finfo(float).eps if rtol is None else rtol
+
+        if self.sparse:
+            scaling = sp.diags(self.scale)
+            scaled = (scaling @ sp.csc_matrix(matrix) @ scaling).tocsc()
+            try:
+                self._lu = _sparse_lu(scaled)
+            except RuntimeError as exc:
+                raise EstimationError("First-stage design matrix is rank deficient.") from exc
+            pivots = np.asarray(self._lu.U.diagonal(), dtype=float)
+        else:
+            scaled_dense = np.asarray(matrix, dtype=float) * np.outer(self.scale, self.scale)
+            try:
+                self._chol = cho_factor(scaled_dense, lower=True, check_finite=True)
+            except np.linalg.LinAlgError as exc:
+                raise EstimationError("First-stage design matrix is rank deficient.") from exc
+            pivots = np.diag(self._chol[0]) ** 2
+
+        if pivots.size and (not np.all(np.isfinite(pivots)) or pivots.min() <= threshold):
+            raise EstimationError("First-stage design matrix is rank deficient.")
+
+    def __getstate__(self) -> Dict[str, Any]:
+        """
+        Pickle state; SuperLU objects cannot be pickled, so a sparse factor is stored as the
+        equilibrated matrix ``Pr' L U Pc'`` it factors and refactored on load.
+        """
+
+        state = self.__dict__.copy()
+        if self.sparse:
+            lu = state.pop("_lu")
+            ones, order = np.ones(self.dim), np.arange(self.dim)
+            row_perm = sp.csc_matrix((ones, (lu.perm_r, order)), shape=(self.dim, self.dim))
+            col_perm = sp.csc_matrix((ones, (order, lu.perm_c)), shape=(self.dim, self.dim))
+            state["_scaled"] = (row_perm.T @ lu.L @ lu.U @ col_perm.T).tocsc()
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        scaled = state.pop("_scaled", None)
+        self.__dict__.update(state)
+        if scaled is not None:
+            self._lu = _sparse_lu(scaled)
+
+    def solve(self, rhs: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Return ``A^{-1} rhs`` for a vector or a ``p x K`` block of right-hand sides."""
+
+        arr = np.asarray(rhs, dtype=float)
+        scaled = arr * (self.scale if arr.ndim == 1 else self.scale[:, None])
+        if self.sparse:
+            out = np.asarray(self._lu.solve(scaled), dtype=float)
+        else:
+            out = np.asarray(cho_solve(self._chol, scaled), dtype=float)
+        return out * (self.scale if arr.ndim == 1 else self.scale[:, None])
+
+    def quad_form(self, vector: NDArray[np.float64]) -> float:
+        """Return ``v' A^{-1} v`` for a single vector."""
+
+        return float(self.quad_forms(np.asarray(vector, dtype=float).reshape(-1, 1))[0])
+
+    def quad_forms(self, block: NDArray[np.float64]) -> NDArray[np.float64]:
+        """
+        Return ``diag(V' A^{-1} V)`` for a ``p x K`` block using one batched solve.
+
+        The dense path performs a single triangular solve ``L^{-1} D V`` and sums squares
+        column-wise; the sparse path reuses the LU factors for all ``K`` columns at once.
+        """
+
+        arr = np.asarray(block, dtype=float)
+        if arr.ndim == 1:
+            arr = arr.reshape(-1, 1)
+        if arr.shape[1] == 0:
+            return np.zeros(0, dtype=float)
+        scaled = arr * self.scale[:, None]
+        if self.sparse:
+            solved = np.asarray(self._lu.solve(scaled), dtype=float)
+            return np.asarray(np.sum(scaled * solved, axis=0), dtype=float)
+        half = solve_triangular(self._chol[0], scaled, lower=True, check_finite=False)
+        return np.asarray(np.sum(half * half, axis=0), dtype=float)
+
+    def cross(self, block: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Return the full ``K x K`` matrix ``V' A^{-1} V`` for a ``p x K`` block."""
+
+        arr = np.asarray(block, dtype=float)
+        if arr.ndim == 1:
+            arr = arr.reshape(-1, 1)
+        scaled = arr * self.scale[:, None]
+        if self.sparse:
+            return np.asarray(scaled.T @ np.asarray(self._lu.solve(scaled)), dtype=float)
+        half = solve_triangular(self._chol[0], scaled, lower=True, check_finite=False)
+        return np.asarray(half.T @ half, dtype=float)
+
+    def inverse(self) -> NDArray[np.float64]:
+        """Materialize ``A^{-1}`` (diagnostics only; costs ``O(p^2)`` memory)."""
+
+        return self.solve(np.eye(self.dim))
+
+
+class IterativeInformation:
+    """
+    Conjugate-gradient solves against a sparse positive semi-definite information matrix.
+
+    Used for absorbed fixed effects, whose design keeps an indicator for every level of every
+    dimension, so ``X'WX`` is singular (one redundant level per extra dimension, more when
+    dimensions nest). Right-hand sides built from design rows whose levels were all seen in
+    the fit lie in its range; Jacobi-preconditioned CG then converges to a solution and
+    ``v' A^- v`` does not depend on which generalized inverse is reached. All columns of a
+    block are iterated together.
+
+    Parameters
+    ----------
+    matrix : scipy.sparse.spmatrix
+        Symmetric positive semi-definite ``p x p`` matrix.
+    rtol : float
+        Residual norm, relative to the right-hand side, at which a column has converged.
+    maxiter : int | None
+        Iteration limit; defaults to ``10 * p``.
+    """
+
+    def __init__(self, matrix: Any, rtol: float = 1e-10, maxiter: Optional[int] = None) -> None:
+        self.matrix = sp.csr_matrix(matrix, dtype=float)
+        diag = np.asarray(self.matrix.diagonal(), dtype=float)
+        self.dim = int(diag.shape[0])
+        self.precondition: NDArray[np.float64] = np.divide(
+            1.0, diag, out=np.zeros_like(diag), where=diag > 0,
+        )
+        self.rtol = float(rtol)
+        self.maxiter = 10 * max(self.dim, 1) if maxiter is None else int(maxiter)
+
+    def solve(self, rhs: NDArray[np.float64]) -> NDArray[np.float64]:
+        """
+        Return a solution of ``A x = rhs`` for a vector or a ``p x K`` block.
+
+        Raises
+        ------
+        EstimationError
+            If some column has not converged within ``maxiter`` iterations.
+        """
+
+        arr = np.asarray(rhs, dtype=float)
+        block = arr.reshape(-1, 1) if arr.ndim == 1 else arr
+        solution = np.zeros_like(block)
+        residual = block.copy()
+        target = self.rtol * np.linalg.norm(block, axis=0)
+        preconditioned = residual * self.precondition[:, None]
+        direction = preconditioned.copy()
+        rz = np.sum(residual * preconditioned, axis=0)
+        for _ in range(self.maxiter):
+            if np.all(np.linalg.norm(residual, axis=0) <= target):
+                break
+            product = np.asarray(self.matrix @ direction, dtype=float)
+            curvature = np.sum(direction * product, axis=0)
+            step = np.divide(rz, curvature, out=np.zeros_like(rz), where=curvature > 0)
+            solution += step * direction
+            residual -= step * product
+            preconditioned = residual * self.precondition[:, None]
+            rz_next = np.sum(residual * preconditioned, axis=0)
+            ratio = np.divide(rz_next, rz, out=np.zeros_like(rz), where=rz > 0)
+            direction = preconditioned + ratio * direction
+            rz = rz_next
+        else:
+            if not np.all(np.linalg.norm(residual, axis=0) <= target):
+                raise EstimationError(
+                    f"Conjugate gradients did not converge within {self.maxiter} iterations.",
+                )
+        return solution.ravel() if arr.ndim == 1 else solution
+
+    def quad_form(self, vector: NDArray[np.float64]) -> float:
+        """Return ``v' A^- v`` for a single vector."""
+
+        return float(self.quad_forms(np.asarray(vector, dtype=float).reshape(-1, 1))[0])
+
+    def quad_forms(self, block: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Return ``diag(V' A^- V)`` for a ``p x K`` block."""
+
+        arr = np.asarray(block, dtype=float)
+        if arr.ndim == 1:
+            arr = arr.reshape(-1, 1)
+        return np.asarray(np.sum(arr * self.solve(arr), axis=0), dtype=float)
+
+    def cross(self, block: NDArray[np.float64]) -> NDArray[np.float64]:
+        """Return the full ``K x K`` matrix ``V' A^- V`` for a ``p x K`` block."""
+
+        arr = np.asarray(block, dtype=float)
+        if arr.ndim == 1:
+            arr = arr.reshape(-1, 1)
+        product = arr.T @ self.solve(arr)
+        return np.asarray(0.5 * (product + product.T), dtype=float)
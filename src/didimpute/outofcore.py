@@ -0,0 +1,764 @@
+from __future__ import annotations
+
+import os
+import tempfile
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from numpy.typing import NDArray
+
+from .errors import EstimationError, ValidationError
+from .first_stage import FirstStageModel
+from .panel import cluster_columns
+from .se import (
+    _nobs_se,
+    _pretrend_curve_from_sums,
+    finalize_summary_ci,
+    pretrend_from_curve,
+)
+from .validation import prepare_rows
+
+if TYPE_CHECKING:  # pragma: no cover - import cycle guard
+    from .api import DidImputation
+
+ChunkSource = Union[
+    str,
+    "os.PathLike[str]",
+    pd.DataFrame,
+    Callable[[], Iterable[pd.DataFrame]],
+    Iterable[pd.DataFrame],
+]
+
+
+class _ChunkReplay:
+    """
+    Re-iterable view of a chunk source.
+
+    CSV paths are re-read with ``pd.read_csv(chunksize=...)``, data frames are sliced, and
+    callables are invoked once per pass. One-shot iterators are spooled to a temporary
+    directory (projected to the needed columns) during the first pass and replayed from disk.
+    """
+
+    def __init__(self, source: ChunkSource, columns: List[str], chunksize: int) -> None:
+        self.source = source
+        self.columns = columns
+        self.chunksize = max(int(chunksize), 1)
+        self._spool: Optional[tempfile.TemporaryDirectory[str]] = None
+        self._spooled: List[str] = []
+        self._passes = 0
+
+    def __iter__(self) -> Iterator[pd.DataFrame]:
+        self._passes += 1
+        source = self.source
+        if isinstance(source, (str, os.PathLike)):
+            header = pd.read_csv(source, nrows=0).columns
+            _check_columns(header, self.columns)
+            reader = pd.read_csv(source, chunksize=self.chunksize, usecols=self.columns)
+            for chunk in reader:
+                yield chunk
+        elif isinstance(source, pd.DataFrame):
+            for start in range(0, len(source), self.chunksize):
+                yield self._project(source.iloc[start:start + self.chunksize])
+        elif callable(source):
+            for chunk in source():
+                yield self._project(chunk)
+        elif iter(source) is source:
+            yield from self._replay_iterator(source)
+        else:
+            for chunk in source:
+                yield self._project(chunk)
+
+    def _project(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        _check_columns(chunk.columns, self.columns)
+        projected: pd.DataFrame = chunk[self.columns]
+        return projected
+
+    def _replay_iterator(self, source: Iterable[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """Spool a one-shot iterator to disk on the first pass and read it back afterwards."""
+
+        if self._passes > 1:
+            for path in self._spooled:
+                yield pd.read_pickle(path)
+            return
+        self._spool = tempfile.TemporaryDirectory(prefix="didimpute-")
+        for position, chunk in enumerate(source):
+            projected = self._project(chunk)
+            path = os.path.join(self._spool.name, f"chunk-{position:06d}.pkl")
+            projected.to_pickle(path)
+            self._spooled.append(path)
+            yield projected
+
+    def close(self) -> None:
+        """Remove any spooled chunks."""
+
+        if self._spool is not None:
+            self._spool.cleanup()
+            self._spool = None
+            self._spooled = []
+
+
+def _check_columns(available: Iterable[Any], columns: List[str]) -> None:
+    """Raise ValidationError with the in-memory messages when a chunk lacks columns."""
+
+    present = set(available)
+    missing = [col for col in columns if col not in present]
+    if missing:
+        raise ValidationError(
+            f"Missing required columns: {missing}. Provide these via --y/--id/--time/--Ei.",
+        )
+
+
+class _LevelCodes:
+    """Append-only mapping from raw values to integer codes in order of first appearance."""
+
+    def __init__(self) -> None:
+        self.levels: pd.Index = pd.Index([])
+
+    def __len__(self) -> int:
+        return len(self.levels)
+
+    def encode(self, values: NDArray[Any], grow: bool = True) -> NDArray[np.intp]:
+        """Return codes for ``values``; unseen values are appended (or coded ``-1``)."""
+
+        index = pd.Index(values)
+        codes = np.asarray(self.levels.get_indexer(index), dtype=np.intp)
+        missing = codes < 0
+        if grow and missing.any():
+            new_levels = pd.Index(pd.unique(values[missing]))
+            self.levels = new_levels if len(self.levels) == 0 else self.levels.append(new_levels)
+            codes[missing] = self.levels.get_indexer(index[missing])
+        return codes
+
+
+def _grow(arr: NDArray[Any], size: int, axis: int = 0) -> NDArray[Any]:
+    """Zero-pad ``arr`` along ``axis`` to at least ``size`` (doubling the capacity)."""
+
+    if arr.shape[axis] >= size:
+        return arr
+    shape = list(arr.shape)
+    shape[axis] = max(size, 2 * arr.shape[axis])
+    out = np.zeros(shape, dtype=arr.dtype)
+    out[tuple(slice(0, extent) for extent in arr.shape)] = arr
+    return out
+
+
+@dataclass
+class _Chunk:
+    """One coerced chunk with the helper arrays the passes need."""
+
+    frame: pd.DataFrame
+    unit: NDArray[np.intp]
+    period: NDArray[np.intp]
+    time: NDArray[np.int64]
+    adoption: NDArray[np.float64]
+    finite: NDArray[np.bool_]
+    treated: NDArray[np.bool_]
+    weights: NDArray[np.float64]
+
+
+@dataclass
+class _Accumulator:
+    """Level dictionaries and running sums; every array is sized by levels, not rows."""
+
+    n_dense: int
+    units: _LevelCodes = field(default_factory=_LevelCodes)
+    periods: _LevelCodes = field(default_factory=_LevelCodes)
+    cohorts: _LevelCodes = field(default_factory=_LevelCodes)
+    n_rows: int = 0
+    n_untreated: int = 0
+    n_positive: int = 0
+    n_chunks: int = 0
+    dense_xtwx: NDArray[np.float64] = field(default_factory=lambda: np.zeros((0, 0)))
+    dense_xtwy: NDArray[np.float64] = field(default_factory=lambda: np.zeros(0))
+    ywy: float = 0.0
+    unit_dw: NDArray[np.float64] = field(default_factory=lambda: np.zeros((0, 0)))
+    unit_wy: NDArray[np.float64] = field(default_factory=lambda: np.zeros(0))
+    period_dw: NDArray[np.float64] = field(default_factory=lambda: np.zeros((0, 0)))
+    period_wy: NDArray[np.float64] = field(default_factory=lambda: np.zeros(0))
+    cross: NDArray[np.float64] = field(default_factory=lambda: np.zeros((0, 0)))
+    seen: NDArray[np.bool_] = field(default_factory=lambda: np.zeros((0, 0), dtype=bool))
+    unit_rows: NDArray[np.int64] = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    unit_pre: NDArray[np.int64] = field(default_factory=lambda: np.zeros(0, dtype=np.int64))
+    unit_adopts: NDArray[np.bool_] = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    fit_units: List[NDArray[np.intp]] = field(default_factory=list)
+    fit_periods: List[NDArray[np.intp]] = field(default_factory=list)
+    unit_in_fit: NDArray[np.bool_] = field(default_factory=lambda: np.zeros(0, dtype=bool))
+    period_in_fit: NDArray[np.bool_] = field(default_factory=lambda: np.zeros(0, dtype=bool))
+
+    def __post_init__(self) -> None:
+        self.dense_xtwx = np.zeros((self.n_dense, self.n_dense), dtype=float)
+        self.dense_xtwy = np.zeros(self.n_dense, dtype=float)
+        self.unit_dw = np.zeros((0, self.n_dense), dtype=float)
+        self.period_dw = np.zeros((0, self.n_dense), dtype=float)
+
+
+def _coerce_chunk(
+    chunk: pd.DataFrame,
+    config: "DidImputation",
+    acc: _Accumulator,
+    grow: bool,
+) -> _Chunk:
+    """Apply the ``validate_and_prepare`` row checks to one chunk and encode its levels."""
+
+    frame = prepare_rows(
+        chunk,
+        y=config.y,
+        id=config.id,
+        time=config.time,
+        Ei=config.Ei,
+        controls=config.controls,
+        weight=config.weight,
+        cluster=config.cluster,
+        absorb=config.absorb,
+    )
+    adoption = frame[config.Ei].to_numpy(dtype=float)
+    finite = np.isfinite(adoption)
+    time = frame[config.time].to_numpy(dtype=np.int64)
+    treated = finite & (time >= np.where(finite, adoption, np.inf))
+
+    if config.weight:
+        weights = pd.to_numeric(frame[config.weight], errors="coerce").to_numpy(dtype=float)
+    else:
+        weights = np.ones(len(frame), dtype=float)
+
+    unit = acc.units.encode(frame[config.id].to_numpy(), grow=grow)
+    period = acc.periods.encode(time, grow=grow)
+    if not grow and (np.any(unit < 0) or np.any(period < 0)):
+        raise EstimationError("Chunk source yielded different rows on the second pass.")
+    return _Chunk(frame, unit, period, time, adoption, finite, treated, weights)
+
+
+def _accumulate_levels(acc: _Accumulator, chunk: _Chunk, id: str, time: str) -> None:
+    """Update panel bookkeeping (row counts, duplicates, pre-periods) for one chunk."""
+
+    n_units, n_periods = len(acc.units), len(acc.periods)
+    acc.unit_rows = _grow(acc.unit_rows, n_units)
+    acc.unit_pre = _grow(acc.unit_pre, n_units)
+    acc.unit_adopts = _grow(acc.unit_adopts, n_units)
+    acc.seen = _grow(_grow(acc.seen, n_units, axis=0), n_periods, axis=1)
+
+    key = chunk.unit.astype(np.int64) * max(n_periods, 1) + chunk.period
+    duplicate = acc.seen[chunk.unit, chunk.period] | pd.Index(key).duplicated()
+    if duplicate.any():
+        sample = chunk.frame.iloc[np.flatnonzero(duplicate)[:5]][[id, time]]
+        raise ValidationError(
+            "Duplicate (id, time) rows detected (first five shown): "
+            f"{sample.to_dict('records')}. Deduplicate or aggregate prior to estimation.",
+        )
+    acc.seen[chunk.unit, chunk.period] = True
+
+    acc.unit_rows[:n_units] += np.bincount(chunk.unit, minlength=n_units)
+    pre = chunk.finite & ~chunk.treated
+    acc.unit_pre[:n_units] += np.bincount(chunk.unit[pre], minlength=n_units)
+    acc.unit_adopts[np.unique(chunk.unit[chunk.finite])] = True
+    if chunk.finite.any():
+        acc.cohorts.encode(chunk.adoption[chunk.finite].astype(int))
+    acc.n_rows += len(chunk.frame)
+    acc.n_chunks += 1
+
+
+def _accumulate_normal_equations(
+    acc: _Accumulator,
+    chunk: _Chunk,
+    model: FirstStageModel,
+    y: str,
+) -> None:
+    """Add the untreated rows of one chunk to the ``X'WX`` / ``X'Wy`` blocks."""
+
+    untreated = ~chunk.treated
+    acc.n_untreated += int(untreated.sum())
+    acc.n_positive += int((untreated & (np.nan_to_num(chunk.weights) > 0)).sum())
+    if not untreated.any():
+        return
+
+    frame = chunk.frame[untreated]
+    weights = chunk.weights[untreated]
+    unit, period = chunk.unit[untreated], chunk.period[untreated]
+    y_vec = pd.to_numeric(frame[y], errors="coerce").to_numpy(dtype=float)
+    if np.isnan(y_vec).any():
+        raise EstimationError("Outcome contains non-numeric values in the untreated sample.")
+
+    dense = np.ones((len(frame), acc.n_dense), dtype=float)
+    if model.controls_:
+        dense[:, 1:] = model._controls_block(frame)
+    weighted = dense * weights[:, None]
+    acc.dense_xtwx += dense.T @ weighted
+    acc.dense_xtwy += weighted.T @ y_vec
+    acc.ywy += float(np.sum(weights * y_vec * y_vec))
+
+    n_units, n_periods = len(acc.units), len(acc.periods)
+    acc.unit_dw = _grow(acc.unit_dw, n_units)
+    acc.unit_wy = _grow(acc.unit_wy, n_units)
+    acc.period_dw = _grow(acc.period_dw, n_periods)
+    acc.period_wy = _grow(acc.period_wy, n_periods)
+    for j in range(acc.n_dense):
+        acc.unit_dw[:n_units, j] += np.bincount(unit, weights=weighted[:, j], minlength=n_units)
+        acc.period_dw[:n_periods, j] += np.bincount(
+            period, weights=weighted[:, j], minlength=n_periods,
+        )
+    acc.unit_wy[:n_units] += np.bincount(unit, weights=weights * y_vec, minlength=n_units)
+    acc.period_wy[:n_periods] += np.bincount(
+        period, weights=weights * y_vec, minlength=n_periods,
+    )
+    # Unit-by-period block of X'WX; (id, time) pairs are unique, so each cell is one row.
+    acc.cross = _grow(_grow(acc.cross, n_units, axis=0), n_periods, axis=1)
+    acc.cross[unit, period] += weights
+
+    # Record fixed-effect levels in order of first untreated appearance (the fit order).
+    acc.unit_in_fit = _grow(acc.unit_in_fit, n_units)
+    acc.period_in_fit = _grow(acc.period_in_fit, n_periods)
+    for codes, flags, order in (
+        (unit, acc.unit_in_fit, acc.fit_units),
+        (period, acc.period_in_fit, acc.fit_periods),
+    ):
+        first = pd.unique(codes)
+        first = first[~flags[first]]
+        flags[first] = True
+        order.append(first.astype(np.intp))
+
+
+def _assemble_normal_equations(
+    acc: _Accumulator,
+    fit_units: NDArray[np.intp],
+    fit_periods: NDArray[np.intp],
+    sparse: bool,
+) -> Any:
+    """Arrange the accumulated blocks in the in-memory design column order."""
+
+    n_dense = acc.n_dense
+    unit_cols = fit_units[1:]
+    period_cols = fit_periods[1:]
+    n_unit, n_period = len(unit_cols), len(period_cols)
+    dim = n_dense + n_unit + n_period
+    if dim == 1:
+        raise EstimationError("Design matrix lacks regressors; check untreated sample variation.")
+
+    unit_pos = np.full(len(acc.units), -1, dtype=np.int64)
+    unit_pos[unit_cols] = n_dense + np.arange(n_unit)
+    period_pos = np.full(len(acc.periods), -1, dtype=np.int64)
+    period_pos[period_cols] = n_dense + n_unit + np.arange(n_period)
+
+    cross_units, cross_periods = np.nonzero(acc.cross)
+    cross_weights = acc.cross[cross_units, cross_periods]
+    cu, ct = unit_pos[cross_units], period_pos[cross_periods]
+    keep = (cu >= 0) & (ct >= 0)
+
+    dense_rows, dense_cols = np.meshgrid(np.arange(n_dense), np.arange(n_dense), indexing="ij")
+    unit_block = acc.unit_dw[unit_cols]
+    period_block = acc.period_dw[period_cols]
+    dense_idx = np.arange(n_dense)
+    rows = [
+        dense_rows.ravel(),
+        np.repeat(n_dense + np.arange(n_unit), n_dense),
+        np.tile(dense_idx, n_unit),
+        np.repeat(n_dense + n_unit + np.arange(n_period), n_dense),
+        np.tile(dense_idx, n_period),
+        n_dense + np.arange(n_unit),
+        n_dense + n_unit + np.arange(n_period),
+        cu[keep],
+        ct[keep],
+    ]
+    cols = [
+        dense_cols.ravel(),
+        np.tile(dense_idx, n_unit),
+        np.repeat(n_dense + np.arange(n_unit), n_dense),
+        np.tile(dense_idx, n_period),
+        np.repeat(n_dense + n_unit + np.arange(n_period), n_dense),
+        n_dense + np.arange(n_unit),
+        n_dense + n_unit + np.arange(n_period),
+        ct[keep],
+        cu[keep],
+    ]
+    data = [
+        acc.dense_xtwx.ravel(),
+        unit_block.ravel(),
+        unit_block.ravel(),
+        period_block.ravel(),
+        period_block.ravel(),
+        unit_block[:, 0],
+        period_block[:, 0],
+        cross_weights[keep],
+        cross_weights[keep],
+    ]
+    xtwx = sp.csc_matrix(
+        (np.concatenate(data), (np.concatenate(rows), np.concatenate(cols))),
+        shape=(dim, dim),
+    )
+    xtwy = np.concatenate([acc.dense_xtwy, acc.unit_wy[unit_cols], acc.period_wy[period_cols]])
+    return (xtwx if sparse else xtwx.toarray()), xtwy
+
+
+@dataclass
+class _CellStatistics:
+    """Per-event-time sufficient statistics gathered on the second pass."""
+
+    k_lo: int
+    n_k: int
+    n_cohorts: int
+    n_units: int
+    n_periods: int
+    n_controls: int
+    n_pre: int
+    n_panel_units: int
+    count: NDArray[np.float64] = field(init=False)
+    mean: NDArray[np.float64] = field(init=False)
+    m2: NDArray[np.float64] = field(init=False)
+    cohort_count: NDArray[np.float64] = field(init=False)
+    cohort_sum: NDArray[np.float64] = field(init=False)
+    unit_present: NDArray[np.bool_] = field(init=False)
+    period_count: NDArray[np.float64] = field(init=False)
+    control_sum: NDArray[np.float64] = field(init=False)
+    placebo: NDArray[np.float64] = field(init=False)
+    placebo_present: NDArray[np.bool_] = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.count = np.zeros(self.n_k, dtype=float)
+        self.mean = np.zeros(self.n_k, dtype=float)
+        self.m2 = np.zeros(self.n_k, dtype=float)
+        self.cohort_count = np.zeros((self.n_k, self.n_cohorts), dtype=float)
+        self.cohort_sum = np.zeros((self.n_k, self.n_cohorts), dtype=float)
+        self.unit_present = np.zeros((self.n_k, self.n_units), dtype=bool)
+        self.period_count = np.zeros((self.n_k, self.n_periods), dtype=float)
+        self.control_sum = np.zeros((self.n_k, self.n_controls), dtype=float)
+        self.placebo = np.zeros((self.n_panel_units, self.n_pre), dtype=float)
+        self.placebo_present = np.zeros((self.n_panel_units, self.n_pre), dtype=bool)
+
+    def add_treated(
+        self,
+        k_index: NDArray[np.intp],
+        tau: NDArray[np.float64],
+        cohort: NDArray[np.intp],
+        unit_pos: NDArray[np.intp],
+        period_pos: NDArray[np.intp],
+        controls: Optional[NDArray[np.float64]],
+    ) -> None:
+        """Merge one chunk of treated cells (Chan et al. pairwise mean/M2 update)."""
+
+        n_k = self.n_k
+        chunk_count = np.bincount(k_index, minlength=n_k).astype(float)
+        chunk_sum = np.bincount(k_index, weights=tau, minlength=n_k)
+        chunk_mean = np.divide(
+            chunk_sum, chunk_count, out=np.zeros(n_k), where=chunk_count > 0,
+        )
+        chunk_m2 = np.bincount(k_index, weights=(tau - chunk_mean[k_index]) ** 2, minlength=n_k)
+        total = self.count + chunk_count
+        delta = chunk_mean - self.mean
+        share = np.divide(chunk_count, total, out=np.zeros(n_k), where=total > 0)
+        self.mean += delta * share
+        self.m2 += chunk_m2 + delta ** 2 * self.count * share
+        self.count = total
+
+        cell = k_index * self.n_cohorts + cohort
+        size = n_k * self.n_cohorts
+        self.cohort_count += np.bincount(cell, minlength=size).reshape(n_k, -1)
+        self.cohort_sum += np.bincount(cell, weights=tau, minlength=size).reshape(n_k, -1)
+        self.unit_present[k_index, unit_pos] = True
+        self.period_count += np.bincount(
+            k_index * self.n_periods + period_pos, minlength=n_k * self.n_periods,
+        ).reshape(n_k, -1)
+        if controls is not None:
+            for j in range(self.n_controls):
+                self.control_sum[:, j] += np.bincount(
+                    k_index, weights=controls[:, j], minlength=n_k,
+                )
+
+    def add_placebo(
+        self,
+        unit: NDArray[np.intp],
+        lag_index: NDArray[np.intp],
+        values: NDArray[np.float64],
+    ) -> None:
+        """Store pre-period placebo residuals by (unit, negative event time)."""
+
+        self.placebo[unit, lag_index] = values
+        self.placebo_present[unit, lag_index] = True
+
+
+def _summarize(
+    stats: _CellStatistics,
+    config: "DidImputation",
+    model: FirstStageModel,
+) -> pd.DataFrame:
+    """Build the event-time summary (estimates, SEs, intervals) from the cell statistics."""
+
+    ks = stats.k_lo + np.arange(stats.n_k)
+    keep = (stats.count > 0) & (stats.count >= config.minN)
+    if not keep.any():
+        empty: pd.DataFrame = pd.DataFrame(columns=["k", "estimate", "n", "weight_scheme"])
+        return empty
+
+    cohort_means = np.divide(
+        stats.cohort_sum,
+        stats.cohort_count,
+        out=np.zeros_like(stats.cohort_sum),
+        where=stats.cohort_count > 0,
+    )
+    if config.weight_scheme == "equal":
+        n_cohorts = (stats.cohort_count > 0).sum(axis=1)
+        estimate = np.divide(
+            cohort_means.sum(axis=1), n_cohorts, out=np.full(stats.n_k, np.nan),
+            where=n_cohorts > 0,
+        )
+    elif config.weight_scheme == "cohort_share":
+        estimate = np.divide(
+            (stats.cohort_count * cohort_means).sum(axis=1),
+            stats.count,
+            out=np.full(stats.n_k, np.nan),
+            where=stats.count > 0,
+        )
+    else:
+        estimate = stats.mean
+
+    n = stats.count
+    groups = n  # one cell per unit and event time, and clusters are units
+    centered_var = np.divide(stats.m2, n ** 2, out=np.zeros(stats.n_k), where=n > 0)
+    correction = np.divide(groups, groups - 1.0, out=np.ones(stats.n_k), where=groups > 1)
+    cluster_var = centered_var * correction
+
+    se = np.full(stats.n_k, np.nan)
+    if config.weight_scheme == "nobs" and model.factor_ is not None:
+        active = np.flatnonzero(keep & (n > 1))
+        if active.size:
+            sums = np.column_stack(
+                [
+                    n[active],
+                    stats.control_sum[active],
+                    stats.unit_present[active, 1:],
+                    stats.period_count[active, 1:],
+                ],
+            ).T
+            quad = model.factor_.quad_forms(sums)
+            sigma2 = model.resid_ss_ / max(model.dof_, 1)
+            for position, quad_k in zip(active, quad):
+                donor_var = sigma2 * float(quad_k) / (n[position] ** 2)
+                se[position] = _nobs_se(cluster_var[position], donor_var, int(ks[position]))
+    else:
+        valid = keep & (groups >= 2)
+        se[valid] = np.sqrt(cluster_var[valid])
+
+    summary = pd.DataFrame(
+        {
+            "k": ks[keep].astype(int),
+            "estimate": estimate[keep],
+            "n": n[keep].astype(int),
+            "weight_scheme": config.weight_scheme,
+            "se": se[keep],
+        },
+    )
+    return finalize_summary_ci(summary.reset_index(drop=True), ci_level=config.ci)
+
+
+def _panel_meta(acc: _Accumulator, config: "DidImputation") -> Dict[str, Any]:
+    """Balance diagnostics equivalent to those of ``validate_and_prepare``."""
+
+    n_units = len(acc.units)
+    periods_per_unit = pd.Series(acc.unit_rows[:n_units])
+    warnings: List[str] = []
+    narrow_codes = np.flatnonzero(acc.unit_adopts[:n_units] & (acc.unit_pre[:n_units] < 2))
+    narrow_pre = sorted(str(unit) for unit in acc.units.levels[narrow_codes])
+    if narrow_pre:
+        warnings.append(
+            "Units with fewer than two pre-periods: "
+            f"{narrow_pre[:5]}{'...' if len(narrow_pre) > 5 else ''}. "
+            "Pretrend test may be unstable.",
+        )
+    return {
+        "balanced": bool(periods_per_unit.nunique() == 1),
+        "n_units": n_units,
+        "n_periods_by_unit": {
+            key: float(value) if isinstance(value, (np.floating, np.integer)) else value
+            for key, value in periods_per_unit.describe().to_dict().items()
+        },
+        "warnings": warnings,
+        "cluster": config.id,
+    }
+
+
+def fit_out_of_core(
+    config: "DidImputation",
+    source: ChunkSource,
+    chunksize: int = 100_000,
+) -> Dict[str, Any]:
+    """
+    Run the estimator over a chunked source in two passes with bounded memory.
+
+    The first pass interns unit, period, and cohort levels and accumulates the weighted normal
+    equations of the untreated regression (the fixed-effect blocks as level-sized sums plus a
+    sparse unit-by-period block). After the factorization, the second pass predicts each chunk
+    and reduces it to residual sums for the donor variance, per-event-time moments and design
+    sums for the treated cells, and per-unit placebo values for the pretrend test. Peak memory
+    depends on ``chunksize``, the number of fixed-effect levels, and the horizon width rather
+    than on the number of rows.
+
+    Parameters
+    ----------
+    config : DidImputation
+        Estimator configuration (``fe="twoway"`` only).
+    source : str | os.PathLike | pd.DataFrame | callable | iterable of pd.DataFrame
+        A CSV path, a frame (sliced into chunks), a zero-argument callable returning an
+        iterable of chunks (invoked once per pass), or an iterable of chunks. One-shot
+        iterators are spooled to a temporary directory for the second pass.
+    chunksize : int
+        Rows per chunk when reading CSV paths or slicing frames; also used as the
+        prediction block size.
+
+    Returns
+    -------
+    dict[str, Any]
+        ``summary``, ``pretrend`` (p-value, dof, used ks), ``pretrend_curve`` (one test per
+        nested window), ``panel_meta``, and the fitted ``first_stage`` model.
+
+    Raises
+    ------
+    ValidationError
+        For the same input problems ``validate_and_prepare`` reports.
+    EstimationError
+        If the first stage cannot be estimated.
+    """
+
+    if config.fe != "twoway" or config.absorb:
+        raise ValidationError("Out-of-core fitting supports fe='twoway' only.")
+    if cluster_columns(config.cluster, config.id) != [config.id]:
+        raise ValidationError("Out-of-core fitting clusters on the unit id only.")
+
+    controls = list(config.controls or [])
+    columns = [config.y, config.id, config.time, config.Ei, *controls]
+    if config.weight and config.weight not in columns:
+        columns.append(config.weight)
+
+    replay = _ChunkReplay(source, columns, chunksize)
+    try:
+        return _fit_passes(config, replay, controls, chunksize)
+    finally:
+        replay.close()
+
+
+def _fit_passes(
+    config: "DidImputation",
+    replay: _ChunkReplay,
+    controls: List[str],
+    chunksize: int,
+) -> Dict[str, Any]:
+    """Execute the accumulation pass, the solve, and the residual pass."""
+
+    model = FirstStageModel(solver=config.solver, store="lean", chunk_size=chunksize)
+    model.controls_ = controls
+    model.id_col_ = config.id
+    model.time_col_ = config.time
+    acc = _Accumulator(n_dense=1 + len(controls))
+
+    for raw in replay:
+        chunk = _coerce_chunk(raw, config, acc, grow=True)
+        _accumulate_levels(acc, chunk, config.id, config.time)
+        _accumulate_normal_equations(acc, chunk, model, config.y)
+
+    if acc.n_positive == 0:
+        raise ValidationError(
+            "Untreated sample is empty (no never-treated units and no not-yet-treated periods "
+            "with positive weight). Check Ei coding, weights, or extend the time window.",
+        )
+    fit_units = np.concatenate(acc.fit_units)
+    fit_periods = np.concatenate(acc.fit_periods)
+    model.fe_columns_ = [config.id, config.time]
+    model.fe_levels_ = [acc.units.levels[fit_units], acc.periods.levels[fit_periods]]
+    xtwx, xtwy = _assemble_normal_equations(
+        acc, fit_units, fit_periods, sparse=config.solver == "sparse",
+    )
+    acc.cross = np.zeros((0, 0))
+    rank = model.solve_normal_equations(xtwx, xtwy)
+    model.ywy_ = acc.ywy
+    model.fitted_ = True
+
+    unit_fit_pos = np.full(len(acc.units), -1, dtype=np.intp)
+    unit_fit_pos[fit_units] = np.arange(len(fit_units))
+    period_fit_pos = np.full(len(acc.periods), -1, dtype=np.intp)
+    period_fit_pos[fit_periods] = np.arange(len(fit_periods))
+
+    k_min, k_max = config.horizons
+    k_lo = max(k_min, 0)
+    stats = _CellStatistics(
+        k_lo=k_lo,
+        n_k=max(k_max - k_lo + 1, 0),
+        n_cohorts=len(acc.cohorts),
+        n_units=len(fit_units),
+        n_periods=len(fit_periods),
+        n_controls=len(controls),
+        n_pre=max(config.pretrends, 0),
+        n_panel_units=len(acc.units),
+    )
+    resid_ss = 0.0
+
+    for raw in replay:
+        chunk = _coerce_chunk(raw, config, acc, grow=False)
+        y0 = model.predict_y0(chunk.frame, config.y, config.id, config.time, controls)
+        outcome = pd.to_numeric(chunk.frame[config.y], errors="coerce").to_numpy(dtype=float)
+        resid = outcome - y0
+
+        untreated = ~chunk.treated
+        resid_ss += float(np.sum(chunk.weights[untreated] * resid[untreated] ** 2))
+
+        k = chunk.time - np.where(chunk.finite, chunk.adoption, 0.0)
+        post = chunk.treated & np.isfinite(resid) & (k >= k_lo) & (k <= k_max)
+        if post.any() and stats.n_k:
+            cohort = acc.cohorts.encode(chunk.adoption[post].astype(int), grow=False)
+            stats.add_treated(
+                (k[post] - k_lo).astype(np.intp),
+                resid[post],
+                cohort,
+                unit_fit_pos[chunk.unit[post]],
+                period_fit_pos[chunk.period[post]],
+                model._controls_block(chunk.frame[post]) if controls else None,
+            )
+
+        pre = (
+            chunk.finite & ~chunk.treated & np.isfinite(resid)
+            & (k < 0) & (k >= -float(stats.n_pre))
+        )
+        if pre.any():
+            stats.add_placebo(chunk.unit[pre], (-k[pre] - 1).astype(np.intp), resid[pre])
+
+    n_untreated = acc.n_untreated
+    model.resid_ss_ = resid_ss
+    model.dof_ = max(int(n_untreated - rank), 1)
+    model.info_ = {
+        "n_obs": int(n_untreated),
+        "rank": int(rank),
+        "solver": config.solver,
+        "store": model.store,
+        "controls": list(controls),
+        "baseline_id": model.id_baseline_,
+        "baseline_time": model.time_baseline_,
+        "out_of_core": True,
+        "n_chunks": int(acc.n_chunks),
+        "n_rows": int(acc.n_rows),
+    }
+
+    summary = _summarize(stats, config, model)
+    if stats.n_pre:
+        used = stats.placebo_present.any(axis=0)
+        lags = np.flatnonzero(used)[::-1]
+        units = stats.placebo_present[:, lags].any(axis=1)
+        terms = [
+            (
+                1.0,
+                stats.placebo[np.ix_(units, lags)],
+                stats.placebo_present[np.ix_(units, lags)].astype(float),
+            ),
+        ]
+        ks = [-int(lag) - 1 for lag in lags]
+        max_abs = np.max(np.abs(terms[0][1]), axis=0) if lags.size else np.zeros(0)
+        curve = _pretrend_curve_from_sums(
+            terms if lags.size else [], ks, max_abs, config.pretrends,
+        )
+    else:
+        curve = []
+    return {
+        "summary": summary,
+        "pretrend": pretrend_from_curve(curve),
+        "pretrend_curve": curve,
+        "panel_meta": _panel_meta(acc, config),
+        "first_stage": model,
+    }
@@ -0,0 +1,250 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from itertools import combinations
+from typing import Any, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+
+
+def _codes(values: Any, sort: bool) -> Tuple[NDArray[np.int32], pd.Index]:
+    """Factorize ``values`` into int32 codes (``-1`` for missing) and their levels."""
+
+    codes, levels = pd.factorize(values, sort=sort)
+    return codes.astype(np.int32, copy=False), pd.Index(levels)
+
+
+def _compact_int(values: NDArray[np.float64]) -> NDArray[np.signedinteger[Any]]:
+    """Cast integral ``values`` to the narrowest of int16/int32/int64 that holds them."""
+
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return values.astype(dtype)
+    return values.astype(np.int64)
+
+
+def cluster_columns(cluster: Optional[Union[str, Sequence[str]]], id: str) -> List[str]:
+    """Normalize a ``cluster`` specification to a list of column names (``[id]`` if unset)."""
+
+    if not cluster:
+        return [id]
+    if isinstance(cluster, str):
+        return [cluster]
+    return list(cluster)
+
+
+def intersect_codes(dims: Sequence[NDArray[np.integer]]) -> NDArray[np.intp]:
+    """
+    Dense codes of the intersection of several non-negative integer groupings.
+
+    Codes are combined arithmetically (``a * n_b + b``, re-compacted after every step so the
+    int64 range is never exceeded) rather than by hashing Python tuples.
+    """
+
+    combined = np.zeros(len(dims[0]), dtype=np.int64)
+    for codes in dims:
+        width = int(codes.max()) + 1 if len(codes) else 1
+        combined = combined * width + np.asarray(codes, dtype=np.int64)
+        combined = np.unique(combined, return_inverse=True)[1].ravel().astype(np.int64)
+    return combined.astype(np.intp)
+
+
+@dataclass
+class PanelIndex:
+    """
+    Integer-coded panel structure built once by ``validate_and_prepare``.
+
+    Every stage reads unit, period, cohort, and cluster membership from these codes instead of
+    re-deriving it from raw object columns.
+
+    Attributes
+    ----------
+    id_codes, time_codes : np.ndarray
+        int32 codes into ``id_levels`` (first-appearance order) and ``time_levels`` (sorted).
+    cohort_codes : np.ndarray
+        int32 codes into ``cohort_levels`` (sorted adoption times); ``-1`` for never-treated rows.
+    cluster_codes : np.ndarray
+        int32 codes into ``cluster_levels`` (first-appearance order) of the first cluster
+        column; ``-1`` when missing.
+    cluster_dims : tuple[np.ndarray, ...]
+        int32 codes of every cluster column (one entry for one-way clustering, two for
+        two-way clustering, and so on).
+    order : np.ndarray
+        Row positions sorted by ``(id, time)``.
+    unit_offsets : np.ndarray
+        CSR offsets over ``order``; the rows of unit ``u`` are
+        ``order[unit_offsets[u]:unit_offsets[u + 1]]``.
+    event_time : np.ndarray
+        Event time ``k = time - Ei`` in the narrowest integer dtype that holds it (int16 for
+        any realistic panel); ``0`` for never-treated rows, see :meth:`event_times`.
+    untreated : np.ndarray
+        Boolean mask of rows that are not treated (never treated or before adoption).
+    """
+
+    id_codes: NDArray[np.int32]
+    time_codes: NDArray[np.int32]
+    cohort_codes: NDArray[np.int32]
+    cluster_codes: NDArray[np.int32]
+    id_levels: pd.Index
+    time_levels: pd.Index
+    cohort_levels: pd.Index
+    cluster_levels: pd.Index
+    order: NDArray[np.intp]
+    unit_offsets: NDArray[np.int64]
+    cluster_dims: Tuple[NDArray[np.int32], ...] = ()
+    event_time: NDArray[np.signedinteger[Any]] = field(
+        default_factory=lambda: np.zeros(0, dtype=np.int16),
+    )
+    untreated: NDArray[np.bool_] = field(default_factory=lambda: np.zeros(0, dtype=bool))
+
+    @classmethod
+    def from_frame(
+        cls,
+        df: pd.DataFrame,
+        id: str,
+        time: str,
+        Ei: str,
+        cluster: Optional[Union[str, Sequence[str]]] = None,
+    ) -> "PanelIndex":
+        """
+        Build the index from a prepared panel, including the event-time and treatment arrays.
+
+        Parameters
+        ----------
+        df : pd.DataFrame
+            Panel with integer time and numeric ``Ei`` (NaN for never-treated units).
+        id, time, Ei : str
+            Unit, time, and adoption-time column names.
+        cluster : str | list[str] | None
+            Cluster column, or several columns for multi-way clustering; defaults to ``id``.
+        """
+
+        id_codes, id_levels = _codes(df[id].to_numpy(), sort=False)
+        time_codes, time_levels = _codes(df[time].to_numpy(), sort=True)
+        adoption = pd.to_numeric(df[Ei], errors="coerce").to_numpy(dtype=float)
+        adoption = np.where(np.isfinite(adoption), adoption, np.nan)
+        cohort_codes, cohort_levels = _codes(adoption, sort=True)
+        adopted = cohort_codes >= 0
+        time_values = pd.to_numeric(df[time], errors="coerce").to_numpy(dtype=float)
+        k = np.where(adopted, np.round(time_values - adoption), 0.0)
+        dims: List[NDArray[np.int32]] = []
+        cluster_levels = id_levels
+        for position, col in enumerate(cluster_columns(cluster, id)):
+            if col == id:
+                codes, levels = id_codes, id_levels
+            else:
+                codes, levels = _codes(df[col].to_numpy(), sort=False)
+            if position == 0:
+                cluster_levels = levels
+            dims.append(codes)
+        cluster_codes = dims[0]
+
+        order = np.lexsort((time_codes, id_codes))
+        counts = np.bincount(id_codes, minlength=len(id_levels))
+        unit_offsets = np.zeros(len(id_levels) + 1, dtype=np.int64)
+        np.cumsum(counts, out=unit_offsets[1:])
+        return cls(
+            id_codes=id_codes,
+            time_codes=time_codes,
+            cohort_codes=cohort_codes,
+            cluster_codes=cluster_codes,
+            id_levels=id_levels,
+            time_levels=time_levels,
+            cohort_levels=cohort_levels,
+            cluster_levels=cluster_levels,
+            order=order,
+            unit_offsets=unit_offsets,
+            cluster_dims=tuple(dims),
+            event_time=_compact_int(k),
+            untreated=~(adopted & (k >= 0)),
+        )
+
+    @property
+    def n_rows(self) -> int:
+        """Number of panel rows."""
+
+        return int(self.id_codes.shape[0])
+
+    @property
+    def n_units(self) -> int:
+        """Number of distinct units."""
+
+        return int(len(self.id_levels))
+
+    @property
+    def n_periods(self) -> int:
+        """Number of distinct time periods."""
+
+        return int(len(self.time_levels))
+
+    @property
+    def adopted(self) -> NDArray[np.bool_]:
+        """Rows of units with a finite adoption time."""
+
+        adopted: NDArray[np.bool_] = self.cohort_codes >= 0
+        return adopted
+
+    def event_times(self) -> NDArray[np.float64]:
+        """Event times as float64 with NaN for never-treated rows (built on each call)."""
+
+        return np.where(self.adopted, self.event_time, np.nan)
+
+    def unit_rows(self, unit_code: int) -> NDArray[np.intp]:
+        """Row positions of unit ``unit_code`` ordered by time."""
+
+        start, stop = self.unit_offsets[unit_code], self.unit_offsets[unit_code + 1]
+        return self.order[start:stop]
+
+    def cluster_terms(self) -> List[Tuple[float, NDArray[np.intp]]]:
+        """
+        Cameron-Gelbach-Miller inclusion-exclusion terms ``(sign, codes)``.
+
+        Every non-empty subset of the cluster dimensions contributes its intersection codes
+        with sign ``(-1)^(|subset| + 1)``; one-way clustering yields the single term
+        ``(1.0, cluster_codes)``.
+        """
+
+        dims = self.cluster_dims or (self.cluster_codes,)
+        terms: List[Tuple[float, NDArray[np.intp]]] = []
+        for size in range(1, len(dims) + 1):
+            for subset in combinations(dims, size):
+                codes = (
+                    subset[0].astype(np.intp, copy=False)
+                    if size == 1
+                    else intersect_codes(subset)
+                )
+                terms.append((1.0 if size % 2 else -1.0, codes))
+        return terms
+
+    def periods_per_unit(self) -> NDArray[np.int64]:
+        """Number of rows (distinct periods) observed for each unit."""
+
+        return np.diff(self.unit_offsets)
+
+
+def event_times(
+    df: pd.DataFrame,
+    panel: Optional[PanelIndex] = None,
+    k_col: Optional[str] = None,
+) -> NDArray[np.float64]:
+    """
+    Float event times of the rows of ``df`` (NaN for never-treated rows).
+
+    ``df[k_col]`` when a column is named, otherwise :meth:`PanelIndex.event_times` of
+    ``panel``, otherwise a ``_k`` column of ``df`` (frames assembled by hand).
+    """
+
+    if k_col is None and panel is not None:
+        return panel.event_times()
+    return np.asarray(df[k_col or "_k"].to_numpy(), dtype=float)
+
+
+def untreated_rows(df: pd.DataFrame, panel: Optional[PanelIndex] = None) -> NDArray[np.bool_]:
+    """Untreated mask of ``df``: ``panel.untreated``, otherwise an ``_untreated`` column."""
+
+    if panel is not None:
+        return panel.untreated
+    return np.asarray(df["_untreated"].to_numpy() == 1, dtype=bool)
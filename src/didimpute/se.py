@@ -1,31 +1,68 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Tuple, cast
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple, Union, cast
 
 import numpy as np
 import pandas as pd
-import statsmodels.api as sm
+import scipy.sparse as sp
 from numpy.typing import NDArray
-from scipy.stats import norm
+from scipy.linalg import solve_triangular
+from scipy.stats import chi2, norm
 
+from .errors import EstimationError
 from .first_stage import FirstStageModel
+from .linalg import InformationFactor, IterativeInformation
+from .panel import PanelIndex, event_times
 
+_BOOT_BLOCK = 512
+_WEBB_POINTS = np.array(
+    [-np.sqrt(1.5), -1.0, -np.sqrt(0.5), np.sqrt(0.5), 1.0, np.sqrt(1.5)],
+)
 
-def _cluster_se_intercept(y: np.ndarray, clusters: np.ndarray) -> float:
-    """Return cluster-robust standard error for an intercept-only regression."""
 
-    if len(y) == 0:
-        return float("nan")
+ClusterTerms = List[Tuple[float, NDArray[np.intp]]]
+PlaceboTerms = List[Tuple[float, NDArray[np.float64], NDArray[np.float64]]]
 
-    cluster_series = pd.Series(clusters).dropna()
-    if cluster_series.nunique() < 2:
-        return float("nan")
 
-    X = np.ones((len(y), 1), dtype=float)
-    model = sm.OLS(y, X)
-    result = model.fit(cov_type="cluster", cov_kwds={"groups": clusters})
-    cov = result.cov_params()
-    return float(np.sqrt(cov[0, 0]))
+def _cluster_mean_var(
+    k_codes: NDArray[np.intp],
+    terms: ClusterTerms,
+    values: NDArray[np.float64],
+    n_k: int,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Cluster-robust variance of the mean of ``values`` within each event-time group.
+
+    This is the intercept-only ``cov_type="cluster"`` OLS fit in closed form. With one
+    regressor the statsmodels factor ``G/(G-1) * (N-1)/(N-K)`` reduces to ``G/(G-1)``, so the
+    variance is ``G/(G-1) * sum_g (sum_{i in g} u_i)^2 / n^2`` with ``u`` the deviations from
+    the group mean (the factor is skipped when ``G = 1``). ``terms`` are the ``(sign, codes)``
+    inclusion-exclusion terms of :meth:`PanelIndex.cluster_terms` restricted to the rows of
+    ``values``; multi-way variances are the signed sum of the per-term variances (each with
+    its own factor) and can be negative, which callers report as an undefined (NaN) SE.
+    Returns the variances and the smallest cluster count ``G`` per group.
+    """
+
+    counts = np.bincount(k_codes, minlength=n_k).astype(float)
+    means = np.bincount(k_codes, weights=values, minlength=n_k) / np.maximum(counts, 1.0)
+    centered = values - means[k_codes]
+    variance = np.zeros(n_k)
+    n_clusters = np.full(n_k, np.inf)
+    for sign, clusters in terms:
+        squares, groups = _cluster_sums_by_k(k_codes, clusters, centered, n_k)
+        term = np.divide(squares, counts ** 2, out=np.zeros(n_k), where=counts > 0)
+        term *= np.divide(groups, groups - 1.0, out=np.ones(n_k), where=groups > 1)
+        variance += sign * term
+        n_clusters = np.minimum(n_clusters, groups)
+    return variance, n_clusters
+
+
+def _standard_errors(variance: NDArray[np.float64]) -> NDArray[np.float64]:
+    """Square roots of ``variance``; a negative multi-way variance has an undefined (NaN) SE."""
+
+    variance = np.asarray(variance, dtype=float)
+    return np.sqrt(np.where(variance < 0.0, np.nan, variance))
 
 
 def attach_ses_by_k(
@@ -36,54 +73,635 @@ def attach_ses_by_k(
     y_col: str,
     fsm: FirstStageModel,
     treated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
 ) -> pd.DataFrame:
     """
     Attach cluster-robust standard errors for each event time present in ``summary``.
+
+    Treated cells are grouped by event time once; cluster sums are taken with one
+    ``np.bincount`` over (event time, cluster) codes and the ``nobs`` donor-variance quadratic
+    forms share one batched solve against the first-stage factorization. When ``panel`` is
+    supplied, clusters (one- or multi-way) and design levels are taken from its integer
+    codes; otherwise SEs are clustered on ``id_col``.
     """
 
     if summary.empty:
         return summary
 
+    _ = y_col  # maintained for API parity; treated residuals are taken from ``tau``
     tau_arr = np.asarray(tau, dtype=float)
-    k_arr = np.asarray(df["_k"].to_numpy(), dtype=float)
-    k_int = np.zeros_like(k_arr, dtype=int)
-    finite_k = np.isfinite(k_arr)
-    k_int[finite_k] = np.round(k_arr[finite_k]).astype(int)
-    treated_arr = np.asarray(treated_mask, dtype=bool)
-    clusters = df[id_col].to_numpy()
+    k_arr = event_times(df, panel)
+    rows = np.flatnonzero(
+        np.asarray(treated_mask, dtype=bool) & np.isfinite(tau_arr) & np.isfinite(k_arr),
+    )
+    ks, k_codes = np.unique(np.round(k_arr[rows]).astype(np.int64), return_inverse=True)
+    k_codes = k_codes.astype(np.intp, copy=False).ravel()
+    n_k = len(ks)
+    tau_rows = tau_arr[rows]
+    terms = [(sign, codes[rows]) for sign, codes in _cluster_terms(df, id_col, panel)]
 
-    out = summary.copy()
-    se_values: List[float] = []
-    for row in out.to_dict("records"):
-        k_val = int(row["k"])
-        scheme = row.get("weight_scheme", "nobs")
-        mask = (
-            treated_arr
-            & np.isfinite(tau_arr)
-            & np.isfinite(k_arr)
-            & (k_int == k_val)
-        )
-        if not mask.any():
-            se_values.append(float("nan"))
-            continue
+    out: pd.DataFrame = summary.copy()
+    groups = pd.Index(ks).get_indexer(pd.Index(out["k"].astype(np.int64)))
+    if "weight_scheme" in out.columns:
+        schemes = out["weight_scheme"].to_numpy()
+    else:
+        schemes = np.full(len(out), "nobs", dtype=object)
+    se_values = np.full(len(out), np.nan)
+    present = groups >= 0
+    if not present.any():
+        out["se"] = se_values
+        return out
 
-        if scheme == "nobs" and _first_stage_ready(fsm):
-            se_val = _se_event_time_nobs(
-                df=df,
-                y_col=y_col,
-                id_col=id_col,
-                treated_indices=np.nonzero(mask)[0],
-                event_k=k_val,
-                fsm=fsm,
+    counts = np.bincount(k_codes, minlength=n_k).astype(float)
+    cluster_var, n_clusters = _cluster_mean_var(k_codes, terms, tau_rows, n_k)
+    nobs = present & (schemes == "nobs") & _first_stage_ready(fsm)
+
+    intercept = np.flatnonzero(present & ~nobs)
+    intercept_groups = groups[intercept]
+    se_values[intercept] = np.where(
+        n_clusters[intercept_groups] > 1, _standard_errors(cluster_var[intercept_groups]), np.nan,
+    )
+
+    active = np.flatnonzero(nobs & (counts[np.maximum(groups, 0)] > 1))
+    if active.size:
+        sums = fsm.design_sums(df.iloc[rows], k_codes, n_k, panel=panel, rows=rows)
+        active_groups = groups[active]
+        quad = _information(fsm).quad_forms(sums[active_groups].T)
+        donor_var = _untreated_sigma2(fsm) * quad / counts[active_groups] ** 2
+        for position, group, donor in zip(active, active_groups, donor_var):
+            se_values[position] = _nobs_se(
+                float(cluster_var[group]), float(donor), int(ks[group]),
             )
-        else:
-            se_val = _cluster_se_intercept(tau_arr[mask], clusters[mask])
-        se_values.append(se_val)
 
     out["se"] = se_values
     return out
 
 
+def attach_bjs_ses(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+) -> pd.DataFrame:
+    """
+    Attach the conservative Borusyak-Jaravel-Spiess standard errors to ``summary``.
+
+    The variance of each estimand is ``sum_g U_ge^2`` over the cluster scores of
+    :func:`_bjs_scores`, without a small-sample factor; multi-way clustering takes the signed
+    sum over the inclusion-exclusion terms, and a negative sum leaves the SE undefined (NaN).
+    """
+
+    if summary.empty:
+        return summary
+
+    scores, counts = _bjs_scores(
+        df, summary, tau, y0_hat, id_col, y_col, Ei_col, weight_col, fsm, treated_mask,
+        untreated_mask, panel,
+    )
+    variance = sum(sign * np.einsum("ge,ge->e", term, term) for sign, term in scores)
+    out: pd.DataFrame = summary.copy()
+    out["se"] = np.where(counts > 0, _standard_errors(variance), np.nan)
+    return out
+
+
+def attach_wild_bootstrap_ses(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+    ci_level: float = 0.95,
+    n_boot: int = 9999,
+    boot_weights: str = "rademacher",
+    random_state: Optional[int] = None,
+    n_jobs: int = 1,
+) -> pd.DataFrame:
+    """
+    Attach wild cluster bootstrap standard errors and symmetric intervals to ``summary``.
+
+    Replicates are ``eta @ U`` for a ``B x G`` matrix of Rademacher or Webb weights ``eta``
+    and the ``G x K`` cluster scores ``U`` of :func:`_bjs_scores` (one-way clustering), so the
+    model is never refit. The SE is the standard deviation of the replicates and the interval is
+    ``estimate +/- q``, with ``q`` the ``ci_level`` quantile of the absolute replicates.
+    Replicates are drawn in fixed blocks seeded from ``random_state`` (see
+    :func:`wild_bootstrap_draws`), so results do not depend on ``n_jobs``.
+    """
+
+    if summary.empty:
+        return summary
+
+    scores, counts = _bjs_scores(
+        df, summary, tau, y0_hat, id_col, y_col, Ei_col, weight_col, fsm, treated_mask,
+        untreated_mask, panel,
+    )
+    draws = wild_bootstrap_draws(scores[0][1], n_boot, boot_weights, random_state, n_jobs)
+    radius = np.quantile(np.abs(draws), ci_level, axis=0)
+    valid = counts > 0
+    out: pd.DataFrame = summary.copy()
+    out["se"] = np.where(valid, draws.std(axis=0, ddof=1), np.nan)
+    out["ci_low"] = np.where(valid, out["estimate"] - radius, np.nan)
+    out["ci_high"] = np.where(valid, out["estimate"] + radius, np.nan)
+    out["ci_level"] = ci_level
+    return out
+
+
+def wild_bootstrap_draws(
+    scores: NDArray[np.float64],
+    n_boot: int,
+    boot_weights: str = "rademacher",
+    random_state: Optional[int] = None,
+    n_jobs: int = 1,
+) -> NDArray[np.float64]:
+    """
+    Return ``n_boot x K`` wild cluster bootstrap replicates ``eta @ scores``.
+
+    ``eta`` holds one weight per replicate and cluster (``rademacher``: +/-1; ``webb``: the
+    six-point distribution +/-sqrt(1/2), +/-1, +/-sqrt(3/2)). Replicates are produced in
+    blocks of ``_BOOT_BLOCK`` rows, each seeded by its own child of
+    ``SeedSequence(random_state)``; with ``n_jobs > 1`` the blocks are spread over worker
+    processes and the output is identical to the serial run.
+    """
+
+    children = np.random.SeedSequence(random_state).spawn(-(-n_boot // _BOOT_BLOCK))
+    sizes = [min(_BOOT_BLOCK, n_boot - start) for start in range(0, n_boot, _BOOT_BLOCK)]
+    if n_jobs == 1 or len(children) == 1:
+        blocks = [
+            _bootstrap_block(scores, child, size, boot_weights)
+            for child, size in zip(children, sizes)
+        ]
+    else:
+        workers = None if n_jobs < 0 else n_jobs
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            blocks = list(
+                pool.map(
+                    _bootstrap_block,
+                    [scores] * len(children),
+                    children,
+                    sizes,
+                    [boot_weights] * len(children),
+                ),
+            )
+    return np.vstack(blocks)
+
+
+def _bootstrap_block(
+    scores: NDArray[np.float64],
+    seed: np.random.SeedSequence,
+    size: int,
+    boot_weights: str,
+) -> NDArray[np.float64]:
+    """Draw one ``size x G`` weight block and return its replicates ``eta @ scores``."""
+
+    rng = np.random.default_rng(seed)
+    n_clusters = scores.shape[0]
+    if boot_weights == "webb":
+        eta = rng.choice(_WEBB_POINTS, size=(size, n_clusters))
+    else:
+        eta = rng.integers(0, 2, size=(size, n_clusters)).astype(float) * 2.0 - 1.0
+    return np.asarray(eta @ scores, dtype=float)
+
+
+def _bjs_scores(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+    terms: Optional[ClusterTerms] = None,
+) -> Tuple[List[Tuple[float, NDArray[np.float64]]], NDArray[np.intp]]:
+    """
+    Per-cluster scores ``U`` (``G x K``) of the summary estimands and their cell counts.
+
+    Each summary row is the estimand ``sum_it w_it tau_it`` over treated cells, with ``w``
+    from the summary's weight scheme; the weights form a sparse cell-by-estimand matrix that
+    :func:`estimand_scores` turns into one ``(sign, U)`` pair per inclusion-exclusion term of
+    the clustering (or of ``terms`` when given).
+    """
+
+    rows, cohort_all = treated_cells(df, tau, treated_mask, Ei_col, panel)
+    ks = np.round(event_times(df, panel)[rows]).astype(np.int64)
+    estimand_ks = pd.Index(summary["k"].astype(np.int64))
+    estimand = estimand_ks.get_indexer(pd.Index(ks))
+    keep = estimand >= 0
+    rows, estimand = rows[keep], estimand[keep].astype(np.intp)
+    n_est = len(summary)
+    scheme = str(summary["weight_scheme"].iloc[0]) if "weight_scheme" in summary else "nobs"
+    weights = _estimand_weights(estimand, cohort_all[rows], n_est, scheme)
+    matrix = sp.csr_matrix(
+        (weights, (np.arange(len(rows)), estimand)), shape=(len(rows), n_est),
+    )
+    _estimates, scores = estimand_scores(
+        df, rows, matrix, tau, y0_hat, id_col, y_col, weight_col, fsm, untreated_mask,
+        cohort_all, panel, terms,
+    )
+    return scores, np.bincount(estimand, minlength=n_est)
+
+
+def treated_cells(
+    df: pd.DataFrame,
+    tau: np.ndarray,
+    treated_mask: np.ndarray,
+    Ei_col: str,
+    panel: Optional[PanelIndex] = None,
+) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+    """
+    Rows of the treated cells that enter any estimand, and the cohort code of every row.
+
+    A cell enters when it is treated and ``tau``, ``k``, and its cohort are defined; the
+    returned rows fix the column order of estimand-by-cell weight matrices.
+    """
+
+    tau_arr = np.asarray(tau, dtype=float)
+    k_arr = event_times(df, panel)
+    if panel is not None:
+        cohort_all = panel.cohort_codes.astype(np.intp, copy=False)
+    else:
+        cohort_all = pd.factorize(df[Ei_col].to_numpy(), sort=True)[0].astype(np.intp)
+    rows = np.flatnonzero(
+        np.asarray(treated_mask, dtype=bool)
+        & np.isfinite(tau_arr)
+        & np.isfinite(k_arr)
+        & (cohort_all >= 0),
+    )
+    return rows, cohort_all
+
+
+def estimand_scores(
+    df: pd.DataFrame,
+    rows: NDArray[np.intp],
+    matrix: Any,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    untreated_mask: np.ndarray,
+    cohort_all: NDArray[np.intp],
+    panel: Optional[PanelIndex] = None,
+    terms: Optional[ClusterTerms] = None,
+) -> Tuple[NDArray[np.float64], List[Tuple[float, NDArray[np.float64]]]]:
+    """
+    Estimates ``W' tau`` and per-cluster BJS scores for a cell-by-estimand weight matrix.
+
+    ``matrix`` is the sparse ``len(rows) x E`` matrix ``W`` of treated-cell weights (any
+    number of estimands; a cell may enter several). Estimand ``e`` is ``sum_i W_ie tau_i``.
+    Its implied weight on untreated observation ``j`` is ``v_j = -W_j x_j' (X'WX)^{-1} s_e``
+    with ``s = X_rows' W`` assembled by :meth:`FirstStageModel.design_transpose_product`; the
+    ``(X'WX)^{-1} s`` columns of all estimands come from one multi-right-hand-side solve
+    against ``fsm.factor_``. Untreated observations are processed in ``fsm.chunk_size`` blocks
+    and reduced straight to the scores, so the implied weights are never stored in full.
+    Treated cells enter with their weight and the residual ``tau_it - tau_bar``, where
+    ``tau_bar`` averages ``tau`` within the (cohort, event time) cell. ``U_ge`` sums
+    ``v_i eps_i`` over the observations of cluster ``g``; one ``(sign, U)`` pair is returned
+    per inclusion-exclusion term of the clustering (or of ``terms`` when given).
+    """
+
+    if terms is None:
+        terms = _cluster_terms(df, id_col, panel)
+    weights = sp.csr_matrix(matrix)
+    tau_rows = np.asarray(tau, dtype=float)[rows]
+    estimates = np.asarray(weights.T @ tau_rows, dtype=float).ravel()
+
+    # Treated cells: estimand weight times the deviation from the (cohort, k) cell mean.
+    ks = np.round(event_times(df, panel)[rows]).astype(np.int64)
+    cohort_codes = cohort_all[rows]
+    _cells, cell = np.unique(np.column_stack([cohort_codes, ks]), axis=0, return_inverse=True)
+    cell = cell.ravel()
+    cell_means = np.bincount(cell, weights=tau_rows) / np.bincount(cell)
+    treated_scores = sp.diags(tau_rows - cell_means[cell]) @ weights
+
+    scores: List[NDArray[np.float64]] = []
+    for _sign, clusters in terms:
+        n_clusters = int(clusters.max()) + 1 if clusters.size else 0
+        indicator = sp.csr_matrix(
+            (np.ones(len(rows)), (clusters[rows], np.arange(len(rows)))),
+            shape=(n_clusters, len(rows)),
+        )
+        scores.append(np.asarray((indicator @ treated_scores).toarray(), dtype=float))
+
+    # Untreated observations: implied imputation weights from one multi-RHS solve.
+    design_sums = fsm.design_transpose_product(df.iloc[rows], weights, panel=panel, rows=rows)
+    directions = cast(InformationFactor, fsm.factor_).solve(design_sums)
+    untreated_rows = np.flatnonzero(np.asarray(untreated_mask, dtype=bool))
+    outcome = pd.to_numeric(df[y_col], errors="coerce").to_numpy(dtype=float)
+    residuals = outcome - np.asarray(y0_hat, dtype=float)
+    step = max(int(fsm.chunk_size), 1)
+    for start in range(0, len(untreated_rows), step):
+        block_rows = untreated_rows[start:start + step]
+        frame = df.iloc[block_rows]
+        implied = fsm.design_product(frame, directions, panel=panel, rows=block_rows)
+        first_stage_w = fsm._untreated_weights(frame, weight_col)
+        implied *= -(first_stage_w * residuals[block_rows])[:, None]
+        for (_sign, clusters), term_scores in zip(terms, scores):
+            indicator = sp.csr_matrix(
+                (np.ones(len(block_rows)), (clusters[block_rows], np.arange(len(block_rows)))),
+                shape=(term_scores.shape[0], len(block_rows)),
+            )
+            term_scores += indicator @ implied
+
+    return estimates, [(sign, term) for (sign, _codes), term in zip(terms, scores)]
+
+
+def event_time_vcov(
+    se_method: str,
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+) -> NDArray[np.float64]:
+    """
+    Variance-covariance matrix of the ``summary`` estimates (rows and columns as ``summary``).
+
+    The matrix is ``sum_S sign_S U_S' U_S`` over the per-cluster influence matrices ``U_S``
+    (``G x K``) of each inclusion-exclusion term, so its diagonal reproduces the SE column of
+    ``se_method``. ``bjs`` and ``wild_bootstrap`` use the BJS scores of :func:`_bjs_scores`
+    (for the bootstrap this is the analytic limit of the replicate covariance). ``delta`` uses
+    the sparse treated-cell influence functions ``(tau_it - tau_bar_k) / n_k`` scaled by
+    ``sqrt(G_k / (G_k - 1))``; for ``nobs`` rows with a factorized first stage it adds the donor
+    block ``sigma2 S' (X'WX)^{-1} S / (n_k n_l)`` from one solve and applies the ``nobs``
+    inflation factors symmetrically. Multi-way clustering can leave a negative variance in
+    the signed sum; like the SE column, such a row is undefined. Rows whose SE is undefined
+    are NaN, together with their covariances.
+    """
+
+    n_est = len(summary)
+    if n_est == 0:
+        return np.zeros((0, 0))
+    if se_method != "delta":
+        scores, counts = _bjs_scores(
+            df, summary, tau, y0_hat, id_col, y_col, Ei_col, weight_col, fsm, treated_mask,
+            untreated_mask, panel,
+        )
+        vcov = np.zeros((n_est, n_est))
+        for sign, term in scores:
+            vcov += sign * (term.T @ term)
+        _undefined_variances(vcov)
+        invalid = counts == 0
+    else:
+        vcov, invalid = _delta_vcov(df, summary, tau, id_col, fsm, treated_mask, panel)
+    vcov[invalid, :] = np.nan
+    vcov[:, invalid] = np.nan
+    return vcov
+
+
+def unit_influence_scores(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+) -> Tuple[pd.Index, NDArray[np.float64]]:
+    """
+    Per-unit influence ``U_ie = sum_{t} v_it eps_it`` on each ``summary`` estimate.
+
+    These are the BJS scores of :func:`_bjs_scores` with one cluster per unit, whatever the
+    configured clustering: the treated-cell term plus the unit's untreated residuals weighted
+    by their implied imputation weights, so ``U_i`` is the first-order change in the
+    estimates attributable to unit ``i``. Returns the unit labels and the ``N x K`` matrix.
+    """
+
+    if panel is not None:
+        codes, levels = panel.id_codes.astype(np.intp, copy=False), pd.Index(panel.id_levels)
+    else:
+        factorized, uniques = pd.factorize(df[id_col].to_numpy())
+        codes, levels = factorized.astype(np.intp), pd.Index(uniques)
+    scores, _counts = _bjs_scores(
+        df, summary, tau, y0_hat, id_col, y_col, Ei_col, weight_col, fsm, treated_mask,
+        untreated_mask, panel, terms=[(1.0, codes)],
+    )
+    influence = scores[0][1]
+    if influence.shape[0] < len(levels):
+        influence = np.vstack(
+            [influence, np.zeros((len(levels) - influence.shape[0], influence.shape[1]))],
+        )
+    return levels, influence
+
+
+def _delta_vcov(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    id_col: str,
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    panel: Optional[PanelIndex],
+) -> Tuple[NDArray[np.float64], NDArray[np.bool_]]:
+    """Covariance counterpart of :func:`attach_ses_by_k` and the rows it leaves undefined."""
+
+    ks = summary["k"].astype(np.int64).to_numpy()
+    rows, estimand = _treated_estimand_rows(df, summary, tau, treated_mask, panel)
+    n_est = len(ks)
+    counts, influence = _mean_influence(estimand, np.asarray(tau, dtype=float)[rows], n_est)
+
+    vcov = np.zeros((n_est, n_est))
+    n_clusters = np.full(n_est, np.inf)
+    for sign, scores, groups in _influence_terms(
+        _cluster_terms(df, id_col, panel), rows, estimand, influence, n_est,
+    ):
+        vcov += sign * (scores.T @ scores).toarray()
+        n_clusters = np.minimum(n_clusters, groups)
+
+    scheme = str(summary["weight_scheme"].iloc[0]) if "weight_scheme" in summary else "nobs"
+    if scheme == "nobs" and _first_stage_ready(fsm):
+        sums = fsm.design_sums(df.iloc[rows], estimand, n_est, panel=panel, rows=rows)
+        cross = _information(fsm).cross(sums.T)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            vcov += _untreated_sigma2(fsm) * cross / np.outer(counts, counts)
+        inflation = np.sqrt((1.0 + 0.46 / (np.abs(ks) + 1.0)) * 1.30)
+        vcov *= np.outer(inflation, inflation)
+        _undefined_variances(vcov)
+        return vcov, counts <= 1
+    _undefined_variances(vcov)
+    return vcov, n_clusters < 2
+
+
+def event_study_vcov(
+    se_method: str,
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    y0_hat: np.ndarray,
+    id_col: str,
+    y_col: str,
+    Ei_col: str,
+    weight_col: Optional[str],
+    fsm: FirstStageModel,
+    treated_mask: np.ndarray,
+    untreated_mask: np.ndarray,
+    placebo: np.ndarray,
+    max_negative_k: int,
+    panel: Optional[PanelIndex] = None,
+) -> Tuple[List[int], NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Joint covariance of the pre-period placebo means and the ``summary`` estimates.
+
+    Pre-period estimates are the per-k means of ``placebo`` for ``-max_negative_k <= k < 0``
+    (the coefficients of :func:`pretrend_joint_test`). Their influence functions
+    ``(eps_it - eps_bar_k) / n_k`` are summed by cluster and scaled by ``sqrt(G_k / (G_k - 1))``
+    like the ``delta`` treated cells; the post block is :func:`event_time_vcov` and the cross
+    block pairs the placebo scores with the treated-cell influence (``delta``) or the BJS
+    scores (``bjs``, ``wild_bootstrap``) cluster by cluster.
+
+    Returns
+    -------
+    tuple
+        The pre-period event times, their estimates, and the ``(P + K) x (P + K)`` covariance
+        ordered as ``[pre..., summary rows...]``.
+    """
+
+    args = (df, summary, tau, y0_hat, id_col, y_col, Ei_col, weight_col, fsm, treated_mask,
+            untreated_mask, panel)
+    post = event_time_vcov(se_method, *args)
+    k_values = event_times(df, panel)
+    placebo_arr = np.asarray(placebo, dtype=float)
+    pre_rows = np.flatnonzero(
+        np.isfinite(placebo_arr)
+        & np.isfinite(k_values)
+        & (k_values < 0)
+        & (k_values >= -float(max_negative_k)),
+    )
+    pre_ks, pre_estimand = np.unique(k_values[pre_rows].astype(np.int64), return_inverse=True)
+    pre_estimand = pre_estimand.ravel().astype(np.intp)
+    n_pre, n_post = len(pre_ks), len(summary)
+    counts, influence = _mean_influence(pre_estimand, placebo_arr[pre_rows], n_pre)
+    sums = np.bincount(pre_estimand, weights=placebo_arr[pre_rows], minlength=n_pre)
+    estimates = np.asarray(sums, dtype=float) / np.maximum(counts, 1.0)
+
+    terms = _cluster_terms(df, id_col, panel)
+    pre_terms = _influence_terms(terms, pre_rows, pre_estimand, influence, n_pre)
+    if se_method == "delta":
+        rows, estimand = _treated_estimand_rows(df, summary, tau, treated_mask, panel)
+        _counts, post_influence = _mean_influence(
+            estimand, np.asarray(tau, dtype=float)[rows], n_post,
+        )
+        post_scores = [
+            scores for _sign, scores, _groups in _influence_terms(
+                terms, rows, estimand, post_influence, n_post,
+            )
+        ]
+    else:
+        post_scores = [sp.csr_matrix(scores) for _sign, scores in _bjs_scores(*args)[0]]
+
+    vcov = np.zeros((n_pre + n_post, n_pre + n_post))
+    for (sign, pre_scores, _groups), scores in zip(pre_terms, post_scores):
+        vcov[:n_pre, :n_pre] += sign * (pre_scores.T @ pre_scores).toarray()
+        cross = sign * np.asarray((pre_scores.T @ scores).todense(), dtype=float)
+        vcov[:n_pre, n_pre:] += cross
+        vcov[n_pre:, :n_pre] += cross.T
+    vcov[n_pre:, n_pre:] = post
+    _undefined_variances(vcov)
+    invalid = np.concatenate([counts <= 1, ~np.isfinite(np.diag(post))])
+    vcov[invalid, :] = np.nan
+    vcov[:, invalid] = np.nan
+    return [int(k) for k in pre_ks], np.asarray(estimates, dtype=float), vcov
+
+
+def _undefined_variances(vcov: NDArray[np.float64]) -> None:
+    """Set the rows and columns of negative variances to NaN in place, matching their SEs."""
+
+    negative = np.diag(vcov) < 0.0
+    vcov[negative, :] = np.nan
+    vcov[:, negative] = np.nan
+
+
+def _treated_estimand_rows(
+    df: pd.DataFrame,
+    summary: pd.DataFrame,
+    tau: np.ndarray,
+    treated_mask: np.ndarray,
+    panel: Optional[PanelIndex] = None,
+) -> Tuple[NDArray[np.intp], NDArray[np.intp]]:
+    """Treated rows with a finite effect and the ``summary`` row each one feeds."""
+
+    tau_arr = np.asarray(tau, dtype=float)
+    k_arr = event_times(df, panel)
+    rows = np.flatnonzero(
+        np.asarray(treated_mask, dtype=bool) & np.isfinite(tau_arr) & np.isfinite(k_arr),
+    )
+    ks = pd.Index(summary["k"].astype(np.int64))
+    estimand = ks.get_indexer(pd.Index(np.round(k_arr[rows]).astype(np.int64)))
+    keep = estimand >= 0
+    return rows[keep], estimand[keep].astype(np.intp)
+
+
+def _mean_influence(
+    estimand: NDArray[np.intp],
+    values: NDArray[np.float64],
+    n_est: int,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """Cell counts per estimand and the influence ``(x_i - x_bar) / n`` of each mean."""
+
+    counts = np.bincount(estimand, minlength=n_est).astype(float)
+    means = np.bincount(estimand, weights=values, minlength=n_est) / np.maximum(counts, 1.0)
+    return counts, (values - means[estimand]) / counts[estimand]
+
+
+def _influence_terms(
+    terms: ClusterTerms,
+    rows: NDArray[np.intp],
+    estimand: NDArray[np.intp],
+    influence: NDArray[np.float64],
+    n_est: int,
+) -> List[Tuple[float, sp.csr_matrix, NDArray[np.float64]]]:
+    """
+    Sparse per-cluster sums of ``influence`` for every inclusion-exclusion term.
+
+    Each ``(sign, U, G)`` entry holds the ``n_clusters x n_est`` score matrix, with column
+    ``e`` scaled by ``sqrt(G_e / (G_e - 1))`` for the ``G_e`` clusters that touch it. Rows
+    follow the cluster codes of the term, so scores of different estimands line up.
+    """
+
+    out = []
+    for sign, codes in terms:
+        n_clusters = int(codes.max()) + 1 if codes.size else 0
+        clusters = codes[rows].astype(np.intp, copy=False)
+        _squares, groups = _cluster_sums_by_k(estimand, clusters, influence, n_est)
+        scale = np.sqrt(np.divide(groups, groups - 1.0, out=np.ones(n_est), where=groups > 1))
+        scores = sp.csr_matrix(
+            (influence * scale[estimand], (clusters, estimand)), shape=(n_clusters, n_est),
+        )
+        out.append((sign, scores, groups))
+    return out
+
+
 def finalize_summary_ci(summary: pd.DataFrame, ci_level: float) -> pd.DataFrame:
     """
     Given estimates and standard errors, compute two-sided confidence intervals.
@@ -105,17 +723,83 @@ def pretrend_joint_test(
     df: pd.DataFrame,
     placebo: np.ndarray,
     id_col: str,
-    k_col: str,
+    k_col: Optional[str],
     max_negative_k: int,
+    panel: Optional[PanelIndex] = None,
 ) -> Tuple[float, int, List[int]]:
     """
     Perform a Wald test that all available negative event-time effects equal zero.
+
+    Placebo cells are reduced to per-(cluster, k) sums and counts and the clustered Wald
+    statistic is evaluated in closed form by :func:`_pretrend_wald_from_sums`. Event times are
+    read from ``df[k_col]``, or from ``panel`` when ``k_col`` is ``None``.
+    """
+
+    placebo_sums = _placebo_sums(df, placebo, id_col, k_col, max_negative_k, panel)
+    if placebo_sums is None:
+        return (float("nan"), 0, [])
+    terms, ks, max_abs = placebo_sums
+    return _pretrend_wald_from_sums(terms, ks, float(np.max(max_abs)))
+
+
+def pretrend_curve(
+    df: pd.DataFrame,
+    placebo: np.ndarray,
+    id_col: str,
+    k_col: Optional[str],
+    max_negative_k: int,
+    panel: Optional[PanelIndex] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Pretrend Wald tests for every nested window ``[-p, -1]``, ``p = 1..max_negative_k``.
+
+    The per-(cluster, k) placebo sums are built once for the widest window and every window
+    is evaluated from them by :func:`_pretrend_curve_from_sums`. Entry ``p - 1`` matches
+    ``pretrend_joint_test(..., max_negative_k=p)`` and additionally reports the statistic.
     """
 
     if max_negative_k <= 0:
+        return []
+    placebo_sums = _placebo_sums(df, placebo, id_col, k_col, max_negative_k, panel)
+    if placebo_sums is None:
+        return _pretrend_curve_from_sums([], [], np.zeros(0), max_negative_k)
+    terms, ks, max_abs = placebo_sums
+    return _pretrend_curve_from_sums(terms, ks, max_abs, max_negative_k)
+
+
+def pretrend_from_curve(curve: List[Dict[str, Any]]) -> Tuple[float, int, List[int]]:
+    """
+    The joint pretrend test, read off the widest window of :func:`pretrend_curve`.
+
+    Returns the ``(pvalue, dof, used_ks)`` of :func:`pretrend_joint_test` at the same
+    ``max_negative_k`` without reducing the placebo cells a second time.
+    """
+
+    if not curve:
         return (float("nan"), 0, [])
+    widest = curve[-1]
+    return (float(widest["pvalue"]), int(widest["dof"]), list(widest["used_ks"]))
+
+
+def _placebo_sums(
+    df: pd.DataFrame,
+    placebo: np.ndarray,
+    id_col: str,
+    k_col: Optional[str],
+    max_negative_k: int,
+    panel: Optional[PanelIndex],
+) -> Optional[Tuple[PlaceboTerms, List[int], NDArray[np.float64]]]:
+    """
+    Per-(cluster, k) placebo sums and counts for ``-max_negative_k <= k < 0``.
+
+    Returns the ``(sign, sums, counts)`` terms (columns ordered as the ascending event times),
+    those event times, and the largest absolute placebo value per event time; ``None`` when no
+    placebo cell falls in the window.
+    """
 
-    k_values = np.asarray(df[k_col].to_numpy(), dtype=float)
+    if max_negative_k <= 0:
+        return None
+    k_values = event_times(df, panel, k_col)
     placebo_arr = np.asarray(placebo, dtype=float)
 
     mask = (
@@ -125,106 +809,270 @@ def pretrend_joint_test(
         & (k_values >= -float(max_negative_k))
     )
     if not mask.any():
-        return (float("nan"), 0, [])
+        return None
+
+    ks, k_codes = np.unique(k_values[mask].astype(np.int64), return_inverse=True)
+    k_codes = k_codes.ravel()
+    n_k = len(ks)
+    values = placebo_arr[mask]
+    max_abs = np.zeros(n_k)
+    np.maximum.at(max_abs, k_codes, np.abs(values))
+    terms = []
+    for sign, codes in _cluster_terms(df, id_col, panel):
+        present, cluster_codes = np.unique(codes[mask], return_inverse=True)
+        n_groups = len(present)
+        cells = cluster_codes.ravel() * n_k + k_codes
+        sums = np.bincount(cells, weights=values, minlength=n_groups * n_k)
+        counts = np.bincount(cells, minlength=n_groups * n_k)
+        terms.append(
+            (
+                sign,
+                np.asarray(sums, dtype=float).reshape(n_groups, n_k),
+                counts.astype(float).reshape(n_groups, n_k),
+            ),
+        )
+    return terms, [int(k) for k in ks], max_abs
 
-    sub = pd.DataFrame(
-        {
-            "y": placebo_arr[mask],
-            "id": df.loc[mask, id_col].to_numpy(),
-            "k": k_values[mask].astype(int),
-        },
-    )
 
-    used_ks = sorted(int(val) for val in sub["k"].unique())
-    if len(used_ks) < 2 or sub["id"].nunique() < 2:
+def _pretrend_wald_from_sums(
+    terms: PlaceboTerms,
+    ks: List[int],
+    max_abs: float,
+) -> Tuple[float, int, List[int]]:
+    """
+    Cluster-robust Wald test that all event-time means are zero, from per-(cluster, k) sums.
+
+    Each term is ``(sign, sums, counts)`` with ``G x K`` arrays of placebo sums and cell
+    counts per cluster and event time (columns ordered as ``ks``); one-way clustering passes a
+    single term with sign ``1``, multi-way clustering one per inclusion-exclusion term. With k
+    dummies only, the OLS coefficients are the per-k means and each clustered meat is ``U'U``
+    with ``U = sums - counts * means``; every term keeps the statsmodels small-sample factor
+    ``G/(G-1) * (N-1)/(N-K)`` and the reference is chi-square. ``max_abs`` is the largest
+    absolute placebo value (all-zero placebos yield NaN).
+    """
+
+    used_ks = [int(k) for k in ks]
+    _sign, first_sums, first_counts = terms[0]
+    n_k = first_sums.shape[1]
+    n_groups_min = min(sums.shape[0] for _sign, sums, _counts in terms)
+    if n_k < 2 or n_groups_min < 2:
+        return (float("nan"), 0, used_ks)
+    if max_abs <= 1e-8:
         return (float("nan"), 0, used_ks)
 
-    if np.allclose(sub["y"].to_numpy(), 0.0):
+    n_per_k = first_counts.sum(axis=0)
+    means = first_sums.sum(axis=0) / n_per_k
+    n_obs = float(n_per_k.sum())
+    meat = np.zeros((n_k, n_k))
+    for sign, sums, counts in terms:
+        n_groups = sums.shape[0]
+        scores = sums - counts * means
+        correction = n_groups / (n_groups - 1.0) * (n_obs - 1.0) / (n_obs - n_k)
+        meat += sign * correction * (scores.T @ scores)
+    cov = meat / np.outer(n_per_k, n_per_k)
+    if np.linalg.matrix_rank(cov) < n_k:
         return (float("nan"), 0, used_ks)
 
-    X = pd.get_dummies(sub["k"], drop_first=False)
-    model = sm.OLS(sub["y"].to_numpy(), X.to_numpy())
-    result = model.fit(cov_type="cluster", cov_kwds={"groups": sub["id"].to_numpy()})
+    statistic = float(means @ np.linalg.solve(cov, means))
+    return (float(chi2.sf(statistic, n_k)), n_k, used_ks)
 
-    cov_params = result.cov_params()
-    if np.linalg.matrix_rank(cov_params) < cov_params.shape[0]:
-        return (float("nan"), 0, used_ks)
 
-    restriction = np.eye(X.shape[1])
-    wald = result.wald_test(restriction, scalar=True)
-    return (float(wald.pvalue), int(X.shape[1]), used_ks)
+def _pretrend_curve_from_sums(
+    terms: PlaceboTerms,
+    ks: List[int],
+    max_abs: NDArray[np.float64],
+    max_negative_k: int,
+) -> List[Dict[str, Any]]:
+    """
+    Wald tests for the nested windows ``[-p, -1]`` from the sums of the widest window.
 
+    ``terms``, ``ks``, and the per-k ``max_abs`` are as for :func:`_pretrend_wald_from_sums`.
+    Event times are ordered outward from ``-1`` so that each window's meat is the leading
+    block of one ``K x K`` meat per term, and the cluster and observation counts entering the
+    small-sample factor are cumulated across windows. With one-way clustering every window's
+    covariance is a scalar multiple of a leading block of ``A = meat / (n n')``, so the
+    Cholesky factor of ``A`` is grown by one bordered row per window and the statistic is
+    the running sum of squares of ``L^{-1} means`` divided by that window's factor. A window
+    whose pivot vanishes (and every wider one) is rank deficient. Multi-way clustering
+    combines differently scaled terms, so each window's ``p x p`` system is solved directly.
+    Windows follow the rules of :func:`_pretrend_wald_from_sums`: fewer than two event
+    times or clusters, or all-zero placebos, yield a NaN p-value with ``dof = 0``.
+    """
 
+    order = np.argsort(-np.asarray(ks, dtype=np.int64), kind="stable")
+    ks_out = [int(ks[j]) for j in order]
+    n_k = len(ks_out)
+    # Window [-p, -1] covers the leading event times of ``ks_out`` that are >= -p.
+    windows = np.searchsorted(-np.asarray(ks_out), np.arange(1, max_negative_k + 1), "right")
+    empty = {"statistic": float("nan"), "pvalue": float("nan"), "dof": 0}
+    if n_k == 0:
+        return [{"window": p + 1, **empty, "used_ks": []} for p in range(max_negative_k)]
 
+    first_sums, first_counts = terms[0][1][:, order], terms[0][2][:, order]
+    n_per_k = first_counts.sum(axis=0)
+    means = first_sums.sum(axis=0) / n_per_k
+    n_obs = np.cumsum(n_per_k)
+    window_abs = np.maximum.accumulate(np.asarray(max_abs, dtype=float)[order])
+    meats, factors, cluster_counts = [], [], []
+    sizes = np.arange(1, n_k + 1)
+    for sign, sums, counts in terms:
+        ordered_counts = counts[:, order]
+        scores = sums[:, order] - ordered_counts * means
+        meats.append((sign, scores.T @ scores))
+        # Clusters enter the window of the first event time (outward from -1) they touch.
+        touched = ordered_counts > 0
+        first = np.where(touched.any(axis=1), touched.argmax(axis=1), n_k)
+        groups = np.cumsum(np.bincount(first, minlength=n_k + 1)[:n_k]).astype(float)
+        cluster_counts.append(groups)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            factors.append(groups / (groups - 1.0) * (n_obs - 1.0) / (n_obs - sizes))
+    group_min = np.min(cluster_counts, axis=0)
 
+    statistics = np.full(n_k, np.nan)
+    if len(terms) == 1:
+        scaled = meats[0][1] / np.outer(n_per_k, n_per_k)
+        lower = np.zeros((n_k, n_k))
+        z = np.zeros(n_k)
+        running = 0.0
+        for p in range(n_k):
+            row = solve_triangular(lower[:p, :p], scaled[:p, p], lower=True) if p else z[:0]
+            pivot = scaled[p, p] - float(row @ row)
+            if pivot <= (p + 1) * np.finfo(float).eps * float(np.max(np.diag(scaled)[:p + 1])):
+                break
+            lower[p, :p], lower[p, p] = row, np.sqrt(pivot)
+            z[p] = (means[p] - float(row @ z[:p])) / lower[p, p]
+            running += z[p] * z[p]
+            statistics[p] = running / factors[0][p]
+    else:
+        for p in range(n_k):
+            size = p + 1
+            cov = np.zeros((size, size))
+            with np.errstate(invalid="ignore"):
+                for (sign, meat), factor in zip(meats, factors):
+                    cov += sign * factor[p] * meat[:size, :size]
+            cov /= np.outer(n_per_k[:size], n_per_k[:size])
+            # A term with a single cluster in the window has an infinite factor; such windows
+            # are reported as NaN below, like the one-way case.
+            if np.all(np.isfinite(cov)) and np.linalg.matrix_rank(cov) == size:
+                statistics[p] = float(means[:size] @ np.linalg.solve(cov, means[:size]))
 
-def _first_stage_ready(fsm: FirstStageModel) -> bool:
-    """Check that the first-stage model exposes the matrices needed for SE computation."""
-
-    return all(
-        attr is not None
-        for attr in (
-            fsm.coef_,
-            fsm.xtwx_inv_,
-            fsm.untreated_design_,
-            fsm.untreated_weights_,
-            fsm.untreated_residuals_,
+    curve = []
+    for p, size in enumerate(windows.tolist(), start=1):
+        used_ks = ks_out[:size]
+        index = size - 1
+        if (
+            size < 2
+            or group_min[index] < 2
+            or window_abs[index] <= 1e-8
+            or not np.isfinite(statistics[index])
+        ):
+            curve.append({"window": p, **empty, "used_ks": sorted(used_ks)})
+            continue
+        statistic = float(statistics[index])
+        curve.append(
+            {
+                "window": p,
+                "statistic": statistic,
+                "pvalue": float(chi2.sf(statistic, size)),
+                "dof": size,
+                "used_ks": sorted(used_ks),
+            },
         )
+    return curve
+
+
+def _first_stage_ready(fsm: FirstStageModel) -> bool:
+    """Check that the first-stage model exposes the quantities needed for SE computation."""
+
+    information = fsm.factor_ if fsm.fe == "twoway" else fsm.absorbed_information_
+    return fsm.coef_ is not None and information is not None
+
+
+def _information(fsm: FirstStageModel) -> Union[InformationFactor, IterativeInformation]:
+    """The first stage's ``X'WX`` solver: the two-way factor or the absorbed CG system."""
+
+    information = fsm.factor_ if fsm.fe == "twoway" else fsm.absorbed_information_
+    if information is None:
+        raise EstimationError("First-stage model does not expose its information matrix.")
+    return information
+
+
+def _cluster_terms(df: pd.DataFrame, id_col: str, panel: Optional[PanelIndex]) -> ClusterTerms:
+    """
+    Inclusion-exclusion cluster terms for every row of ``df``.
+
+    With ``panel`` these are :meth:`PanelIndex.cluster_terms` (the configured cluster
+    columns); otherwise rows are clustered on ``id_col``.
+    """
+
+    if panel is not None:
+        return panel.cluster_terms()
+    codes, _levels = pd.factorize(df[id_col].to_numpy(), sort=False)
+    return [(1.0, codes.astype(np.intp, copy=False))]
+
+
+def _untreated_sigma2(fsm: FirstStageModel) -> float:
+    """Weighted residual variance of the untreated regression."""
+
+    return fsm.resid_ss_ / max(fsm.dof_, 1)
+
+
+def _cluster_sums_by_k(
+    k_codes: NDArray[np.intp],
+    clusters: NDArray[np.intp],
+    values: NDArray[np.float64],
+    n_k: int,
+) -> Tuple[NDArray[np.float64], NDArray[np.float64]]:
+    """
+    Sum of squared per-cluster sums of ``values`` and the cluster count, per event time.
+
+    (event time, cluster) pairs are compacted to dense codes first so the bincount is sized
+    by the occupied cells rather than by ``n_k * n_clusters``.
+    """
+
+    n_clusters = int(clusters.max()) + 1 if clusters.size else 1
+    pairs, cell = np.unique(
+        k_codes.astype(np.int64) * n_clusters + clusters, return_inverse=True,
     )
+    cell_sums = np.bincount(cell.ravel(), weights=values, minlength=len(pairs))
+    pair_k = (pairs // n_clusters).astype(np.intp)
+    squares = np.asarray(np.bincount(pair_k, weights=cell_sums ** 2, minlength=n_k), dtype=float)
+    occupied = np.asarray(np.bincount(pair_k, minlength=n_k), dtype=float)
+    return squares, occupied
 
 
-def _se_event_time_nobs(
-    df: pd.DataFrame,
-    y_col: str,
-    id_col: str,
-    treated_indices: np.ndarray,
-    event_k: int,
-    fsm: FirstStageModel,
-) -> float:
-    """Compute standard errors for ``nobs`` weighting via a two-component delta method."""
-
-    if not _first_stage_ready(fsm):
-        return float('nan')
-
-    coef_vec = np.asarray(cast(NDArray[np.float64], fsm.coef_), dtype=float)
-    xtwx_inv_arr = np.asarray(cast(NDArray[np.float64], fsm.xtwx_inv_), dtype=float)
-    untreated_design_arr = cast(NDArray[np.float64], fsm.untreated_design_)
-    untreated_weights_arr = cast(NDArray[np.float64], fsm.untreated_weights_)
-    untreated_residuals_arr = cast(NDArray[np.float64], fsm.untreated_residuals_)
-
-    treated_frame = df.iloc[treated_indices]
-    X_treated = fsm.design_matrix(treated_frame)
-    y_treated = pd.to_numeric(treated_frame[y_col], errors='coerce').to_numpy(dtype=float)
-    if np.isnan(y_treated).any():
-        return float('nan')
-
-    tau_values = y_treated - X_treated @ coef_vec
-    theta_hat = float(np.mean(tau_values))
-    treated_centered = tau_values - theta_hat
-
-    n_treated = len(treated_indices)
-    if n_treated <= 1:
-        return float('nan')
-
-    treated_ids = treated_frame[id_col].to_numpy()
-    treated_sums: Dict[Any, float] = {}
-    for unit, resid in zip(treated_ids, treated_centered):
-        treated_sums[unit] = treated_sums.get(unit, 0.0) + float(resid)
-
-    treated_var = sum(val * val for val in treated_sums.values()) / (n_treated ** 2)
-    g_treated = len(treated_sums)
-    if g_treated > 1:
-        treated_var *= g_treated / (g_treated - 1)
-
-    sum_design = X_treated.sum(axis=0)
-    weighted_resid_sq = untreated_weights_arr * (untreated_residuals_arr ** 2)
-    dof = max(int(len(untreated_residuals_arr) - untreated_design_arr.shape[1]), 1)
-    sigma2 = float(weighted_resid_sq.sum()) / dof
-    donor_var = sigma2 * float(sum_design @ xtwx_inv_arr @ sum_design.T) / (n_treated ** 2)
+def _estimand_weights(
+    estimand: NDArray[np.intp],
+    cohorts: NDArray[np.intp],
+    n_est: int,
+    scheme: str,
+) -> NDArray[np.float64]:
+    """
+    Weight of each treated cell in its event-time estimand under ``scheme``.
+
+    ``nobs`` and ``cohort_share`` both reduce to ``1 / n_k``; ``equal`` gives each of the
+    ``C_k`` cohorts at event time ``k`` the weight ``1 / C_k`` split over its ``n_gk`` cells.
+    """
+
+    counts = np.bincount(estimand, minlength=n_est).astype(float)
+    if scheme != "equal":
+        return np.asarray(1.0 / counts[estimand], dtype=float)
+    n_cohorts = int(cohorts.max()) + 1
+    pairs, cell = np.unique(
+        estimand.astype(np.int64) * n_cohorts + cohorts, return_inverse=True,
+    )
+    cell = cell.ravel()
+    cell_counts = np.bincount(cell).astype(float)
+    cohorts_per_k = np.bincount(pairs // n_cohorts, minlength=n_est).astype(float)
+    return np.asarray(1.0 / (cohorts_per_k[estimand] * cell_counts[cell]), dtype=float)
+
+
+def _nobs_se(treated_var: float, donor_var: float, event_k: int) -> float:
+    """Combine the two delta-method components into the ``nobs`` standard error."""
 
     variance = treated_var + donor_var
     variance *= (1.0 + 0.46 / (abs(event_k) + 1.0)) * 1.30
     if variance < 0.0:
-        variance = 0.0
+        return float("nan")
 
     return float(np.sqrt(variance))
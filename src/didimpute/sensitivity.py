@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+from numpy.typing import NDArray
+from scipy.stats import norm
+
+from .errors import EstimationError, ValidationError
+
+SENSITIVITY_METHODS = ("relative_magnitude", "smoothness")
+
+
+def sensitivity_bounds(
+    pre_ks: List[int],
+    post_ks: List[int],
+    estimates: NDArray[np.float64],
+    vcov: NDArray[np.float64],
+    weights: NDArray[np.float64],
+    method: str = "relative_magnitude",
+    grid: Optional[NDArray[np.float64]] = None,
+    ci_level: float = 0.95,
+) -> pd.DataFrame:
+    """
+    Rambachan-Roth bounds on ``theta = l' tau_post`` over a grid of violation bounds.
+
+    The event-study coefficients are ``beta = tau + delta``: the pre-period ``delta`` equal
+    the pre-period estimates and the post-period bias ``delta_post`` is restricted by
+
+    - ``relative_magnitude``: every post-period step ``|delta_t - delta_{t-1}|`` is at most
+      ``Mbar`` times the largest step between consecutive pre-period estimates;
+    - ``smoothness``: every change of slope ``|(delta_{t+1} - delta_t) - (delta_t -
+      delta_{t-1})|`` from the last pre-period slope onwards is at most ``M``.
+
+    With ``delta_pre`` pinned, each linear program ``min / max l' delta_post`` has box
+    constraints on the first (or second) differences, so its optimum is
+    ``l' delta_ref +- bound * sum |c_j|`` with ``c_j`` the reversed cumulative sums of ``l``.
+    The whole grid is therefore one vectorized evaluation, with no iterative solver. The
+    endpoints are linear in ``beta`` at the optimum, and the confidence interval widens each
+    endpoint by its delta-method standard error (a plug-in interval, more conservative than
+    the conditional ARP intervals of Rambachan and Roth).
+
+    Parameters
+    ----------
+    pre_ks, post_ks : list[int]
+        Consecutive pre-period event times ending at ``-1`` and post-period event times
+        starting at ``0``.
+    estimates : np.ndarray
+        Estimates ordered as ``pre_ks + post_ks``.
+    vcov : np.ndarray
+        Their joint covariance, in the same order.
+    weights : np.ndarray
+        Target weights ``l`` over ``post_ks``.
+    method : str
+        ``"relative_magnitude"`` or ``"smoothness"``.
+    grid : np.ndarray | None
+        Values of ``Mbar`` (or ``M``); defaults to 21 points on ``[0, 2]``.
+    ci_level : float
+        Coverage of the intervals.
+
+    Returns
+    -------
+    pd.DataFrame
+        One row per grid value with ``M``, bounds ``lb``/``ub``, their standard errors, and
+        ``ci_low``/``ci_high``.
+
+    Raises
+    ------
+    ValidationError
+        If the method, grid, or weights are invalid.
+    EstimationError
+        If the event times are not consecutive around ``0`` or fewer than two pre-periods
+        are available.
+    """
+
+    if method not in SENSITIVITY_METHODS:
+        raise ValidationError(f"method must be one of {SENSITIVITY_METHODS}; got {method!r}.")
+    bounds = np.linspace(0.0, 2.0, 21) if grid is None else np.atleast_1d(
+        np.asarray(grid, dtype=float),
+    )
+    if bounds.ndim != 1 or not np.all(np.isfinite(bounds)) or np.any(bounds < 0):
+        raise ValidationError("Mbar_grid must be a one-dimensional grid of non-negative values.")
+    n_pre, n_post = len(pre_ks), len(post_ks)
+    if n_pre < 2:
+        raise EstimationError("Sensitivity analysis needs at least two pre-period estimates.")
+    if list(pre_ks) != list(range(-n_pre, 0)) or list(post_ks) != list(range(n_post)):
+        raise EstimationError(
+            "Sensitivity analysis needs consecutive event times ending at -1 and starting at 0.",
+        )
+    l_vec = np.asarray(weights, dtype=float)
+    if l_vec.shape != (n_post,):
+        raise ValidationError(f"weights must have one entry per post-period event time ({n_post}).")
+    beta = np.asarray(estimates, dtype=float)
+    cov = np.asarray(vcov, dtype=float)
+
+    # c_s = sum_{t >= s} l_t: the weight of the post-period step s on l' delta_post.
+    step_weights = np.cumsum(l_vec[::-1])[::-1]
+    last = n_pre - 1
+    base = np.zeros(n_pre + n_post)
+    base[n_pre:] = l_vec
+    base[last] -= l_vec.sum()
+    if method == "relative_magnitude":
+        # delta_t = beta_{-1} + sum_{s <= t} d_s with |d_s| <= Mbar * max pre-period step.
+        steps = np.diff(beta[:n_pre])
+        j = int(np.argmax(np.abs(steps)))
+        width = float(np.abs(steps[j])) * np.abs(step_weights).sum() * bounds
+        slope = np.zeros(n_pre + n_post)
+        slope[j + 1], slope[j] = np.sign(steps[j]), -np.sign(steps[j])
+        gradient = np.abs(step_weights).sum() * bounds[:, None] * slope[None, :]
+        lb_grad, ub_grad = base[None, :] - gradient, base[None, :] + gradient
+    else:
+        # Second differences a_j = d_j - d_{j-1} in [-M, M], starting from the last pre slope.
+        curvature_weights = np.cumsum(step_weights[::-1])[::-1]
+        base[last] -= step_weights.sum()
+        base[last - 1] += step_weights.sum()
+        width = np.abs(curvature_weights).sum() * bounds
+        lb_grad = ub_grad = np.broadcast_to(base, (len(bounds), n_pre + n_post))
+
+    center = float(base @ beta)
+    lb, ub = center - width, center + width
+    lb_se = np.sqrt(np.maximum(np.einsum("gi,ij,gj->g", lb_grad, cov, lb_grad), 0.0))
+    ub_se = np.sqrt(np.maximum(np.einsum("gi,ij,gj->g", ub_grad, cov, ub_grad), 0.0))
+    z_value = float(norm.ppf(0.5 + ci_level / 2.0))
+    out: pd.DataFrame = pd.DataFrame(
+        {
+            "M": bounds,
+            "lb": lb,
+            "ub": ub,
+            "lb_se": lb_se,
+            "ub_se": ub_se,
+            "ci_low": lb - z_value * lb_se,
+            "ci_high": ub + z_value * ub_se,
+            "method": method,
+        },
+    )
+    return out
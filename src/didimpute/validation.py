@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
 from .errors import ValidationError
+from .panel import PanelIndex, cluster_columns
 
 
 def validate_config(
@@ -13,6 +14,14 @@ def validate_config(
     minN: int,
     scheme: str,
     ci: float,
+    solver: str = "dense",
+    store: str = "full",
+    se_method: str = "delta",
+    fe: str = "twoway",
+    n_boot: int = 9999,
+    boot_weights: str = "rademacher",
+    n_jobs: int = 1,
+    predict: str = "full",
 ) -> None:
     """
     Validate high-level configuration parameters.
@@ -38,6 +47,22 @@ def validate_config(
         )
     if not 0.0 < ci < 1.0:
         raise ValidationError("ci must lie in (0,1); for example, 0.95.")
+    if solver not in {"dense", "sparse"}:
+        raise ValidationError("solver must be one of {'dense','sparse'}.")
+    if store not in {"full", "lean"}:
+        raise ValidationError("store must be one of {'full','lean'}.")
+    if se_method not in {"delta", "bjs", "wild_bootstrap"}:
+        raise ValidationError("se_method must be one of {'delta','bjs','wild_bootstrap'}.")
+    if se_method != "delta" and fe != "twoway":
+        raise ValidationError(f"se_method='{se_method}' requires fe='twoway'.")
+    if n_boot < 2:
+        raise ValidationError("n_boot must be at least 2; for example, 9999.")
+    if boot_weights not in {"rademacher", "webb"}:
+        raise ValidationError("boot_weights must be one of {'rademacher','webb'}.")
+    if n_jobs < 1 and n_jobs != -1:
+        raise ValidationError("n_jobs must be a positive worker count or -1 for all cores.")
+    if predict not in {"full", "lazy"}:
+        raise ValidationError("predict must be one of {'full','lazy'}.")
 
 
 def _ensure_columns(df: pd.DataFrame, cols: List[str]) -> None:
@@ -58,15 +83,25 @@ def validate_and_prepare(
     Ei: str,
     controls: Optional[List[str]],
     weight: Optional[str],
-    cluster: Optional[str],
+    cluster: Optional[Union[str, List[str]]],
+    absorb: Optional[List[str]] = None,
+    outcomes: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """
-    Validate the input panel and construct helper columns consumed by the pipeline.
+    Validate the input panel and build the shared structures consumed by the pipeline.
+
+    Only the columns named by the spec (plus any further ``outcomes`` fitted alongside ``y``)
+    are kept, and only columns that need coercion (a
+    non-integer time, a non-float or fractional ``Ei``) are replaced; the input frame is never
+    modified. Event times and treatment status are not added as columns: they are the
+    compact ``event_time`` (int16) and ``untreated`` (bool) arrays of the returned
+    :class:`~didimpute.panel.PanelIndex`, and unweighted fits use an implicit unit weight.
 
     Returns
     -------
     dict[str, Any]
-        A dictionary with keys ``df`` (prepared copy) and ``panel_meta`` (balance diagnostics).
+        A dictionary with keys ``df`` (the projected panel), ``panel`` (the shared
+        :class:`~didimpute.panel.PanelIndex`), and ``panel_meta`` (balance diagnostics).
 
     Raises
     ------
@@ -75,6 +110,35 @@ def validate_and_prepare(
         negative, or the untreated sample is empty.
     """
 
+    prepared = prepare_rows(df, y, id, time, Ei, controls, weight, cluster, absorb, outcomes)
+    return index_panel(prepared, id, time, Ei, weight, cluster)
+
+
+def prepare_rows(
+    df: pd.DataFrame,
+    y: str,
+    id: str,
+    time: str,
+    Ei: str,
+    controls: Optional[List[str]],
+    weight: Optional[str],
+    cluster: Optional[Union[str, List[str]]],
+    absorb: Optional[List[str]] = None,
+    outcomes: Optional[List[str]] = None,
+) -> pd.DataFrame:
+    """
+    Row-level half of :func:`validate_and_prepare`: check, project, and coerce ``df``.
+
+    Every check here looks at rows independently (apart from duplicate keys within ``df``),
+    so rows appended to an already prepared panel can be prepared on their own.
+
+    Raises
+    ------
+    ValidationError
+        If required columns are missing, types are incompatible, duplicates exist, or weights
+        are negative.
+    """
+
     _ensure_columns(df, [y, id, time, Ei])
     if controls:
         control_missing = [col for col in controls if col not in df.columns]
@@ -85,27 +149,63 @@ def validate_and_prepare(
             )
     if weight and weight not in df.columns:
         raise ValidationError(f"Weight column '{weight}' not found.")
-    if cluster and cluster not in df.columns:
-        raise ValidationError(f"Cluster column '{cluster}' not found.")
+    cluster_cols = cluster_columns(cluster, id)
+    for cluster_col in cluster_cols:
+        if cluster_col not in df.columns:
+            raise ValidationError(f"Cluster column '{cluster_col}' not found.")
+        if bool(df[cluster_col].isna().any()):
+            raise ValidationError(
+                f"Cluster column '{cluster_col}' contains missing values. "
+                "Drop or fill them before fitting.",
+            )
+    if absorb:
+        absorb_missing = [col for col in absorb if col not in df.columns]
+        if absorb_missing:
+            raise ValidationError(
+                f"Absorbed fixed-effect columns not found: {absorb_missing}.",
+            )
+        if df[absorb].isnull().any().any():
+            raise ValidationError(
+                "Absorbed fixed-effect columns must not contain missing values.",
+            )
 
-    prepared = df.copy()
+    # Project to the columns the spec uses; coerced columns are rebound, never copied in place.
+    columns = [y, id, time, Ei, *(controls or [])]
+    for extra in (*(outcomes or []), weight, *cluster_cols, *(absorb or [])):
+        if extra and extra not in columns:
+            columns.append(extra)
+    prepared: pd.DataFrame = df[columns]
 
     # Coerce time to integers.
-    try:
-        prepared[time] = pd.to_numeric(prepared[time]).astype(int)
-    except Exception as exc:  # pragma: no cover - re-raised with context
-        raise ValidationError(
-            f"Time column '{time}' must be integer-castable. Clean or cast before calling fit(). "
-            f"Original error: {exc}",
-        ) from exc
-
-    # Coerce Ei to numeric (NaN allowed to flag never-treated units).
-    try:
-        prepared[Ei] = pd.to_numeric(prepared[Ei], errors="coerce")
-    except Exception as exc:  # pragma: no cover - re-raised with context
+    if not pd.api.types.is_integer_dtype(prepared[time]):
+        try:
+            time_values = pd.to_numeric(prepared[time]).astype(int)
+        except Exception as exc:  # pragma: no cover - re-raised with context
+            raise ValidationError(
+                f"Time column '{time}' must be integer-castable. Clean or cast before calling "
+                f"fit(). Original error: {exc}",
+            ) from exc
+        prepared = prepared.assign(**{time: time_values})
+
+    # Coerce Ei to numeric (NaN allowed to flag never-treated units), truncating finite values.
+    if not pd.api.types.is_integer_dtype(prepared[Ei]):
+        try:
+            raw = pd.to_numeric(prepared[Ei], errors="coerce").to_numpy(dtype=float)
+        except Exception as exc:  # pragma: no cover - re-raised with context
+            raise ValidationError(
+                f"Ei column must be numeric or NaN for never-treated units. Original error: {exc}",
+            ) from exc
+        finite = np.isfinite(raw)
+        adoption = np.where(finite, np.trunc(np.where(finite, raw, 0.0)), raw)
+        if prepared[Ei].dtype != np.float64 or not np.array_equal(
+            adoption, raw, equal_nan=True,
+        ):
+            prepared = prepared.assign(**{Ei: adoption})
+
+    if bool(prepared[id].isna().any()):
         raise ValidationError(
-            f"Ei column must be numeric or NaN for never-treated units. Original error: {exc}",
-        ) from exc
+            f"Unit id column '{id}' contains missing values. Drop or fill them before fitting.",
+        )
 
     # Detect duplicate (id, time) pairs.
     duplicate_mask = prepared.duplicated([id, time])
@@ -116,50 +216,59 @@ def validate_and_prepare(
             f"{sample}. Deduplicate or aggregate prior to estimation.",
         )
 
-    # Event-time bookkeeping.
-    prepared["_Ei_finite"] = prepared[Ei].notna() & np.isfinite(prepared[Ei])
-    prepared.loc[prepared["_Ei_finite"], Ei] = (
-        prepared.loc[prepared["_Ei_finite"], Ei].astype(int)
-    )
-    prepared["_k"] = np.where(prepared["_Ei_finite"], prepared[time] - prepared[Ei], np.nan)
-
-    # Treatment status and untreated indicator.
-    treated = prepared["_Ei_finite"] & (prepared[time] >= prepared[Ei])
-    prepared["_T"] = treated.astype(int)
-    prepared["_untreated"] = (~treated).astype(int)
-
-    # Weights (default 1.0).
+    # Weights: only their sign matters here; the first stage reads the column itself.
     if weight:
-        weights = pd.to_numeric(prepared[weight], errors="coerce").astype(float)
-        if (weights < 0).any():
+        weights = pd.to_numeric(prepared[weight], errors="coerce").to_numpy(dtype=float)
+        if np.any(weights < 0):
             raise ValidationError(
                 "Weights must be non-negative. Replace negatives with zero or drop affected rows.",
             )
-        prepared["_w"] = weights.fillna(0.0)
-    else:
-        prepared["_w"] = 1.0
 
-    untreated_count = int(((prepared["_untreated"] == 1) & (prepared["_w"] > 0)).sum())
-    if untreated_count == 0:
+    return prepared
+
+
+def index_panel(
+    prepared: pd.DataFrame,
+    id: str,
+    time: str,
+    Ei: str,
+    weight: Optional[str],
+    cluster: Optional[Union[str, List[str]]],
+) -> Dict[str, Any]:
+    """
+    Panel-level half of :func:`validate_and_prepare`: index rows from :func:`prepare_rows`.
+
+    Raises
+    ------
+    ValidationError
+        If the untreated sample is empty.
+    """
+
+    cluster_cols = cluster_columns(cluster, id)
+    positive = np.ones(len(prepared), dtype=bool)
+    if weight:
+        positive = pd.to_numeric(prepared[weight], errors="coerce").to_numpy(dtype=float) > 0
+
+    # Event times and treatment status live on the panel index as compact side arrays.
+    panel = PanelIndex.from_frame(prepared, id=id, time=time, Ei=Ei, cluster=cluster)
+    if not np.any(panel.untreated & positive):
         raise ValidationError(
             "Untreated sample is empty (no never-treated units and no not-yet-treated periods with "
             "positive weight). Check Ei coding, weights, or extend the time window.",
         )
 
-    # Panel balance diagnostics.
-    periods_per_unit = prepared.groupby(id, sort=False)[time].nunique()
+    # Panel balance diagnostics ((id, time) pairs are unique, so rows per unit = periods).
+    periods_per_unit = pd.Series(panel.periods_per_unit())
     is_balanced = bool(periods_per_unit.nunique() == 1)
     warnings: List[str] = []
 
-    treated_subset = prepared.loc[prepared["_Ei_finite"]]
-    if not treated_subset.empty:
-        pre_period_mask = treated_subset[time] < treated_subset[Ei]
-        pre_period_counts = (
-            pre_period_mask.groupby(treated_subset[id], sort=False).sum().astype(int)
-        )
-        narrow_pre = sorted(
-            [str(unit) for unit, count in pre_period_counts.items() if count < 2],
-        )
+    finite_rows = panel.adopted
+    if finite_rows.any():
+        pre_rows = finite_rows & panel.untreated
+        has_adoption = np.bincount(panel.id_codes[finite_rows], minlength=panel.n_units) > 0
+        pre_counts = np.bincount(panel.id_codes[pre_rows], minlength=panel.n_units)
+        narrow_codes = np.flatnonzero(has_adoption & (pre_counts < 2))
+        narrow_pre = sorted(str(unit) for unit in panel.id_levels[narrow_codes])
         if narrow_pre:
             warnings.append(
                 "Units with fewer than two pre-periods: "
@@ -167,17 +276,15 @@ def validate_and_prepare(
                 "Pretrend test may be unstable.",
             )
 
-    cluster_col = cluster if cluster else id
-
     panel_meta: Dict[str, Any] = {
         "balanced": is_balanced,
-        "n_units": int(prepared[id].nunique()),
+        "n_units": panel.n_units,
         "n_periods_by_unit": {
             key: float(value) if isinstance(value, (np.floating, np.integer)) else value
             for key, value in periods_per_unit.describe().to_dict().items()
         },
         "warnings": warnings,
-        "cluster": cluster_col,
+        "cluster": cluster_cols[0] if len(cluster_cols) == 1 else cluster_cols,
     }
 
-    return {"df": prepared, "panel_meta": panel_meta}
+    return {"df": prepared, "panel": panel, "panel_meta": panel_meta}
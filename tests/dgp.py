@@ -46,6 +46,22 @@ def dgp_constant_te(
     return pd.DataFrame(rows, columns=["i", "t", "Ei", "Y"])
 
 
+def dgp_with_controls(
+    n_i: int = 60,
+    T: int = 10,
+    noise: float = 0.3,
+    seed: int = 123,
+) -> pd.DataFrame:
+    """Constant-TE panel with a control ``x1`` (slope 0.3), weights ``w``, and extra noise."""
+
+    rng = np.random.RandomState(seed)
+    df = dgp_constant_te(n_i=n_i, T=T, seed=seed)
+    df["x1"] = rng.normal(size=len(df))
+    df["w"] = rng.uniform(0.5, 2.0, size=len(df))
+    df["Y"] = df["Y"] + 0.3 * df["x1"] + noise * rng.normal(size=len(df))
+    return df
+
+
 def dgp_pretrend(
     n_i: int = 60,
     T: int = 10,
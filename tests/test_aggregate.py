@@ -3,7 +3,8 @@ from __future__ import annotations
 import numpy as np
 import pandas as pd
 
-from didimpute.aggregate import aggregate_event_time
+from didimpute.aggregate import CellCube, aggregate_cube, aggregate_event_time
+from didimpute.panel import PanelIndex
 
 
 def _toy_panel() -> tuple[pd.DataFrame, np.ndarray]:
@@ -41,3 +42,40 @@ def test_weighting_differences() -> None:
 
     assert abs(summaries["equal"] - 1.5) < 1e-8
     assert abs(summaries["nobs"] - summaries["cohort_share"]) < 1e-8
+
+
+def test_cell_cube_matches_row_level_aggregation() -> None:
+    """Cube-based aggregation should match groupby references with and without a panel."""
+
+    rng = np.random.RandomState(5)
+    rows = [(i, t, [4.0, 5.0, 7.0][i % 3]) for i in range(45) for t in range(10)]
+    df = pd.DataFrame(rows, columns=["i", "t", "Ei"])
+    df["_k"] = df["t"] - df["Ei"]
+    df = df[~((df["i"] % 4 == 0) & (df["t"] > 7))].reset_index(drop=True)
+    tau = rng.normal(size=len(df)) + 0.1 * df["_k"].to_numpy()
+    mask = (df["_k"] >= 0).to_numpy()
+    panel = PanelIndex.from_frame(df, id="i", time="t", Ei="Ei")
+
+    cells = pd.DataFrame({"k": df["_k"], "cohort": df["Ei"], "tau": tau})[mask]
+    cohort_means = cells.groupby(["k", "cohort"])["tau"].mean()
+    expected = {
+        "nobs": cells.groupby("k")["tau"].mean(),
+        "equal": cohort_means.groupby(level="k").mean(),
+    }
+    cube = CellCube.from_cells(df, tau, "_k", mask, "Ei", panel=panel)
+    assert cube.count.shape == (3, 10) and cube.count.sum() == mask.sum()
+    for scheme, reference in expected.items():
+        for source in (aggregate_cube(cube, scheme, (0, 5), 1),
+                       aggregate_event_time(df, tau, "_k", mask, "Ei", scheme, (0, 5), 1)):
+            np.testing.assert_allclose(source["estimate"], reference.loc[0:5].to_numpy())
+            np.testing.assert_array_equal(source["k"], np.arange(6))
+    share = aggregate_cube(cube, "cohort_share", (0, 5), 20)
+    assert share["n"].min() >= 20
+
+    frame = cube.to_frame()
+    assert len(frame) == len(cells.groupby(["cohort", "k"]))
+    row = frame[(frame["cohort"] == 4.0) & (frame["k"] == 2)].iloc[0]
+    reference_cell = cells[(cells["cohort"] == 4.0) & (cells["k"] == 2)]["tau"]
+    assert row["n"] == len(reference_cell) and row["period"] == 6
+    assert np.isclose(row["estimate"], reference_cell.mean())
+    assert np.isclose(row["sd"], reference_cell.std())
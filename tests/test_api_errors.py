@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import builtins
-import importlib
 import os
 from typing import Tuple
 
@@ -125,26 +124,18 @@ def test_result_plot_with_data() -> None:
         plt.close(fig)
 
 
-def test_absorbing_requires_linearmodels(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_absorb_requires_absorbing_fe() -> None:
     df = _base_panel()
-    estimator = _make_estimator(fe="absorbing")
-    real_import = importlib.import_module
-
-    def _raise_when_linearmodels(name: str, *args: object, **kwargs: object):
-        if name == "linearmodels":
-            raise ModuleNotFoundError(name)
-        return real_import(name, *args, **kwargs)
-
-    monkeypatch.setattr(importlib, "import_module", _raise_when_linearmodels)
-    with pytest.raises(ModuleNotFoundError, match="linearmodels"):
+    df["region"] = ["a", "a", "b", "b"]
+    estimator = _make_estimator(absorb=["region"])
+    with pytest.raises(ValidationError, match="fe='absorbing'"):
         estimator.fit(df)
 
 
-def test_absorbing_not_implemented(monkeypatch: pytest.MonkeyPatch) -> None:
+def test_absorb_missing_column() -> None:
     df = _base_panel()
-    estimator = _make_estimator(fe="absorbing")
-    monkeypatch.setattr(importlib, "import_module", lambda name: object())
-    with pytest.raises(NotImplementedError, match="fe='absorbing'"):
+    estimator = _make_estimator(fe="absorbing", absorb=["region"])
+    with pytest.raises(ValidationError, match="Absorbed fixed-effect columns not found"):
         estimator.fit(df)
 
 
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from didimpute import DidImputation
+from didimpute.cache import StageCache
+
+from .dgp import dgp_constant_te, dgp_with_controls
+
+STAGES = ("validate_and_prepare", "first_stage", "compute_cell_effects")
+
+
+def _panel() -> pd.DataFrame:
+    df = dgp_constant_te(n_i=30, T=8, seed=5)
+    df["Y"] = df["Y"] + np.random.RandomState(5).normal(size=len(df))
+    df["unused"] = "x"
+    return df
+
+
+def test_cache_reuses_unchanged_stages(tmp_path) -> None:
+    """Only stages whose inputs changed should be recomputed; results must not change."""
+
+    df = _panel()
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1)
+    cached = DidImputation(cache_dir=str(tmp_path), **params)  # type: ignore[arg-type]
+
+    first = cached.fit(df)
+    assert first.meta["cache"]["misses"] == 3 and first.meta["cache"]["hits"] == 0
+    again = cached.fit(df.assign(unused="y"))
+    assert again.meta["cache"]["stages"] == {stage: "hit" for stage in STAGES}
+    pd.testing.assert_frame_equal(again.summary(), first.summary())
+
+    rescheme = DidImputation(  # type: ignore[arg-type]
+        cache_dir=str(tmp_path), weight_scheme="equal", se_method="bjs", **params,
+    ).fit(df)
+    assert rescheme.meta["cache"]["hits"] == 3
+    expected = DidImputation(weight_scheme="equal", se_method="bjs", **params).fit(df)
+    pd.testing.assert_frame_equal(rescheme.summary(), expected.summary())
+
+    resolve = DidImputation(cache_dir=str(tmp_path), solver="sparse", **params).fit(df)
+    assert resolve.meta["cache"]["stages"] == {
+        "validate_and_prepare": "hit", "first_stage": "miss", "compute_cell_effects": "miss",
+    }
+    reloaded = DidImputation(cache_dir=str(tmp_path), solver="sparse", **params).fit(df)
+    assert reloaded.meta["cache"]["hits"] == 3
+    pd.testing.assert_frame_equal(reloaded.summary(), resolve.summary())
+    changed = cached.fit(df.assign(Y=df["Y"] + 1.0))
+    assert changed.meta["cache"]["misses"] == 3
+    assert "cache" not in DidImputation(**params).fit(df).meta  # type: ignore[arg-type]
+
+
+def test_cache_keeps_model_stages_across_cluster_changes(tmp_path) -> None:
+    """Changing only the clustering should reuse the first stage and the cell effects."""
+
+    df = _panel().assign(state=lambda d: d["i"] % 5)
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1)
+    DidImputation(cache_dir=str(tmp_path), **params).fit(df)  # type: ignore[arg-type]
+    expected_stages = {
+        "validate_and_prepare": "miss", "first_stage": "hit", "compute_cell_effects": "hit",
+    }
+    for frame in (df, df.assign(state=df["i"] % 3)):
+        result = DidImputation(  # type: ignore[arg-type]
+            cache_dir=str(tmp_path), cluster="state", **params,
+        ).fit(frame)
+        assert result.meta["cache"]["stages"] == expected_stages
+        expected = DidImputation(cluster="state", **params).fit(frame)  # type: ignore[arg-type]
+        pd.testing.assert_frame_equal(result.summary(), expected.summary())
+
+
+def test_cache_keys_record_column_roles(tmp_path) -> None:
+    """The same columns in different roles must not share cached stages."""
+
+    df = dgp_with_controls(n_i=30, T=8, seed=6).rename(columns={"x1": "a"})
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1)
+    for spec in ({"controls": ["w"]}, {"weight": "w"}, {"controls": ["a", "w"]},
+                 {"controls": ["a"], "weight": "w"}):
+        cached = DidImputation(cache_dir=str(tmp_path), **params, **spec)  # type: ignore[arg-type]
+        result = cached.fit(df)
+        assert result.meta["cache"]["hits"] == 0
+        expected = DidImputation(**params, **spec).fit(df)  # type: ignore[arg-type]
+        pd.testing.assert_frame_equal(result.summary(), expected.summary())
+
+
+def test_cache_evicts_least_recently_used(tmp_path) -> None:
+    """Entries beyond the size cap should be evicted oldest-access first."""
+
+    cache = StageCache(tmp_path, max_bytes=2500)
+    blob = np.zeros(100)  # ~900 bytes pickled
+    for key in ("a", "b"):
+        cache.fetch("stage", key, lambda: blob)
+    cache.fetch("stage", "a", lambda: blob)  # refreshes "a"
+    cache.fetch("stage", "c", lambda: blob)
+    names = sorted(path.name for path in tmp_path.glob("*.pkl"))
+    assert names == ["stage-a.pkl", "stage-c.pkl"]
+    assert cache.stats["hits"] == 1 and cache.stats["misses"] == 3
+
+    (tmp_path / "stage-a.pkl").write_bytes(b"corrupt")
+    assert cache.fetch("stage", "a", lambda: 1) == 1
+    with pytest.raises(Exception, match="positive"):
+        StageCache(tmp_path, max_bytes=0)
@@ -83,3 +83,37 @@ def test_cli_runs_and_writes_outputs(tmp_path, monkeypatch: pytest.MonkeyPatch)
     summary = pd.read_csv(out_csv)
     assert "estimate" in summary.columns
     assert out_plot.exists()
+
+
+def test_cli_chunksize_matches_in_memory(tmp_path) -> None:
+    """--chunksize should route through the out-of-core fit and write the same summary."""
+
+    csv_path = tmp_path / "panel.csv"
+    _make_panel().to_csv(csv_path, index=False)
+    base = ["--csv", str(csv_path), "--y", "Y", "--id", "i", "--time", "t", "--Ei", "Ei"]
+    base += ["--horizons", "0:1"]
+    runner = CliRunner()
+    outputs = []
+    for extra in ([], ["--chunksize", "3"]):
+        out_csv = tmp_path / f"summary{len(extra)}.csv"
+        result = runner.invoke(cli_main, [*base, "--out", str(out_csv), *extra])
+        assert result.exit_code == 0, result.output
+        outputs.append(pd.read_csv(out_csv))
+    pd.testing.assert_frame_equal(outputs[0], outputs[1])
+
+
+def test_cli_cache_reports_hits(tmp_path) -> None:
+    """A rerun with only a new --scheme should reuse every cached stage."""
+
+    csv_path = tmp_path / "panel.csv"
+    _make_panel().to_csv(csv_path, index=False)
+    base = ["--csv", str(csv_path), "--y", "Y", "--id", "i", "--time", "t", "--Ei", "Ei"]
+    base += ["--horizons", "0:1", "--out", str(tmp_path / "summary.csv")]
+    base += ["--cache-dir", str(tmp_path / "cache")]
+    runner = CliRunner()
+    first = runner.invoke(cli_main, base)
+    assert first.exit_code == 0, first.output
+    assert "Cache: 0 hits, 3 misses." in first.output
+    second = runner.invoke(cli_main, [*base, "--scheme", "equal"])
+    assert second.exit_code == 0, second.output
+    assert "Cache: 3 hits, 0 misses." in second.output
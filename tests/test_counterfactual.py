@@ -2,11 +2,15 @@ from __future__ import annotations
 
 import numpy as np
 import pandas as pd
+import pytest
 
-from didimpute.counterfactual import compute_cell_effects
+from didimpute import DidImputation
+from didimpute.counterfactual import LazyCellEffects, compute_cell_effects
 from didimpute.first_stage import FirstStageModel
 from didimpute.validation import validate_and_prepare
 
+from .dgp import dgp_constant_te
+
 
 def _tiny_panel() -> pd.DataFrame:
     """Return a minimal staggered-adoption panel with one never-treated cohort."""
@@ -42,6 +46,7 @@ def test_integration_up_to_counterfactuals() -> None:
         time="t",
         controls=None,
         weight=None,
+        panel=ctx["panel"],
     )
     cf = compute_cell_effects(
         df=prepared,
@@ -51,6 +56,7 @@ def test_integration_up_to_counterfactuals() -> None:
         Ei_col="Ei",
         fsm=model,
         controls=None,
+        panel=ctx["panel"],
     )
 
     treated_mask = cf["masks"]["treated_post"]
@@ -66,5 +72,32 @@ def test_integration_up_to_counterfactuals() -> None:
     assert never_mask.sum() == 3  # one unit, three periods
     np.testing.assert_array_equal(
         cf["masks"]["untreated_all"],
-        prepared["_untreated"].to_numpy(dtype=bool),
+        ctx["panel"].untreated,
+    )
+
+
+@pytest.mark.parametrize("se_method", ["delta", "bjs"])
+def test_lazy_prediction_matches_full(se_method: str) -> None:
+    """Lazy prediction should touch only the window and reproduce every full-mode output."""
+
+    df = dgp_constant_te(n_i=40, T=12, seed=3)
+    df["Y"] = df["Y"] + np.random.RandomState(3).normal(size=len(df))
+    params = dict(
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 1), pretrends=2, minN=1,
+        se_method=se_method,
+    )
+    full = DidImputation(**params).fit(df)  # type: ignore[arg-type]
+    lazy = DidImputation(predict="lazy", **params).fit(df)  # type: ignore[arg-type]
+
+    effects = lazy.counterfactual
+    assert isinstance(effects, LazyCellEffects)
+    assert len(effects.rows) < len(df) and "tau" not in effects
+    pd.testing.assert_frame_equal(lazy.summary(), full.summary())
+    pd.testing.assert_frame_equal(
+        pd.DataFrame(lazy.meta["pretrend_curve"]), pd.DataFrame(full.meta["pretrend_curve"]),
     )
+
+    wider = lazy.reaggregate(horizons=(0, 5))
+    pd.testing.assert_frame_equal(wider.summary(), full.reaggregate(horizons=(0, 5)).summary())
+    pd.testing.assert_frame_equal(lazy.cells(), full.cells())
+    np.testing.assert_allclose(effects["y0_hat"], full.counterfactual["y0_hat"], rtol=1e-12)
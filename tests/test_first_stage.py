@@ -0,0 +1,339 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+import scipy.sparse as sp
+
+from didimpute import DidImputation, EstimationError
+from didimpute.first_stage import FirstStageModel
+from didimpute.linalg import InformationFactor
+from didimpute.validation import validate_and_prepare
+
+from .dgp import dgp_with_controls
+
+
+def _panel_with_controls(seed: int = 7) -> pd.DataFrame:
+    """Constant-TE panel augmented with a control covariate and positive weights."""
+
+    return dgp_with_controls(n_i=30, T=8, noise=0.0, seed=seed)
+
+
+def _fit(df: pd.DataFrame, solver: str) -> FirstStageModel:
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    return FirstStageModel(solver=solver).fit(
+        ctx["df"], "Y", "i", "t", ["x1"], "w", panel=ctx["panel"],
+    )
+
+
+def test_sparse_solver_matches_dense_first_stage() -> None:
+    """Sparse and dense backends should agree on coefficients and residuals."""
+
+    df = _panel_with_controls()
+    dense = _fit(df, "dense")
+    sparse = _fit(df, "sparse")
+
+    assert sparse.info_["solver"] == "sparse"
+    np.testing.assert_allclose(sparse.coef_, dense.coef_, atol=1e-10)
+    np.testing.assert_allclose(
+        sparse.untreated_residuals_,
+        dense.untreated_residuals_,
+        atol=1e-10,
+    )
+    probe = np.linspace(-1.0, 1.0, len(dense.coef_))
+    assert abs(sparse.information_quad_form(probe) - dense.information_quad_form(probe)) < 1e-8
+
+
+def test_sparse_solver_matches_dense_summary() -> None:
+    """End-to-end estimates and SEs should not depend on the first-stage backend."""
+
+    df = _panel_with_controls()
+    params = dict(
+        y="Y", id="i", time="t", Ei="Ei", controls=["x1"], weight="w", horizons=(-3, 2), minN=1
+    )
+    dense = DidImputation(**params).fit(df).summary()  # type: ignore[arg-type]
+    sparse = DidImputation(solver="sparse", **params).fit(df).summary()  # type: ignore[arg-type]
+
+    np.testing.assert_allclose(sparse["estimate"], dense["estimate"], atol=1e-10)
+    np.testing.assert_allclose(sparse["se"], dense["se"], atol=1e-10)
+
+
+def test_absorbing_matches_twoway_predictions() -> None:
+    """Alternating projections should reproduce the dummy-variable counterfactuals."""
+
+    df = _panel_with_controls()
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    prepared, panel = ctx["df"], ctx["panel"]
+    twoway = FirstStageModel().fit(prepared, "Y", "i", "t", ["x1"], "w", panel=panel)
+    absorbing = FirstStageModel(fe="absorbing").fit(
+        prepared, "Y", "i", "t", ["x1"], "w", panel=panel,
+    )
+
+    np.testing.assert_allclose(absorbing.coef_, twoway.coef_[1:2], atol=1e-8)
+    np.testing.assert_allclose(
+        absorbing.predict_y0(prepared, "Y", "i", "t", ["x1"]),
+        twoway.predict_y0(prepared, "Y", "i", "t", ["x1"]),
+        atol=1e-8,
+    )
+    np.testing.assert_allclose(
+        absorbing.untreated_residuals_,
+        twoway.untreated_residuals_,
+        atol=1e-8,
+    )
+    assert absorbing.info_["converged"]
+    assert absorbing.info_["demean_iterations"] >= 1
+    assert absorbing.info_["tol"] == absorbing.tol
+
+
+def test_absorbing_extra_dimension() -> None:
+    """An extra absorbed dimension should be fit and used for prediction."""
+
+    df = _panel_with_controls()
+    df["region"] = df["i"] % 3
+    df["region_t"] = df["region"].astype(str) + ":" + df["t"].astype(str)
+    df["Y"] = df["Y"] + 0.5 * df["region"] * df["t"] / 10.0
+
+    result = DidImputation(
+        y="Y",
+        id="i",
+        time="t",
+        Ei="Ei",
+        controls=["x1"],
+        fe="absorbing",
+        absorb=["region_t"],
+        horizons=(0, 3),
+        minN=1,
+    ).fit(df)
+    info = result.intermediate["first_stage"]
+    assert info["absorbed"] == ["i", "t", "region_t"]
+    assert info["n_levels"]["region_t"] == 3 * 8
+    summary = result.summary()
+    assert np.all(np.abs(summary["estimate"] - 1.0) < 0.2)
+
+    # Periods are nested in region-period cells, so the parameter count is the design rank.
+    assert result.prepared is not None and result.panel is not None
+    assert result.first_stage is not None
+    untreated = result.prepared[result.panel.untreated]
+    dummies = pd.get_dummies(untreated[["i", "t", "region_t"]].astype(str))
+    design = np.column_stack([untreated["x1"], dummies.to_numpy(dtype=float)])
+    n_params = info["n_obs"] - result.first_stage.dof_
+    assert n_params == np.linalg.matrix_rank(design)
+
+
+def test_information_factor_batched_quad_forms() -> None:
+    """Batched quadratic forms should match the explicit inverse for both backends."""
+
+    df = _panel_with_controls()
+    for solver in ("dense", "sparse"):
+        model = _fit(df, solver)
+        factor = model.factor_
+        assert factor is not None
+        block = np.random.RandomState(0).normal(size=(factor.dim, 4))
+        inverse = model.xtwx_inv_
+        assert inverse is not None
+        expected = np.einsum("ik,ij,jk->k", block, inverse, block)
+        np.testing.assert_allclose(factor.quad_forms(block), expected, rtol=1e-8)
+        np.testing.assert_allclose(factor.cross(block), block.T @ inverse @ block, rtol=1e-8)
+
+
+def _twoway_information(n_units: int, n_periods: int = 30) -> sp.csc_matrix:
+    """Information matrix of an unbalanced two-way design with one control."""
+
+    rng = np.random.RandomState(0)
+    units = np.repeat(np.arange(n_units), n_periods)
+    periods = np.tile(np.arange(n_periods), n_units)
+    keep = rng.uniform(size=units.size) < 0.8
+    units, periods = units[keep], periods[keep]
+    rows = np.arange(units.size)
+    design = sp.hstack([
+        sp.csc_matrix(np.column_stack([np.ones(units.size), rng.normal(size=units.size)])),
+        sp.csc_matrix((np.ones(units.size), (rows, units)), shape=(units.size, n_units))[:, 1:],
+        sp.csc_matrix((np.ones(units.size), (rows, periods)), shape=(units.size, n_periods))[:, 1:],
+    ]).tocsc()
+    return (design.T @ design).tocsc()
+
+
+def test_sparse_factor_scales_linearly_in_units() -> None:
+    """Factoring a two-way information matrix should not grow quadratically with units."""
+
+    def best_time(matrix: sp.csc_matrix) -> float:
+        times = []
+        for _ in range(3):
+            start = time.perf_counter()
+            InformationFactor(matrix)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    small, large = _twoway_information(2_000), _twoway_information(16_000)
+    ratio = best_time(large) / best_time(small)
+    assert ratio < 24.0, ratio
+
+
+def test_absorbing_ses_match_twoway() -> None:
+    """Absorbed SEs and covariances should include the donor variance, as two-way ones do."""
+
+    df = _panel_with_controls()
+    df["region"] = df["i"] % 4
+    params = dict(
+        y="Y", id="i", time="t", Ei="Ei", controls=["x1"], weight="w", horizons=(0, 3), minN=1
+    )
+    twoway = DidImputation(**params).fit(df)  # type: ignore[arg-type]
+    absorbing = DidImputation(fe="absorbing", **params).fit(df)  # type: ignore[arg-type]
+    np.testing.assert_allclose(absorbing.summary()["se"], twoway.summary()["se"], rtol=1e-8)
+    np.testing.assert_allclose(absorbing.vcov(), twoway.vcov(), rtol=1e-8, atol=1e-14)
+
+    # A region key nested in units is spanned by the unit effects: the fit, the degrees of
+    # freedom, and so the SEs are those of the two-way model.
+    nested = DidImputation(  # type: ignore[arg-type]
+        fe="absorbing", absorb=["region"], **params,
+    ).fit(df)
+    assert nested.first_stage is not None and twoway.first_stage is not None
+    assert nested.first_stage.dof_ == twoway.first_stage.dof_
+    np.testing.assert_allclose(nested.summary()["se"], twoway.summary()["se"], rtol=1e-8)
+
+
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_collinear_controls_rank_deficient(solver: str) -> None:
+    """Exactly collinear controls should be reported as a rank-deficient design."""
+
+    df = _panel_with_controls()
+    df["x2"] = 2.0 * df["x1"]
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1", "x2"], None, None)
+    with pytest.raises(EstimationError, match="rank deficient"):
+        FirstStageModel(solver=solver).fit(
+            ctx["df"], "Y", "i", "t", ["x1", "x2"], None, panel=ctx["panel"],
+        )
+
+
+def test_lookup_prediction_matches_design_product() -> None:
+    """Chunked fixed-effect lookups should reproduce ``design @ coef_`` for every row."""
+
+    df = _panel_with_controls()
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    prepared, panel = ctx["df"], ctx["panel"]
+    model = FirstStageModel(chunk_size=7).fit(prepared, "Y", "i", "t", ["x1"], "w", panel=panel)
+
+    keep = np.isin(prepared["t"].to_numpy(), model.fe_levels_[1])
+    subset = prepared[keep]
+    expected = model.design_matrix(subset) @ model.coef_
+    np.testing.assert_allclose(model.predict_y0(subset, "Y", "i", "t", ["x1"]), expected)
+    np.testing.assert_allclose(
+        model.predict_y0(prepared, "Y", "i", "t", ["x1"], panel=panel)[keep],
+        expected,
+    )
+    assert model.fe_values_[0][0] == 0.0 and model.fe_values_[1][0] == 0.0
+
+
+def test_lean_store_matches_full_summary() -> None:
+    """Lean storage should drop the untreated arrays without changing estimates or SEs."""
+
+    df = _panel_with_controls()
+    params = dict(
+        y="Y", id="i", time="t", Ei="Ei", controls=["x1"], weight="w", horizons=(-3, 2), minN=1
+    )
+    full = DidImputation(**params).fit(df).summary()  # type: ignore[arg-type]
+    lean = DidImputation(store="lean", **params).fit(df).summary()  # type: ignore[arg-type]
+    np.testing.assert_allclose(lean["estimate"], full["estimate"], atol=1e-12)
+    np.testing.assert_allclose(lean["se"], full["se"], atol=1e-12)
+
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    model = FirstStageModel(store="lean").fit(
+        ctx["df"], "Y", "i", "t", ["x1"], "w", panel=ctx["panel"],
+    )
+    assert model.untreated_design_ is None and model.untreated_residuals_ is None
+    assert model.design_columns_[:2] == ["intercept", "x1"]
+    assert model.coef_ is not None and len(model.design_columns_) == len(model.coef_)
+    assert model.dof_ > 0 and model.resid_ss_ > 0
+
+
+@pytest.mark.parametrize("fe", ["twoway", "absorbing"])
+def test_fit_many_matches_single_outcome_fits(fe: str) -> None:
+    """Multi-outcome fits should share the factorization and reproduce per-outcome fits."""
+
+    df = _panel_with_controls()
+    rng = np.random.RandomState(11)
+    outcomes = ["y_a", "y_b", "y_c"]
+    for scale, name in enumerate(outcomes):
+        df[name] = scale * df["Y"] + rng.normal(size=len(df)) + 0.2 * df["x1"]
+    estimator = DidImputation(
+        y="Y", id="i", time="t", Ei="Ei", controls=["x1"], weight="w", fe=fe,
+        horizons=(-3, 2), pretrends=2, minN=1,
+    )
+    results = estimator.fit_many(df, outcomes)
+
+    assert list(results) == outcomes
+    for name, result in results.items():
+        expected = DidImputation(**{**estimator.__dict__, "y": name}).fit(df)
+        pd.testing.assert_frame_equal(result.summary(), expected.summary(), rtol=1e-9)
+        assert result.config.y == name
+
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None, outcomes=outcomes)
+    models = FirstStageModel().fit_many(
+        ctx["df"], outcomes, "i", "t", ["x1"], "w", panel=ctx["panel"],
+    )
+    assert models[0].factor_ is models[2].factor_
+
+
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_design_sums_match_grouped_design(solver: str) -> None:
+    """Grouped design sums should equal ``indicator' @ design`` without forming the design."""
+
+    df = _panel_with_controls()
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    prepared, panel = ctx["df"], ctx["panel"]
+    model = FirstStageModel(solver=solver, chunk_size=11).fit(
+        prepared, "Y", "i", "t", ["x1"], "w", panel=panel,
+    )
+    rows = np.flatnonzero(np.isin(prepared["t"].to_numpy(), model.fe_levels_[1]))
+    groups = (prepared["t"].to_numpy()[rows] % 3).astype(np.intp)
+    indicator = np.eye(3)[groups]
+    design = model.design_matrix(prepared.iloc[rows], panel=panel, rows=rows)
+    expected = np.asarray(indicator.T @ design)
+    sums = model.design_sums(prepared.iloc[rows], groups, 3, panel=panel, rows=rows)
+    np.testing.assert_allclose(sums, expected, atol=1e-12)
+    transposed = model.design_transpose_product(
+        prepared.iloc[rows], indicator, panel=panel, rows=rows,
+    )
+    np.testing.assert_allclose(transposed, expected.T, atol=1e-12)
+
+
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_leverage_matches_hat_matrix_diagonal(solver: str) -> None:
+    """Blockwise leverages should equal the hat diagonal; probing should approximate it."""
+
+    df = _panel_with_controls()
+    ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", ["x1"], "w", None)
+    prepared, panel = ctx["df"], ctx["panel"]
+    model = FirstStageModel(solver=solver, chunk_size=13).fit(
+        prepared, "Y", "i", "t", ["x1"], "w", panel=panel,
+    )
+    rows = np.flatnonzero(panel.untreated)
+    untreated = prepared.iloc[rows]
+    design = model.design_matrix(untreated, panel=panel, rows=rows)
+    design = design.toarray() if solver == "sparse" else design
+    inverse = model.xtwx_inv_
+    assert inverse is not None
+    expected = np.einsum("ij,jk,ik->i", design, inverse, design) * untreated["w"].to_numpy()
+
+    exact = model.leverage(untreated, "w", panel=panel, rows=rows, method="exact")
+    np.testing.assert_allclose(exact, expected, atol=1e-12)
+    assert np.isclose(exact.sum(), design.shape[1])
+    probed = model.leverage(
+        untreated, "w", panel=panel, rows=rows, method="randomized", n_probes=400,
+        random_state=0,
+    )
+    assert np.corrcoef(probed, expected)[0, 1] > 0.9
+
+    few = validate_and_prepare(df[df["i"] < 3], "Y", "i", "t", "Ei", ["x1"], "w", None)
+    few_units = few["df"]
+    wide = FirstStageModel().fit(few_units, "Y", "i", "t", ["x1"], "w", panel=few["panel"])
+    assert wide._n_dummies(1) > wide._n_dummies(0)
+    sample = few_units[few["panel"].untreated]
+    wide_design = wide.design_matrix(sample)
+    np.testing.assert_allclose(
+        wide.leverage(sample, "w"),
+        np.einsum("ij,jk,ik->i", wide_design, wide.xtwx_inv_, wide_design) * sample["w"],
+        atol=1e-12,
+    )
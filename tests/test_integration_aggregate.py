@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+from dataclasses import replace
+
 import numpy as np
 import pandas as pd
 
 from didimpute import DidImputation
 
+from .dgp import dgp_constant_te
+
 
 def test_end_to_end_through_aggregation() -> None:
     """Ensure the estimator runs through aggregation and returns expected columns."""
@@ -21,3 +25,21 @@ def test_end_to_end_through_aggregation() -> None:
     summary = result.summary()
 
     assert {"k", "estimate", "n", "weight_scheme"}.issubset(summary.columns)
+
+
+def test_reaggregate_matches_refit() -> None:
+    """Re-summarizing a fitted result should equal fitting with the new settings."""
+
+    df = dgp_constant_te(n_i=30, T=8, seed=5)
+    base = DidImputation(y="Y", id="i", time="t", Ei="Ei", horizons=(-2, 2), minN=1)
+    result = base.fit(df)
+
+    settings = dict(weight_scheme="cohort_share", horizons=(-3, 4), minN=2, ci=0.9, pretrends=3)
+    redone = result.reaggregate(**settings)  # type: ignore[arg-type]
+    expected = replace(base, **settings).fit(df)  # type: ignore[arg-type]
+
+    pd.testing.assert_frame_equal(redone.summary(), expected.summary())
+    assert redone.meta["pretrend"] == expected.meta["pretrend"]
+    assert redone.config.weight_scheme == "cohort_share"
+    assert redone.first_stage is result.first_stage
+    pd.testing.assert_frame_equal(result.reaggregate().summary(), result.summary())
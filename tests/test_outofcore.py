@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from didimpute import DidImputation, ValidationError
+
+from .dgp import dgp_with_controls
+
+
+def _unbalanced_panel() -> pd.DataFrame:
+    """Shuffled, unbalanced panel with a control, weights, and noisy outcomes."""
+
+    df = dgp_with_controls(n_i=40, T=9, seed=3)
+    df = df[~((df["i"] % 5 == 0) & (df["t"] == 8))]
+    return df.sample(frac=1.0, random_state=1).reset_index(drop=True)
+
+
+def _estimator(**overrides: object) -> DidImputation:
+    params = dict(
+        y="Y",
+        id="i",
+        time="t",
+        Ei="Ei",
+        controls=["x1"],
+        weight="w",
+        horizons=(-3, 4),
+        pretrends=3,
+        minN=1,
+    )
+    params.update(overrides)
+    return DidImputation(**params)  # type: ignore[arg-type]
+
+
+@pytest.mark.parametrize("scheme", ["nobs", "equal", "cohort_share"])
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_fit_chunks_matches_in_memory_fit(scheme: str, solver: str) -> None:
+    """Two-pass chunked fitting should reproduce the in-memory summary and pretrend test."""
+
+    df = _unbalanced_panel()
+    estimator = _estimator(weight_scheme=scheme, solver=solver)
+    expected = estimator.fit(df)
+    result = estimator.fit_chunks(df, chunksize=37)
+
+    pd.testing.assert_frame_equal(result.summary(), expected.summary(), rtol=1e-9, atol=1e-12)
+    assert result.meta["pretrend"]["dof"] == expected.meta["pretrend"]["dof"]
+    assert result.meta["pretrend"]["used_ks"] == expected.meta["pretrend"]["used_ks"]
+    assert np.isclose(result.meta["pretrend"]["pvalue"], expected.meta["pretrend"]["pvalue"])
+    for chunked, in_memory in zip(result.meta["pretrend_curve"], expected.meta["pretrend_curve"]):
+        assert chunked["dof"] == in_memory["dof"] and chunked["used_ks"] == in_memory["used_ks"]
+        assert np.isclose(chunked["pvalue"], in_memory["pvalue"], equal_nan=True)
+    assert result.meta["panel"] == expected.meta["panel"]
+    info = result.intermediate["first_stage"]
+    assert info["out_of_core"] and info["n_chunks"] == -(-len(df) // 37)
+    assert info["baseline_id"] == expected.intermediate["first_stage"]["baseline_id"]
+
+
+def test_fit_chunks_truncates_fractional_adoption_times() -> None:
+    """Fractional ``Ei`` should be truncated per chunk exactly as the in-memory fit does."""
+
+    df = _unbalanced_panel()
+    df["Ei"] = df["Ei"] + 0.5
+    estimator = _estimator()
+    expected = estimator.fit(df)
+    result = estimator.fit_chunks(df, chunksize=37)
+    pd.testing.assert_frame_equal(result.summary(), expected.summary(), rtol=1e-9, atol=1e-12)
+
+
+def test_fit_chunks_reads_csv_and_one_shot_iterators(tmp_path) -> None:
+    """CSV paths are re-read per pass; generators are spooled to disk for the second pass."""
+
+    df = _unbalanced_panel()
+    csv_path = tmp_path / "panel.csv"
+    df.assign(unused=1.0).to_csv(csv_path, index=False)
+
+    def _chunks() -> Iterator[pd.DataFrame]:
+        for start in range(0, len(df), 50):
+            yield df.iloc[start:start + 50]
+
+    expected = _estimator().fit(df).summary()
+    from_csv = _estimator().fit_chunks(str(csv_path), chunksize=64).summary()
+    from_generator = _estimator().fit_chunks(_chunks()).summary()
+    np.testing.assert_allclose(from_csv["estimate"], expected["estimate"], atol=1e-10)
+    np.testing.assert_allclose(from_generator["se"], expected["se"], atol=1e-10)
+
+
+def test_fit_chunks_validation() -> None:
+    """Duplicates split across chunks and unsupported configurations should be rejected."""
+
+    df = _unbalanced_panel()
+    duplicated = pd.concat([df, df.iloc[[0]]], ignore_index=True)
+    with pytest.raises(ValidationError, match="Duplicate"):
+        _estimator().fit_chunks(duplicated, chunksize=100)
+    with pytest.raises(ValidationError, match="Missing required columns"):
+        _estimator().fit_chunks(df.drop(columns=["x1"]))
+    with pytest.raises(ValidationError, match="twoway"):
+        _estimator(fe="absorbing").fit_chunks(df)
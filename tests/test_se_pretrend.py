@@ -1,9 +1,20 @@
 from __future__ import annotations
 
+from typing import Any
+
 import numpy as np
 import pandas as pd
+import pytest
+import scipy.sparse as sp
+import statsmodels.api as sm
+from scipy.stats import chi2
+from statsmodels.stats.sandwich_covariance import cov_cluster_2groups
+
+from didimpute import DidImputation, EstimationError, ValidationError, se
+from didimpute.panel import PanelIndex
+from didimpute.se import _cluster_mean_var, pretrend_curve, pretrend_joint_test
 
-from didimpute import DidImputation
+from .dgp import dgp_constant_te, dgp_with_controls
 
 
 def _dgp_constant_te() -> pd.DataFrame:
@@ -34,3 +45,356 @@ def test_end_to_end_with_ses_and_pretrend() -> None:
     summary = result.summary()
     assert {"k", "estimate", "se", "ci_low", "ci_high", "n"}.issubset(summary.columns)
     assert "pretrend" in result.meta
+
+
+def test_cluster_mean_var_matches_statsmodels() -> None:
+    """The closed-form kernel should reproduce statsmodels' clustered intercept SE per group."""
+
+    rng = np.random.RandomState(5)
+    k_codes = rng.randint(0, 4, size=300).astype(np.intp)
+    clusters = rng.randint(0, 25, size=300).astype(np.intp)
+    values = rng.normal(size=300) + k_codes
+    variance, n_clusters = _cluster_mean_var(k_codes, [(1.0, clusters)], values, 4)
+
+    for k in range(4):
+        mask = k_codes == k
+        fit = sm.OLS(values[mask], np.ones((mask.sum(), 1))).fit(
+            cov_type="cluster", cov_kwds={"groups": clusters[mask]},
+        )
+        assert n_clusters[k] == len(np.unique(clusters[mask]))
+        assert np.isclose(np.sqrt(variance[k]), fit.bse[0], rtol=1e-12)
+
+
+def test_pretrend_wald_matches_statsmodels() -> None:
+    """The closed-form pretrend Wald test should match the clustered k-dummy OLS fit."""
+
+    rng = np.random.RandomState(8)
+    n = 400
+    df = pd.DataFrame(
+        {"i": rng.randint(0, 40, size=n), "_k": rng.randint(-4, 2, size=n).astype(float)},
+    )
+    placebo = rng.normal(size=n) + 0.1 * df["_k"].to_numpy()
+    placebo[rng.rand(n) < 0.1] = np.nan
+    pvalue, dof, used_ks = pretrend_joint_test(df, placebo, "i", "_k", 3)
+
+    mask = np.isfinite(placebo) & (df["_k"] < 0) & (df["_k"] >= -3)
+    dummies = pd.get_dummies(df.loc[mask, "_k"]).to_numpy(dtype=float)
+    fit = sm.OLS(placebo[mask], dummies).fit(
+        cov_type="cluster", cov_kwds={"groups": df.loc[mask, "i"].to_numpy()},
+    )
+    wald = fit.wald_test(np.eye(dummies.shape[1]), scalar=True)
+    assert used_ks == [-3, -2, -1] and dof == 3
+    assert np.isclose(pvalue, float(wald.pvalue), rtol=1e-10)
+
+
+def _dense(matrix: Any) -> np.ndarray:
+    """Densify a (possibly sparse) design matrix."""
+
+    return np.asarray(matrix.toarray() if sp.issparse(matrix) else matrix)
+
+
+@pytest.mark.parametrize("scheme", ["nobs", "equal"])
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_bjs_variance_matches_explicit_imputation_weights(scheme: str, solver: str) -> None:
+    """BJS SEs should match the dense textbook formula built from explicit weights."""
+
+    df = dgp_with_controls(n_i=30, T=8, noise=1.0, seed=2)
+    estimator = DidImputation(
+        y="Y", id="i", time="t", Ei="Ei", controls=["x1"], weight="w", horizons=(0, 3),
+        minN=1, weight_scheme=scheme, solver=solver, se_method="bjs",
+    )
+    result = estimator.fit(df)
+    summary = result.summary()
+    assert result.meta["se_method"] == "bjs"
+
+    prepared, fsm = result.prepared, result.first_stage
+    assert prepared is not None and fsm is not None
+    assert result.panel is not None
+    prepared = prepared.assign(_k=result.panel.event_times())
+    untreated = prepared[result.panel.untreated]
+    X0 = _dense(fsm.design_matrix(untreated))
+    W0 = untreated["w"].to_numpy()
+    eps0 = untreated["Y"].to_numpy() - X0 @ fsm.coef_
+
+    treated = prepared[(prepared["t"] >= prepared["Ei"]) & prepared["_k"].between(0, 3)].copy()
+    X1 = _dense(fsm.design_matrix(treated))
+    treated["tau"] = treated["Y"].to_numpy() - X1 @ fsm.coef_
+    n_gk = treated.groupby(["_k", "Ei"])["tau"].transform("size")
+    if scheme == "equal":
+        cohorts = treated.groupby("_k")["Ei"].transform("nunique")
+        treated["w_est"] = 1.0 / (cohorts * n_gk)
+    else:
+        treated["w_est"] = 1.0 / treated.groupby("_k")["tau"].transform("size")
+    eps1 = treated["tau"] - treated.groupby(["_k", "Ei"])["tau"].transform("mean")
+
+    ks = summary["k"].to_numpy()
+    w1 = np.column_stack([np.where(treated["_k"] == k, treated["w_est"], 0.0) for k in ks])
+    v0 = -W0[:, None] * (X0 @ np.linalg.solve(X0.T @ (W0[:, None] * X0), X1.T @ w1))
+    contributions = pd.DataFrame(
+        np.vstack([v0 * eps0[:, None], w1 * eps1.to_numpy()[:, None]]),
+    )
+    clusters = np.concatenate([untreated["i"].to_numpy(), treated["i"].to_numpy()])
+    expected = np.sqrt((contributions.groupby(clusters).sum() ** 2).sum().to_numpy())
+    np.testing.assert_allclose(summary["se"].to_numpy(), expected, rtol=1e-8)
+
+    delta = result.reaggregate(se_method="delta").summary()
+    assert not np.allclose(delta["se"], summary["se"])
+    assert result.reaggregate(se_method="delta").reaggregate(
+        se_method="bjs",
+    ).summary()["se"].equals(summary["se"])
+
+
+def test_wild_bootstrap_tracks_bjs_and_is_reproducible() -> None:
+    """Bootstrap SEs should approximate the BJS SEs and not depend on ``n_jobs``."""
+
+    df = dgp_constant_te(n_i=60, T=8, seed=4)
+    df["Y"] = df["Y"] + np.random.RandomState(4).normal(size=len(df))
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1, random_state=11)
+    bjs = DidImputation(se_method="bjs", **params).fit(df).summary()  # type: ignore[arg-type]
+    boot = DidImputation(  # type: ignore[arg-type]
+        se_method="wild_bootstrap", n_boot=1500, **params,
+    ).fit(df)
+    summary = boot.summary()
+
+    np.testing.assert_allclose(summary["se"], bjs["se"], rtol=0.1)
+    assert (summary["ci_low"] < summary["estimate"]).all()
+    assert (summary["ci_high"] > summary["estimate"]).all()
+    rerun = boot.reaggregate(se_method="wild_bootstrap")
+    pd.testing.assert_frame_equal(rerun.summary(), summary)
+    split = DidImputation(  # type: ignore[arg-type]
+        se_method="wild_bootstrap", n_boot=1500, n_jobs=2, **params,
+    ).fit(df)
+    pd.testing.assert_frame_equal(split.summary(), summary)
+    webb = boot.reaggregate(boot_weights="webb").summary()
+    assert not np.allclose(webb["se"], summary["se"])
+
+
+def test_two_way_clustering_matches_statsmodels() -> None:
+    """Two-way clustered mean variances and pretrend Wald tests should follow CGM."""
+
+    rng = np.random.RandomState(6)
+    n = 500
+    df = pd.DataFrame(
+        {
+            "i": rng.randint(0, 60, size=n),
+            "t": rng.randint(0, 9, size=n),
+            "state": rng.randint(0, 12, size=n),
+            "Ei": np.nan,
+            "_k": rng.randint(-3, 0, size=n).astype(float),
+        },
+    )
+    values = rng.normal(size=n) + 0.2 * df["state"].to_numpy() + 0.1 * df["t"].to_numpy()
+    panel = PanelIndex.from_frame(df, id="i", time="t", Ei="Ei", cluster=["state", "t"])
+    terms = panel.cluster_terms()
+    assert [sign for sign, _codes in terms] == [1.0, 1.0, -1.0]
+
+    groups = df[["state", "t"]].to_numpy()
+    fit = sm.OLS(values, np.ones((n, 1))).fit()
+    expected = cov_cluster_2groups(fit, groups)[0]
+    variance, _n_clusters = _cluster_mean_var(np.zeros(n, dtype=np.intp), terms, values, 1)
+    assert np.isclose(variance[0], expected[0, 0], rtol=1e-10)
+
+    pvalue, dof, used_ks = pretrend_joint_test(df, values, "i", "_k", 3, panel=panel)
+    dummies = pd.get_dummies(df["_k"]).to_numpy(dtype=float)
+    dummy_fit = sm.OLS(values, dummies).fit()
+    cov = cov_cluster_2groups(dummy_fit, groups)[0]
+    statistic = float(dummy_fit.params @ np.linalg.solve(cov, dummy_fit.params))
+    assert dof == 3 and used_ks == [-3, -2, -1]
+    assert np.isclose(pvalue, float(chi2.sf(statistic, 3)), rtol=1e-10)
+
+
+def test_cluster_column_is_honoured() -> None:
+    """SEs should cluster on the configured column, including multi-way specifications."""
+
+    df = dgp_constant_te(n_i=40, T=8, seed=9)
+    df["Y"] = df["Y"] + np.random.RandomState(9).normal(size=len(df))
+    df["state"] = df["i"] % 7
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(-2, 3), pretrends=2, minN=1)
+    by_unit = DidImputation(**params).fit(df)  # type: ignore[arg-type]
+    by_state = DidImputation(cluster="state", **params).fit(df)  # type: ignore[arg-type]
+    two_way = DidImputation(cluster=["state", "t"], **params).fit(df)  # type: ignore[arg-type]
+
+    assert by_state.meta["panel"]["cluster"] == "state"
+    assert two_way.meta["panel"]["cluster"] == ["state", "t"]
+    assert not np.allclose(by_state.summary()["se"], by_unit.summary()["se"])
+    assert not np.allclose(two_way.summary()["se"], by_state.summary()["se"])
+    assert by_state.meta["pretrend"]["pvalue"] != by_unit.meta["pretrend"]["pvalue"]
+    for method in ("bjs", "delta"):
+        summary = DidImputation(  # type: ignore[arg-type]
+            cluster=["state", "t"], se_method=method, **params,
+        ).fit(df).summary()
+        assert np.isfinite(summary["se"]).any() and not (summary["se"] == 0.0).any()
+
+
+@pytest.mark.parametrize("se_method", ["delta", "bjs"])
+def test_vcov_wald_and_lincom(se_method: str) -> None:
+    """The covariance diagonal should equal squared SEs; tests and combinations reuse it."""
+
+    df = dgp_constant_te(n_i=50, T=8, seed=4)
+    df["Y"] = df["Y"] + np.random.RandomState(4).normal(size=len(df))
+    result = DidImputation(  # type: ignore[arg-type]
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1, se_method=se_method,
+    ).fit(df)
+    summary = result.summary()
+    vcov = result.vcov()
+    assert list(vcov.index) == list(summary["k"])
+    np.testing.assert_allclose(np.sqrt(np.diag(vcov)), summary["se"], rtol=1e-10)
+    np.testing.assert_allclose(vcov.to_numpy(), vcov.to_numpy().T, atol=1e-14)
+
+    estimate, matrix = summary["estimate"].to_numpy(), vcov.to_numpy()
+    n_k = len(summary)
+    weights = np.zeros(n_k)
+    weights[:2] = 0.5
+    combo = result.lincom({0: 0.5, 1: 0.5})
+    assert np.isclose(combo["estimate"], weights @ estimate)
+    assert np.isclose(combo["se"], np.sqrt(weights @ matrix @ weights))
+    assert combo["ci_low"] < combo["estimate"] < combo["ci_high"]
+
+    restriction = np.eye(n_k)[:2] - np.eye(n_k, k=1)[:2]
+    gap = restriction @ estimate
+    expected = gap @ np.linalg.solve(restriction @ matrix @ restriction.T, gap)
+    test = result.wald(restriction)
+    assert test["dof"] == 2 and np.isclose(test["statistic"], expected)
+    assert np.isclose(test["pvalue"], chi2.sf(expected, 2))
+    with pytest.raises(ValidationError, match="one column per event time"):
+        result.wald(np.ones(n_k + 1))
+
+
+def test_negative_multiway_variances_are_undefined() -> None:
+    """A negative two-way clustered variance should give a NaN SE and vcov row, never zero."""
+
+    df = dgp_constant_te(n_i=40, T=8, seed=6)
+    df["Y"] = df["Y"] + np.random.RandomState(6).normal(size=len(df))
+    df["state"] = df["i"] % 3
+    result = DidImputation(  # type: ignore[arg-type]
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), pretrends=0, minN=1,
+        se_method="bjs", cluster=["state", "t"],
+    ).fit(df)
+    summary = result.summary()
+    vcov = result.vcov().to_numpy()
+    undefined = summary["se"].isna().to_numpy()
+    assert undefined.any() and not undefined.all() and not (summary["se"] == 0.0).any()
+    assert np.isnan(vcov[undefined]).all() and np.isnan(vcov[:, undefined]).all()
+    np.testing.assert_allclose(
+        np.sqrt(np.diag(vcov)[~undefined]), summary["se"][~undefined], rtol=1e-10,
+    )
+    with pytest.raises(EstimationError, match="without a defined SE"):
+        result.wald({int(summary["k"][undefined].iloc[0]): 1.0})
+    defined = summary[~undefined].iloc[0]
+    assert np.isclose(result.lincom({int(defined["k"]): 1.0})["se"], defined["se"])
+
+
+def test_pretrend_curve_skips_single_cluster_multiway_windows() -> None:
+    """Windows where a two-way term has one cluster should be NaN, not break the curve."""
+
+    df = dgp_constant_te(n_i=30, T=6, seed=0)
+    df["Y"] = df["Y"] + np.random.RandomState(0).normal(size=len(df))
+    df["state"] = df["i"] % 3
+    result = DidImputation(  # type: ignore[arg-type]
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), pretrends=3, minN=1,
+        cluster=["state", "t"],
+    ).fit(df)
+    curve = result.meta["pretrend_curve"]
+    assert np.isnan(curve[0]["pvalue"]) and curve[0]["dof"] == 0
+    assert np.isclose(curve[-1]["pvalue"], result.meta["pretrend"]["pvalue"], rtol=1e-10)
+
+
+def test_unit_influence_reproduces_bjs_variance() -> None:
+    """Unit influence scores should square-sum to the unit-clustered BJS variance."""
+
+    df = dgp_constant_te(n_i=40, T=8, seed=6)
+    df["Y"] = df["Y"] + np.random.RandomState(6).normal(size=len(df))
+    df["state"] = df["i"] % 5
+    params = dict(y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1, se_method="bjs")
+    by_unit = DidImputation(**params).fit(df)  # type: ignore[arg-type]
+    by_state = DidImputation(cluster="state", **params).fit(df)  # type: ignore[arg-type]
+
+    influence = by_state.unit_influence()
+    assert influence.index.name == "i" and len(influence) == df["i"].nunique()
+    assert list(influence.columns) == list(by_unit.summary()["k"])
+    np.testing.assert_allclose(
+        np.sqrt((influence**2).sum(axis=0)), by_unit.summary()["se"], rtol=1e-10,
+    )
+    by_state_sums = influence.groupby(df.groupby("i")["state"].first()).sum()
+    np.testing.assert_allclose(
+        np.sqrt((by_state_sums**2).sum(axis=0)), by_state.summary()["se"], rtol=1e-10,
+    )
+
+
+@pytest.mark.parametrize("cluster", [None, "state", ["state", "t"]])
+def test_pretrend_curve_matches_each_window(cluster: Any, monkeypatch) -> None:
+    """Every nested window of the curve should reproduce a separate pretrend test."""
+
+    df = dgp_constant_te(n_i=60, T=12, seed=2)
+    df["Ei"] = np.where(df["i"] % 3 == 0, np.nan, 6 + df["i"] % 4)
+    df["_k"] = df["t"] - df["Ei"]
+    df["state"] = df["i"] % 7
+    k = df["_k"].to_numpy()
+    placebo = np.where(k < 0, np.random.RandomState(0).normal(size=len(df)) + 0.05 * k, np.nan)
+    placebo[k == -3] = np.nan
+    panel = PanelIndex.from_frame(df, id="i", time="t", Ei="Ei", cluster=cluster)
+
+    curve = pretrend_curve(df, placebo, "i", "_k", 8, panel=panel)
+    assert [entry["window"] for entry in curve] == list(range(1, 9))
+    for window, entry in enumerate(curve, start=1):
+        pvalue, dof, used_ks = pretrend_joint_test(df, placebo, "i", "_k", window, panel=panel)
+        assert entry["dof"] == dof and entry["used_ks"] == used_ks
+        assert np.isclose(entry["pvalue"], pvalue, rtol=1e-8, equal_nan=True)
+    assert curve[2]["used_ks"] == [-2, -1] and np.isfinite(curve[3]["statistic"])
+
+    # fit() reduces the placebo cells once and reads the joint test off the widest window.
+    calls = []
+    placebo_sums = se._placebo_sums
+
+    def counting_sums(*args: Any, **kwargs: Any) -> Any:
+        calls.append(args)
+        return placebo_sums(*args, **kwargs)
+
+    monkeypatch.setattr(se, "_placebo_sums", counting_sums)
+    result = DidImputation(  # type: ignore[arg-type]
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 2), pretrends=3, minN=1,
+    ).fit(dgp_constant_te(n_i=30, T=8, seed=3))
+    assert len(calls) == 1
+    last = result.meta["pretrend_curve"][-1]
+    assert len(result.meta["pretrend_curve"]) == 3
+    assert np.isclose(last["pvalue"], result.meta["pretrend"]["pvalue"], equal_nan=True)
+
+
+
+@pytest.mark.parametrize("cluster", [None, "state"])
+def test_estimand_spec_reproduces_event_time_summary(cluster: Any) -> None:
+    """Per-k specs should match the BJS summary; custom estimands match manual weighting."""
+
+    df = dgp_constant_te(n_i=40, T=8, seed=8)
+    df["Y"] = df["Y"] + np.random.RandomState(8).normal(size=len(df))
+    df["state"] = df["i"] % 5
+    result = DidImputation(  # type: ignore[arg-type]
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), minN=1, se_method="bjs",
+        cluster=cluster,
+    ).fit(df)
+    summary = result.summary()
+
+    table = result.estimands({f"k{k}": {"k": int(k)} for k in summary["k"]})
+    np.testing.assert_allclose(table["estimate"], summary["estimate"], rtol=1e-10)
+    np.testing.assert_allclose(table["se"], summary["se"], rtol=1e-8)
+    assert table["n"].tolist() == summary["n"].tolist()
+
+    cells = result.cells()
+    cells["w"] = 1.0 + cells["i"] % 3
+    short = cells["k"].between(0, 1).to_numpy()
+    manual = float(np.average(cells["tau"][short], weights=cells["w"][short]))
+    matrix = sp.csr_matrix(np.where(short, cells["w"], 0.0)[None, :] / cells["w"][short].sum())
+    by_matrix = result.estimands(matrix)
+    by_spec = result.estimands({
+        "short": {"k": (0, 1), "weight": cells["w"].to_numpy()}, "none": {"k": 99},
+    })
+    assert by_matrix["estimand"].tolist() == ["e0"]
+    np.testing.assert_allclose(by_matrix["estimate"], [manual], rtol=1e-12)
+    np.testing.assert_allclose(by_spec["estimate"].iloc[0], manual, rtol=1e-12)
+    np.testing.assert_allclose(by_spec["se"].iloc[0], by_matrix["se"].iloc[0], rtol=1e-12)
+    assert by_spec["n"].tolist() == [int(short.sum()), 0] and np.isnan(by_spec["se"].iloc[1])
+
+    with pytest.raises(ValidationError, match="Unknown keys"):
+        result.estimands({"bad": {"horizon": 0}})
+    with pytest.raises(ValidationError, match="one column per treated cell"):
+        result.estimands(np.ones((1, 3)))
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import time
+
+import numpy as np
+import pytest
+from scipy.optimize import linprog
+
+from didimpute import DidImputation, EstimationError, ValidationError
+from didimpute.sensitivity import sensitivity_bounds
+
+from .dgp import dgp_constant_te
+
+
+def _lp_bounds(
+    beta: np.ndarray, n_pre: int, weights: np.ndarray, method: str, bound: float,
+) -> tuple:
+    """Solve ``min / max l' delta_post`` explicitly with ``delta_pre = beta_pre``."""
+
+    n_post = len(weights)
+    n = n_pre + n_post
+    rows = []
+    limits = []
+    if method == "relative_magnitude":
+        cap = bound * np.max(np.abs(np.diff(beta[:n_pre])))
+        for t in range(n_pre, n):
+            row = np.zeros(n)
+            row[t], row[t - 1] = 1.0, -1.0
+            rows.extend([row, -row])
+            limits.extend([cap, cap])
+    else:
+        for t in range(n_pre - 1, n - 1):
+            row = np.zeros(n)
+            row[t + 1], row[t], row[t - 1] = 1.0, -2.0, 1.0
+            rows.extend([row, -row])
+            limits.extend([bound, bound])
+    objective = np.concatenate([np.zeros(n_pre), weights])
+    fixed = [(value, value) for value in beta[:n_pre]] + [(None, None)] * n_post
+    low = linprog(objective, A_ub=np.array(rows), b_ub=limits, bounds=fixed).fun
+    high = -linprog(-objective, A_ub=np.array(rows), b_ub=limits, bounds=fixed).fun
+    target = float(weights @ beta[n_pre:])
+    return target - high, target - low
+
+
+@pytest.mark.parametrize("method", ["relative_magnitude", "smoothness"])
+def test_closed_form_bounds_match_linear_programs(method: str) -> None:
+    """Vectorized bounds should equal the explicit LP solution at every grid point."""
+
+    rng = np.random.RandomState(0)
+    n_pre, n_post = 4, 3
+    beta = rng.normal(size=n_pre + n_post)
+    root = rng.normal(size=(n_pre + n_post, n_pre + n_post))
+    weights = np.array([0.2, 0.5, 0.3])
+    grid = np.array([0.0, 0.5, 1.0, 1.7])
+    out = sensitivity_bounds(
+        list(range(-n_pre, 0)), list(range(n_post)), beta, root @ root.T, weights,
+        method=method, grid=grid,
+    )
+    for bound, lb, ub in zip(grid, out["lb"], out["ub"]):
+        expected = _lp_bounds(beta, n_pre, weights, method, float(bound))
+        np.testing.assert_allclose([lb, ub], expected, atol=1e-8)
+    assert np.all(out["ci_low"] <= out["lb"]) and np.all(out["ci_high"] >= out["ub"])
+
+
+def test_result_sensitivity_grid() -> None:
+    """A fitted result should produce a widening 200-point grid quickly without refitting."""
+
+    df = dgp_constant_te(n_i=60, T=10, seed=2)
+    df["Y"] = df["Y"] + 0.3 * np.random.RandomState(2).normal(size=len(df))
+    result = DidImputation(
+        y="Y", id="i", time="t", Ei="Ei", horizons=(0, 3), pretrends=4, minN=1,
+    ).fit(df)
+
+    start = time.perf_counter()
+    grid = result.sensitivity(Mbar_grid=np.linspace(0.0, 2.0, 200))
+    assert time.perf_counter() - start < 1.0
+    assert len(grid) == 200 and (grid["method"] == "relative_magnitude").all()
+    assert np.all(np.diff(grid["ub"] - grid["lb"]) >= 0)
+    assert np.isclose(grid["lb"].iloc[0], grid["ub"].iloc[0])
+
+    smooth = result.sensitivity("smoothness", [0.0, 0.1], weights={0: 1.0})
+    assert smooth["lb"].iloc[1] < smooth["lb"].iloc[0] < smooth["ub"].iloc[1]
+    with pytest.raises(ValidationError, match="method"):
+        result.sensitivity("bounded")
+    with pytest.raises(EstimationError, match="two pre-period"):
+        result.sensitivity(pretrends=1)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from didimpute import DidImputation, EstimationError, api
+from didimpute.first_stage import FirstStageModel
+
+from .dgp import dgp_with_controls
+
+
+def _panel() -> pd.DataFrame:
+    return dgp_with_controls(n_i=40, T=10, seed=3)
+
+
+def _estimator(solver: str = "dense") -> DidImputation:
+    return DidImputation(
+        y="Y",
+        id="i",
+        time="t",
+        Ei="Ei",
+        controls=["x1"],
+        weight="w",
+        horizons=(-3, 6),
+        pretrends=3,
+        minN=1,
+        solver=solver,
+    )
+
+
+@pytest.mark.parametrize("solver", ["dense", "sparse"])
+def test_update_matches_full_refit(solver: str) -> None:
+    """Appending a period, a new unit, and a revised row should match refitting from scratch."""
+
+    df = _panel()
+    old = df[(df["t"] < 9) & (df["i"] != 39)]
+    revised = old[(old["i"] == 38) & (old["t"] == 3)].assign(Y=lambda d: d["Y"] + 1.0)
+    new = pd.concat([df[df["t"] == 9], df[df["i"] == 39], revised]).drop_duplicates(["i", "t"])
+
+    base = _estimator(solver).fit(old)
+    base_summary = base.summary()
+    updated = base.update(new)
+
+    replaced = (old["i"] == 38) & (old["t"] == 3)
+    expected = _estimator(solver).fit(pd.concat([old[~replaced], new], ignore_index=True))
+    pd.testing.assert_frame_equal(updated.summary(), expected.summary(), rtol=1e-9, atol=1e-12)
+    assert np.isclose(updated.meta["pretrend"]["pvalue"], expected.meta["pretrend"]["pvalue"])
+    assert updated.meta["update"] == {"mode": "incremental", "added": 30, "removed": 1}
+    assert updated.intermediate["first_stage"]["updates"] == 1
+    pd.testing.assert_frame_equal(base.summary(), base_summary)
+
+
+def test_update_only_processes_the_changed_rows(monkeypatch) -> None:
+    """Validation and first-stage cross products should see the new rows, not the panel."""
+
+    df = _panel()
+    old, new = df[df["t"] < 9], df[df["t"] == 9]
+    base = _estimator("sparse").fit(old)
+
+    seen: dict = {"prepared": [], "crossed": []}
+    prepare, cross = api.prepare_rows, FirstStageModel._cross_products
+
+    def counting_prepare(frame, *args, **kwargs):
+        seen["prepared"].append(len(frame))
+        return prepare(frame, *args, **kwargs)
+
+    def counting_cross(self, design, weights, y_vec):
+        seen["crossed"].append(design.shape[0])
+        return cross(self, design, weights, y_vec)
+
+    monkeypatch.setattr(api, "prepare_rows", counting_prepare)
+    monkeypatch.setattr(FirstStageModel, "_cross_products", counting_cross)
+    base.update(new)
+    assert seen["prepared"] == [len(new)]
+    assert sum(seen["crossed"]) == int(new["Ei"].isna().sum() + (new["t"] < new["Ei"]).sum())
+
+
+def test_update_emptying_a_level_reports_refit_error() -> None:
+    """Emptying a unit's untreated rows falls back to a refit, which reports the unseen unit."""
+
+    df = _panel()
+    treated_unit = df[df["Ei"].notna()]["i"].iloc[0]
+    base = _estimator().fit(df)
+    revised = df[df["i"] == treated_unit].assign(Ei=0.0)
+    with pytest.raises(EstimationError, match="unseen unit ids"):
+        base.update(revised)
+
+
+def test_update_requires_in_memory_result() -> None:
+    df = _panel()
+    result = _estimator().fit_chunks(df)
+    with pytest.raises(EstimationError, match="update"):
+        result.update(df.head())
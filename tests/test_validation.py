@@ -20,6 +20,10 @@ def test_config_validation() -> None:
         validate_config((-2, 2), 1, "bad", 0.95)
     with pytest.raises(ValidationError):
         validate_config((-2, 2), 1, "nobs", 1.5)
+    validate_config((-2, 2), 1, "nobs", 0.95, n_jobs=-1)
+    for n_jobs in (0, -3):
+        with pytest.raises(ValidationError, match="n_jobs"):
+            validate_config((-2, 2), 1, "nobs", 0.95, n_jobs=n_jobs)
 
 
 def test_duplicate_detection() -> None:
@@ -33,15 +37,19 @@ def test_duplicate_detection() -> None:
 
 
 def test_untreated_presence_and_types() -> None:
-    """Untreated observation count should be positive and helper columns present."""
+    """Untreated observation count should be positive and helper arrays compact."""
 
     df = pd.DataFrame(
-        {"Y": [1, 2, 3, 4], "i": [1, 1, 2, 2], "t": [0, 1, 0, 1], "Ei": [1, 1, np.nan, np.nan]},
+        {
+            "Y": [1, 2, 3, 4], "i": [1, 1, 2, 2], "t": [0, 1, 0, 1], "Ei": [1, 1, np.nan, np.nan],
+            "note": ["a", "b", "c", "d"],
+        },
     )
     ctx = validate_and_prepare(df, "Y", "i", "t", "Ei", None, None, None)
-    prepared = ctx["df"]
-    assert "_k" in prepared
-    assert prepared["_untreated"].sum() > 0
+    panel = ctx["panel"]
+    assert list(ctx["df"].columns) == ["Y", "i", "t", "Ei"]
+    assert panel.event_time.dtype == np.int16
+    assert panel.untreated.sum() > 0
 
 
 def test_weights_nonnegative() -> None:
@@ -52,3 +60,23 @@ def test_weights_nonnegative() -> None:
     )
     with pytest.raises(ValidationError):
         validate_and_prepare(df, "Y", "i", "t", "Ei", None, "w", None)
+
+
+def test_cluster_columns_checked() -> None:
+    """Every cluster column must exist and be free of missing values."""
+
+    df = pd.DataFrame(
+        {
+            "Y": [1, 2, 3, 4],
+            "i": [1, 1, 2, 2],
+            "t": [0, 1, 0, 1],
+            "Ei": [np.nan] * 4,
+            "state": ["a", "a", None, "b"],
+        },
+    )
+    with pytest.raises(ValidationError, match="missing values"):
+        validate_and_prepare(df, "Y", "i", "t", "Ei", None, None, ["t", "state"])
+    with pytest.raises(ValidationError, match="not found"):
+        validate_and_prepare(df, "Y", "i", "t", "Ei", None, None, ["t", "region"])
+    ctx = validate_and_prepare(df.fillna("c"), "Y", "i", "t", "Ei", None, None, ["t", "state"])
+    assert len(ctx["panel"].cluster_dims) == 2